@@ -2,6 +2,17 @@ import streamlit as st
 import pandas as pd
 from pathlib import Path
 from ui import render_shell
+from src.core.catalog import SNAPSHOT_DIR, get_catalog
+from src.core.facets import mask_to_bits, with_count
+from src.core.scholarships import AVAILABILITY, SCHOLARSHIP_TAGS
+from src.core.recommender import Profile, program_eligibility
+from src.core.reccache import cached_iter_top_k
+from src.core.tuition import BASE_CURRENCY, to_base, uni_budget_mask
+from src.core.geo import nearest_centers, universities_within
+from src.core.intent import apply_filters, extract_filters
+from src.core.llm import get_client, llm_available
+from src.core.explain import explain_top
+from src.core.batch import read_profiles, score_batch, to_csv_bytes, to_jsonl_bytes
 
 # ----------------------------
 # Page config (لازم تكون أول شيء)
@@ -151,134 +162,6 @@ UNIS_PATH = DATA_DIR / "universities.csv"
 PROGS_PATH = DATA_DIR / "programs.csv"
 
 
-@st.cache_data(show_spinner=False)
-def load_csv(path: Path) -> pd.DataFrame:
-    """
-    قراءة CSV بشكل مرن:
-    - نجرب قراءة بهيدر طبيعي.
-    - إذا فشل/طلع أعمدة رقمية فقط أو ملف بدون هيدر -> نقرأ header=None.
-    """
-    if (not path.exists()) or path.stat().st_size == 0:
-        return pd.DataFrame()
-
-    try:
-        df = pd.read_csv(path, encoding="utf-8", engine="python", on_bad_lines="skip")
-        if all(isinstance(c, int) for c in df.columns):
-            df = pd.read_csv(path, encoding="utf-8", engine="python", on_bad_lines="skip", header=None)
-        return df
-    except Exception:
-        return pd.read_csv(path, encoding="utf-8", engine="python", on_bad_lines="skip", header=None)
-
-
-@st.cache_data(show_spinner=False)
-def load_unis_csv(path: Path) -> pd.DataFrame:
-    if (not path.exists()) or path.stat().st_size == 0:
-        return pd.DataFrame()
-
-    first_line = path.read_text(encoding="utf-8", errors="ignore").splitlines()[0].strip().lower()
-    has_header = first_line.startswith("uni_id")
-
-    if has_header:
-        df = pd.read_csv(path, encoding="utf-8", engine="python", on_bad_lines="skip")
-    else:
-        df = pd.read_csv(path, encoding="utf-8", engine="python", on_bad_lines="skip", header=None)
-
-    return df
-
-
-def normalize_unis(df: pd.DataFrame) -> pd.DataFrame:
-    if df is None or df.empty:
-        return pd.DataFrame()
-
-    df = df.copy()
-
-    cols_12 = [
-        "uni_id", "name_ar", "name_en", "country", "city", "type",
-        "website", "admissions_url", "programs_url",
-        "ranking_source", "extra_1", "extra_2"
-    ]
-    cols_15 = cols_12 + ["scholarship", "sch_notes", "sch_url"]
-
-    if list(df.columns) == list(range(len(df.columns))):
-        if len(df.columns) == 12:
-            df.columns = cols_12
-        elif len(df.columns) == 15:
-            df.columns = cols_15
-
-    if "uni_id" in df.columns:
-        first_val = str(df.iloc[0]["uni_id"]).strip().lower()
-        if first_val == "uni_id":
-            df = df.iloc[1:].copy()
-
-    if "ranking_value" not in df.columns:
-        df["ranking_value"] = df.get("extra_1", "")
-    if "accreditation_notes" not in df.columns:
-        df["accreditation_notes"] = df.get("extra_2", "")
-
-    if "scholarship" not in df.columns:
-        df["scholarship"] = "Unknown"
-
-    df["scholarship"] = (
-        df["scholarship"]
-        .fillna("Unknown")
-        .astype(str)
-        .str.replace("  ", " ")
-        .str.strip()
-        .replace({"": "Unknown", "nan": "Unknown"})
-    )
-
-    if "sch_notes" not in df.columns:
-        df["sch_notes"] = ""
-    if "sch_url" not in df.columns:
-        df["sch_url"] = ""
-
-    needed = [
-        "uni_id", "name_ar", "name_en", "country", "city", "type",
-        "scholarship", "sch_notes", "sch_url",
-        "website", "admissions_url", "programs_url",
-        "ranking_source", "ranking_value", "accreditation_notes"
-    ]
-
-    for c in needed:
-        if c not in df.columns:
-            df[c] = ""
-
-    return df[needed]
-
-
-def normalize_progs(df: pd.DataFrame) -> pd.DataFrame:
-    if df is None or df.empty:
-        return pd.DataFrame()
-
-    df = df.copy()
-    needed = [
-        "program_id", "uni_id", "level", "degree_type", "major_field",
-        "program_name_en", "program_name_ar", "city", "language",
-        "duration_years", "tuition_notes", "admissions_requirements", "url",
-        "english_test", "english_score", "math_test", "math_score",
-        "admission_tests", "admission_notes",
-    ]
-    for c in needed:
-        if c not in df.columns:
-            df[c] = ""
-    return df[needed]
-
-
-def make_uni_label(row: pd.Series) -> str:
-    ar = str(row.get("name_ar", "")).strip()
-    en = str(row.get("name_en", "")).strip()
-    city = str(row.get("city", "")).strip()
-    country = str(row.get("country", "")).strip()
-    return f"{ar} — {en} ({city}, {country})"
-
-
-def ensure_cols(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
-    for c in cols:
-        if c not in df.columns:
-            df[c] = ""
-    return df
-
-
 # ----------------------------
 # Navigation (بدون سايدبار) — RTL: الأزرار من اليمين لليسار
 # ----------------------------
@@ -344,8 +227,8 @@ if st.session_state.page == "الرئيسية":
 elif st.session_state.page == "بحث الجامعات":
     st.markdown('<h1 class="page-title">بحث الجامعات</h1>', unsafe_allow_html=True)
 
-    unis = normalize_unis(load_unis_csv(UNIS_PATH))
-    progs = normalize_progs(load_csv(PROGS_PATH))
+    catalog = get_catalog(UNIS_PATH, PROGS_PATH)
+    unis, progs = catalog.unis, catalog.progs
 
     if unis.empty:
         st.error(f"universities.csv not found or empty: {UNIS_PATH}")
@@ -362,68 +245,77 @@ elif st.session_state.page == "بحث الجامعات":
     # ترتيب الأعمدة يمشي RTL: نخلي أول فلتر (الدولة) في أقصى اليمين
     c4, c3, c2, c1 = st.columns([1.2, 1, 1, 1.2])
 
-    countries = sorted([x for x in unis["country"].unique() if str(x).strip()])
-    country = c4.selectbox("الدولة", ["All"] + countries, index=0)
-
-    uni_types = sorted([x for x in unis["type"].unique() if str(x).strip()])
-    uni_type = c3.selectbox("نوع الجامعة", ["All"] + uni_types, index=0)
-
-    levels = sorted([x for x in progs["level"].unique() if str(x).strip()]) if not progs.empty else []
-    level = c2.selectbox("المرحلة", ["All"] + levels, index=0)
+    # عدد النتائج جنب كل خيار: نحسبه من اختيارات الـ rerun الحالي (session_state) قبل رسم الفلاتر
+    fidx = catalog.uni_facet_index
+    q_prev = str(st.session_state.get("search_q", "")).strip().lower()
+    base = mask_to_bits(catalog.uni_search.mask(q_prev, unis.index)) if q_prev else None
+
+    # الميزانية (interval index على الرسوم) تدخل كـ base للفلاتر والعدادات
+    def budget_bits(budget: float, currency: str, include_unknown: bool) -> int | None:
+        if budget <= 0:
+            return None
+        mask = uni_budget_mask(catalog.tuition_index, catalog.prog_uni_pos, len(unis),
+                               to_base(budget, currency, catalog.rates), include_unknown)
+        return mask_to_bits(mask)
+
+    b_prev = budget_bits(
+        float(st.session_state.get("search_budget", 0.0)),
+        st.session_state.get("search_currency", BASE_CURRENCY),
+        bool(st.session_state.get("search_budget_unknown", True)),
+    )
+    if b_prev is not None:
+        base = b_prev if base is None else base & b_prev
+    counts = fidx.counts(
+        {
+            "country": st.session_state.get("search_country", "All"),
+            "type": st.session_state.get("search_type", "All"),
+            "availability": st.session_state.get("search_sch_yn", "All"),
+            "tags": st.session_state.get("search_sch_tags", []),
+        },
+        base=base,
+    )
 
-    majors = sorted([x for x in progs["major_field"].unique() if str(x).strip()]) if not progs.empty else []
-    major = c1.selectbox("التخصص", ["All"] + majors, index=0)
+    facets = catalog.facets
+    country = c4.selectbox("الدولة", ["All", *facets.countries], index=0, key="search_country",
+                           format_func=lambda v: with_count(v, counts["country"]))
+    uni_type = c3.selectbox("نوع الجامعة", ["All", *facets.uni_types], index=0, key="search_type",
+                            format_func=lambda v: with_count(v, counts["type"]))
+    level = c2.selectbox("المرحلة", ["All", *facets.levels], index=0)
+    major = c1.selectbox("التخصص", ["All", *facets.majors], index=0)
 
     st.write("")
     # صف المنح RTL: نخلي (توفر المنحة) يمين و(نوع المنحة) يسار
     right_s, left_s = st.columns([2.8, 1.2])
 
-    yn = left_s.selectbox("توفر المنح", ["All", "Yes", "No", "Unknown"], index=0)
-    sch_tags = ["Local", "GCC", "International", "Children of citizen mothers"]
-    selected_tags = right_s.multiselect("نوع المنحة", sch_tags, default=[])
+    yn = left_s.selectbox("توفر المنح", ["All", *AVAILABILITY], index=0, key="search_sch_yn",
+                          format_func=lambda v: with_count(v, counts["availability"]))
+    selected_tags = right_s.multiselect("نوع المنحة", SCHOLARSHIP_TAGS, default=[], key="search_sch_tags",
+                                        format_func=lambda v: with_count(v, counts["tags"]))
 
-    q = st.text_input("بحث (الجامعة / المدينة)", value="").strip().lower()
+    st.write("")
+    # صف الميزانية RTL: المبلغ يمين، العملة، وبعدها خيار الرسوم غير المعروفة
+    unk_s, cur_s, bud_s = st.columns([1.6, 0.8, 1.6])
+    budget = bud_s.number_input("الميزانية السنوية (حد أعلى، 0 = بدون)", min_value=0.0, value=0.0, step=1000.0,
+                                key="search_budget")
+    currency = cur_s.selectbox("العملة", list(catalog.rates), index=0, key="search_currency")
+    include_unknown = unk_s.checkbox("اعرض الجامعات اللي رسومها غير معروفة", value=True, key="search_budget_unknown")
+
+    q = st.text_input("بحث (الجامعة / المدينة)", value="", key="search_q").strip().lower()
+    ranked = st.checkbox("رتّب النتائج حسب الصلة", value=False, disabled=not q)
 
     # ----------------------------
-    # apply filters
+    # apply filters (AND بين bitsets)
     # ----------------------------
-    unis_f = unis.copy()
-
-    if country != "All":
-        unis_f = unis_f[unis_f["country"] == country]
-    if uni_type != "All":
-        unis_f = unis_f[unis_f["type"] == uni_type]
-
-    # Scholarship availability derived from scholarship column
-    if yn != "All":
-        def availability(x: str) -> str:
-            x = str(x).strip()
-            if x == "No":
-                return "No"
-            if x == "Unknown" or x == "":
-                return "Unknown"
-            return "Yes"
-
-        unis_f = unis_f[unis_f["scholarship"].apply(availability) == yn]
-
-    # Tags filter (inside scholarship)
-    if selected_tags:
-        def has_tags(x: str) -> bool:
-            x = str(x).strip()
-            if x in ["No", "Unknown", ""]:
-                return False
-            parts = [p.strip() for p in x.split("|") if p.strip()]
-            return all(tag in parts for tag in selected_tags)
-
-        unis_f = unis_f[unis_f["scholarship"].apply(has_tags)]
-
-    if q:
-        mask_u = (
-            unis_f["name_en"].astype(str).str.lower().str.contains(q, na=False)
-            | unis_f["name_ar"].astype(str).str.lower().str.contains(q, na=False)
-            | unis_f["city"].astype(str).str.lower().str.contains(q, na=False)
-        )
-        unis_f = unis_f[mask_u]
+    bits = fidx.select({"country": country, "type": uni_type, "availability": yn, "tags": selected_tags},
+                       base=budget_bits(budget, currency, include_unknown))
+    unis_f = unis.iloc[fidx.positions(bits)]
+
+    if q and ranked:
+        # BM25: نفس الفلاتر كمرشحين، والنتائج مرتبة حسب الصلة مع عمود relevance
+        pos, scores = catalog.uni_bm25.top_k(q, k=50, candidates=unis_f.index.to_numpy())
+        unis_f = unis.iloc[pos].assign(relevance=scores.round(2))
+    elif q:
+        unis_f = unis_f[catalog.uni_search.mask(q, unis_f.index)]
 
     # ----------------------------
     # Results
@@ -437,8 +329,8 @@ elif st.session_state.page == "بحث الجامعات":
         "website", "admissions_url", "programs_url",
         "ranking_source", "ranking_value"
     ]
-
-    unis_f = ensure_cols(unis_f, cols_show)
+    if "relevance" in unis_f.columns:
+        cols_show = ["relevance"] + cols_show
 
     st.dataframe(
         unis_f[cols_show],
@@ -459,23 +351,17 @@ elif st.session_state.page == "بحث الجامعات":
 elif st.session_state.page == "المقارنة":
     st.markdown('<h1 class="page-title">المقارنة بين الجامعات</h1>', unsafe_allow_html=True)
 
-    unis = normalize_unis(load_unis_csv(UNIS_PATH))
+    catalog = get_catalog(UNIS_PATH, PROGS_PATH)
+    unis = catalog.unis
     if unis.empty:
         st.error(f"universities.csv not found or empty: {UNIS_PATH}")
         st.stop()
 
-    unis = unis.copy()
-    unis["uni_id"] = unis["uni_id"].astype(str).str.strip()
-    unis = unis[unis["uni_id"].ne("") & unis["uni_id"].ne("nan")]
-    unis = unis.drop_duplicates(subset=["uni_id"], keep="first")
-
-    unis["label"] = unis.apply(make_uni_label, axis=1)
-    label_map = dict(zip(unis["uni_id"].tolist(), unis["label"].tolist()))
-    unis = unis.sort_values(["country", "city", "name_en"], na_position="last")
+    label_map = catalog.uni_labels
 
     selected_ids = st.multiselect(
         "اختار 2 إلى 4 جامعات للمقارنة",
-        options=unis["uni_id"].tolist(),
+        options=catalog.facets.uni_ids,
         format_func=lambda x: label_map.get(str(x), str(x)),
         max_selections=4
     )
@@ -484,16 +370,14 @@ elif st.session_state.page == "المقارنة":
         st.info("يرجى اختيار جامعتين على الأقل لتظهر المقارنة.")
         st.stop()
 
-    comp = unis[unis["uni_id"].isin([str(x).strip() for x in selected_ids])].copy()
+    comp = unis[unis["uni_id"].isin([str(x).strip() for x in selected_ids])]
+    comp = comp.sort_values(["country", "city", "name_en"], na_position="last")
 
     cols_compare = [
         "uni_id","name_ar","name_en","country","city","type",
         "scholarship","ranking_source","ranking_value","accreditation_notes",
         "website","admissions_url","programs_url"
     ]
-    for c in cols_compare:
-        if c not in comp.columns:
-            comp[c] = ""
 
     st.markdown("### جدول المقارنة")
     st.dataframe(
@@ -525,6 +409,11 @@ elif st.session_state.page == "المقارنة":
                 if notes:
                     st.markdown(f"**ملاحظات:** {notes}")
 
+                # جامعات مشابهة (جدول محسوب مسبقاً: قراءة صف واحد)
+                pos, _ = catalog.uni_neighbors.neighbors(str(uni_id), 3)
+                if pos.size:
+                    st.markdown("**جامعات مشابهة:** " + "، ".join(unis["name_ar"].iloc[pos]))
+
                 st.write("")
                 c1, c2, c3 = st.columns(3)
                 if str(row.get("website", "")).strip():
@@ -539,9 +428,8 @@ elif st.session_state.page == "المقارنة":
 # Page: رُشد
 # ----------------------------
 elif st.session_state.page == "رُشد":
-    # ✅ إصلاح مهم: قراءة الجامعات لازم تكون load_unis_csv
-    unis = normalize_unis(load_unis_csv(UNIS_PATH))
-    progs = normalize_progs(load_csv(PROGS_PATH))
+    catalog = get_catalog(UNIS_PATH, PROGS_PATH)
+    unis = catalog.unis
 
     if unis.empty:
         st.error("ملف الجامعات universities.csv فاضي أو غير موجود.")
@@ -559,27 +447,6 @@ elif st.session_state.page == "رُشد":
         unsafe_allow_html=True
     )
 
-    # أعمدة اختيارية لتفادي NameError / KeyError
-    def ensure_program_requirements(df: pd.DataFrame) -> pd.DataFrame:
-        if df is None or df.empty:
-            return df if df is not None else pd.DataFrame()
-        df = df.copy()
-        for c in ["english_test", "english_score", "math_requirement", "admission_notes"]:
-            if c not in df.columns:
-                df[c] = ""
-        return df
-
-    progs = ensure_program_requirements(progs)
-
-    TEST_CENTERS = {
-        ("Qatar", "Doha"): {"IELTS": [{"name": "British Council (Doha)", "url": ""}, {"name": "IDP Education (Doha)", "url": ""}]},
-        ("Bahrain", "Manama"): {"IELTS": [{"name": "IELTS test center (Bahrain)", "url": ""}]},
-        ("Oman", "Muscat"): {"IELTS": [{"name": "IELTS test center (Muscat)", "url": ""}]},
-        ("Saudi Arabia", "Riyadh"): {"IELTS": [{"name": "IELTS test center (Riyadh)", "url": ""}]},
-        ("UAE", "Abu Dhabi"): {"IELTS": [{"name": "IELTS test center (Abu Dhabi)", "url": ""}]},
-        ("Kuwait", "Kuwait City"): {"IELTS": [{"name": "IELTS test center (Kuwait)", "url": ""}]},
-    }
-
     def ar_status(x: str) -> str:
         m = {"Suitable": "مناسب", "Conditional": "مشروط", "Unknown": "غير واضح"}
         return m.get(x, "غير واضح")
@@ -587,24 +454,14 @@ elif st.session_state.page == "رُشد":
     with st.expander("ملف الطالب", expanded=True):
         c1, c2, c3 = st.columns(3)
 
-        countries = sorted([x for x in unis["country"].unique() if str(x).strip()])
-        pref_country = c1.selectbox("الدولة المفضلة", ["All"] + countries, index=0)
-
-        if pref_country != "All":
-            cities = sorted([x for x in unis.loc[unis["country"] == pref_country, "city"].unique() if str(x).strip()])
-        else:
-            cities = sorted([x for x in unis["city"].unique() if str(x).strip()])
-        pref_city = c2.selectbox("المدينة (اختياري)", ["All"] + cities, index=0)
-
-        level_options = sorted([x for x in progs["level"].unique() if str(x).strip()]) if (not progs.empty and "level" in progs.columns) else []
-        study_level = c3.selectbox("المستوى الدراسي المطلوب", ["All"] + level_options, index=0)
+        facets = catalog.facets
+        pref_country = c1.selectbox("الدولة المفضلة", ["All", *facets.countries], index=0)
+        pref_city = c2.selectbox("المدينة (اختياري)", ["All", *facets.cities_for(pref_country)], index=0)
+        study_level = c3.selectbox("المستوى الدراسي المطلوب", ["All", *facets.levels], index=0)
 
         d1, d2, d3 = st.columns(3)
-        major_field_options = sorted([x for x in progs["major_field"].unique() if str(x).strip()]) if (not progs.empty and "major_field" in progs.columns) else []
-        major_field = d1.selectbox("مجال التخصص", ["All"] + major_field_options, index=0)
-
-        language_options = sorted([x for x in progs["language"].unique() if str(x).strip()]) if (not progs.empty and "language" in progs.columns) else []
-        prog_lang = d2.selectbox("لغة الدراسة", ["All"] + language_options, index=0)
+        major_field = d1.selectbox("مجال التخصص", ["All", *facets.majors], index=0)
+        prog_lang = d2.selectbox("لغة الدراسة", ["All", *facets.languages], index=0)
 
         scholarship_need = d3.selectbox("المنح مهمة؟", ["All", "Yes", "No"], index=0)
 
@@ -614,130 +471,83 @@ elif st.session_state.page == "رُشد":
         ielts = e2.number_input("IELTS (اختياري)", min_value=0.0, max_value=9.0, value=0.0, step=0.5)
         math_avg = e3.number_input("رياضيات (اختياري)", min_value=0.0, max_value=100.0, value=0.0, step=0.5)
 
+        f1, f2 = st.columns([2, 1])
+        budget = f1.number_input("الميزانية السنوية للرسوم (اختياري، 0 = بدون)", min_value=0.0, value=0.0, step=1000.0)
+        budget_cur = f2.selectbox("العملة", list(catalog.rates), index=0)
+
+        cities = catalog.cities
+        home_options = ["—", *[f"{city} — {country}" for country, city in zip(cities["country"], cities["city"])]]
+        g1, g2 = st.columns([2, 1])
+        home = g1.selectbox("مدينتك الحالية (لأقرب مراكز الاختبارات)", home_options, index=0,
+                            help="إذا ما اخترت، نستخدم الدولة/المدينة المفضلة.")
+        radius = g2.slider("جامعات قريبة منك (كم)", min_value=10, max_value=500, value=50, step=10)
+
         q_free = st.text_input("ملاحظة/تفضيل (اختياري)", placeholder="مثال: أبي جامعة قوية في التقنية + منح")
 
-    def uni_has_scholarship(s: str) -> bool:
-        if not isinstance(s, str):
-            return False
-        s = s.strip()
-        return s not in ["", "No", "Unknown"]
-
-    def match_programs_for_uni(uni_id: str) -> pd.DataFrame:
-        if progs.empty or "uni_id" not in progs.columns:
-            return pd.DataFrame()
-        df = progs[progs["uni_id"] == uni_id].copy()
-
-        if study_level != "All" and "level" in df.columns:
-            df = df[df["level"] == study_level]
-        if major_field != "All" and "major_field" in df.columns:
-            df = df[df["major_field"] == major_field]
-        if prog_lang != "All" and "language" in df.columns:
-            df = df[df["language"] == prog_lang]
-
-        return df
-
-    def safe_float(x) -> float:
-        try:
-            return float(str(x).strip())
-        except Exception:
-            return 0.0
-
-    def admission_label(required_ielts: float, user_ielts: float) -> str:
-        if required_ielts <= 0:
-            return "Unknown"
-        if user_ielts <= 0:
-            return "Conditional"
-        return "Suitable" if user_ielts >= required_ielts else "Conditional"
-
-    def estimate_req_from_programs(df_prog: pd.DataFrame) -> dict:
-        req = {"english_test": "", "english_score": "", "math_requirement": "", "admission_notes": ""}
-        if df_prog is None or df_prog.empty:
-            return req
-        for k in req.keys():
-            vals = [v for v in df_prog.get(k, "").astype(str).tolist() if str(v).strip()]
-            req[k] = vals[0].strip() if vals else ""
-        return req
-
-    def score_uni(row: pd.Series) -> dict:
-        score = 0
-        reasons = []
-
-        df_prog = match_programs_for_uni(row["uni_id"])
-        if not df_prog.empty:
-            score += 40
-            reasons.append("يوجد برامج مطابقة لخياراتك")
-        else:
-            reasons.append("لا توجد برامج مطابقة (جرّبي توسيع الفلاتر)")
-
-        if pref_country != "All" and row["country"] == pref_country:
-            score += 15
-            reasons.append("ضمن الدولة المفضلة")
-        if pref_city != "All" and row["city"] == pref_city:
-            score += 10
-            reasons.append("ضمن المدينة المفضلة")
-
-        if scholarship_need == "Yes":
-            if uni_has_scholarship(str(row.get("scholarship", "Unknown"))):
-                score += 20
-                reasons.append("تظهر كجامعة لديها منح (حسب البيانات)")
-            else:
-                reasons.append("المنح غير متاحة/غير واضحة (حسب البيانات)")
+    with st.expander("وضع المرشد: ملف طلاب (CSV)", expanded=False):
+        st.caption("الأعمدة: student_id, country, city, level, major_field, language, scholarship, hs_avg, ielts, math_avg, note, budget (USD) — الخانة الفاضية = بدون تفضيل.")
+        students_file = st.file_uploader("ملف الطلاب", type=["csv"], key="batch_file")
+        top_n = st.number_input("عدد الجامعات لكل طالب", min_value=1, max_value=50, value=10, step=1)
 
-        if hs_avg > 0:
-            score += 5
-            reasons.append("تم إدخال معدل تقريبي (للتوجيه)")
-        if math_avg > 0:
-            score += 5
-            reasons.append("تم إدخال مستوى الرياضيات (للتوجيه)")
+        if students_file is not None and st.button("حلّل الملف", use_container_width=True):
+            ids, profiles = read_profiles(students_file)
+            bar = st.progress(0.0, text=f"0/{len(profiles)}")
 
-        req = estimate_req_from_programs(df_prog)
-        req_ielts = safe_float(req.get("english_score", "")) if "IELTS" in str(req.get("english_test", "")).upper() else 0.0
-        status = admission_label(req_ielts, ielts)
+            def on_progress(done: int, total: int) -> None:
+                bar.progress(done / total, text=f"{done}/{total}")
 
-        return {"score": score, "reasons": reasons, "req": req, "status": status}
+            # spawn: الـ fork من سيرفر Streamlit (فيه threads) مو آمن
+            shortlists = score_batch(ids, profiles, k=int(top_n), on_progress=on_progress,
+                                     paths=(UNIS_PATH, PROGS_PATH, SNAPSHOT_DIR), start_method="spawn")
+            st.success(f"تم: {len(profiles)} طالب")
+            st.dataframe(shortlists.head(200), use_container_width=True, hide_index=True)
+            b1, b2 = st.columns(2)
+            b1.download_button("تحميل CSV", to_csv_bytes(shortlists), "shortlists.csv", "text/csv", use_container_width=True)
+            b2.download_button("تحميل JSONL", to_jsonl_bytes(shortlists), "shortlists.jsonl", "application/jsonl", use_container_width=True)
 
     run = st.button("حلّل فرص قبولي", use_container_width=True)
 
     if run:
-        unis_f = unis.copy()
-        if pref_country != "All":
-            unis_f = unis_f[unis_f["country"] == pref_country]
-        if pref_city != "All":
-            unis_f = unis_f[unis_f["city"] == pref_city]
+        chosen = {
+            "country": pref_country,
+            "city": pref_city,
+            "level": study_level,
+            "major_field": major_field,
+            "language": prog_lang,
+            "scholarship": scholarship_need,
+        }
+        # الملاحظة الحرة تعبّي الخانات اللي تركتها "All" (القواعد محلياً، والـ LLM بس إذا ما انفهمت)
+        if q_free.strip():
+            parsed = extract_filters(q_free, catalog.gazetteer, get_client() if llm_available() else None)
+            filled = {f: v for f, v in apply_filters(chosen, parsed).items() if v != chosen[f]}
+            if filled:
+                st.caption("فهمت من ملاحظتك: " + " · ".join(f"{parsed.matched.get(f, f)} ← {v}" for f, v in filled.items()))
+                chosen.update(filled)
+            pref_country, pref_city = chosen["country"], chosen["city"]
+
+        profile = Profile(
+            **chosen,
+            hs_avg=hs_avg,
+            ielts=ielts,
+            math_avg=math_avg,
+            note=q_free,
+            budget=to_base(budget, budget_cur, catalog.rates) if budget > 0 else 0.0,
+        )
+        # أول دفعة (أفضل 3) تنعرض كبطاقات فوراً، والجدول (لين 30) يتعبى بعدها (ونفس الملف يرجع من الكاش)
+        batches = cached_iter_top_k(catalog, profile, sizes=(3, 30))
+        top = next(batches, None)
 
-        if unis_f.empty:
+        if top is None:
             st.warning("ما لقيت جامعات حسب اختياراتك الحالية. جرّبي توسعين الدولة/المدينة.")
             st.stop()
 
-        results = []
-        for _, r in unis_f.iterrows():
-            meta = score_uni(r)
-            results.append({
-                "uni_id": r["uni_id"],
-                "name_ar": r.get("name_ar", ""),
-                "name_en": r.get("name_en", ""),
-                "country": r.get("country", ""),
-                "city": r.get("city", ""),
-                "type": r.get("type", ""),
-                "scholarship": r.get("scholarship", "Unknown"),
-                "score": meta["score"],
-                "status": meta["status"],
-                "reasons": " • ".join(meta["reasons"][:3]),
-                "website": r.get("website", ""),
-                "admissions_url": r.get("admissions_url", ""),
-                "programs_url": r.get("programs_url", ""),
-                "req_english_test": meta["req"].get("english_test", ""),
-                "req_english_score": meta["req"].get("english_score", ""),
-                "req_math": meta["req"].get("math_requirement", ""),
-                "req_notes": meta["req"].get("admission_notes", ""),
-            })
-
-        out = pd.DataFrame(results).sort_values(["score"], ascending=[False])
+        # أهلية كل برنامج مطابق (Suitable/Conditional/Unknown) — حساب واحد على كل الكتالوج
+        elig = program_eligibility(catalog, profile)
 
         st.divider()
         st.subheader("أفضل الخيارات المقترحة")
 
-        top = out.head(3).copy()
+        why = {}
         for _, row in top.iterrows():
             with st.expander(f"{row['name_ar']} — {row['country']} / {row['city']} | التقييم: {row['score']}", expanded=True):
                 cA, cB = st.columns([2, 1])
@@ -745,7 +555,23 @@ elif st.session_state.page == "رُشد":
                 with cA:
                     st.markdown(f"**تقييم القبول:** {ar_status(row['status'])}")
                     st.markdown(f"**المنح (حسب البيانات):** {row['scholarship']}")
-                    st.markdown(f"**لماذا هذا خيار جيد؟** {row['reasons'] if row['reasons'] else '—'}")
+                    why[row["uni_id"]] = st.empty()
+                    why[row["uni_id"]].markdown(f"**لماذا هذا خيار جيد؟** {row['reasons'] if row['reasons'] else '—'}")
+
+                    uni_progs = elig[elig["uni_id"] == row["uni_id"]]
+                    if not uni_progs.empty:
+                        st.write("")
+                        st.markdown("**البرامج المطابقة وأهليتك لها:**")
+                        for _, pr in uni_progs.head(5).iterrows():
+                            st.markdown(f"- {pr['program_name_ar'] or pr['program_name_en']}: {ar_status(pr['verdict'])}")
+
+                        # قد يعجبك أيضاً: برامج مشابهة لأول برنامج مطابق في جامعات ثانية
+                        pos, _ = catalog.prog_neighbors.neighbors(uni_progs["program_id"].iat[0], 3)
+                        if pos.size:
+                            similar = catalog.progs_joined.iloc[pos]
+                            st.markdown("**قد يعجبك أيضاً:** " + "، ".join(
+                                f"{p['program_name_ar'] or p['program_name_en']} ({p['name_ar']})" for _, p in similar.iterrows()
+                            ))
 
                     st.write("")
                     st.markdown("**متطلبات القبول المتوقعة (إن توفرت بياناتها في programs.csv):**")
@@ -770,8 +596,10 @@ elif st.session_state.page == "رُشد":
         st.write("")
         st.subheader("نتائج إضافية (جدول)")
         cols_show = ["name_ar", "country", "city", "type", "scholarship", "status", "score", "website", "admissions_url", "programs_url"]
+        rest = next(batches, None)
+        table = top if rest is None else pd.concat([top, rest])
         st.dataframe(
-            out[cols_show].head(30),
+            table[cols_show],
             use_container_width=True,
             hide_index=True,
             column_config={
@@ -783,21 +611,42 @@ elif st.session_state.page == "رُشد":
 
         st.write("")
         st.subheader("أماكن اختبارات قريبة منك")
-        key = (pref_country if pref_country != "All" else "", pref_city if pref_city != "All" else "")
-        centers = TEST_CENTERS.get(key, {})
+        if home != "—":
+            home_city, home_country = home.split(" — ", 1)
+        else:
+            home_country = pref_country if pref_country != "All" else ""
+            home_city = pref_city if pref_city != "All" else ""
 
-        if not centers:
-            st.info("حالياً ما عندي مراكز محفوظة لهذي المدينة. لاحقًا نضيف test_centers.csv ونربطها مباشرة.")
+        centers = nearest_centers(catalog, home_country, home_city, k=3)
+        if centers.empty:
+            st.info("اختر مدينتك الحالية (أو مدينة مفضلة معروفة) عشان نطلع لك أقرب مراكز الاختبارات.")
         else:
-            for test_type, items in centers.items():
+            for test_type, items in centers.groupby("test_type", sort=False):
                 with st.expander(test_type, expanded=False):
-                    for it in items:
-                        name = it.get("name", "")
-                        url = it.get("url", "")
-                        if url:
-                            st.link_button(name, url)
+                    for it in items.itertuples(index=False):
+                        label = f"{it.name} ({it.city}) — {it.distance_km:g} كم"
+                        if it.url:
+                            st.link_button(label, it.url)
                         else:
-                            st.markdown(f"- {name}")
+                            st.markdown(f"- {label}")
+
+            nearby = universities_within(catalog, home_country, home_city, radius)
+            if nearby.empty:
+                st.caption("ما فيه جامعات ضمن هالمسافة.")
+            else:
+                st.dataframe(
+                    nearby[["name_ar", "name_en", "country", "city", "distance_km"]],
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={"distance_km": st.column_config.NumberColumn("km", format="%.1f")},
+                )
+
+        # آخر شي: شرح ذكي لكل بطاقة فوق (بالتوازي، يتكتب في البطاقة أول بأول، والأسباب الثابتة احتياط)
+        if llm_available():
+            explain_top(
+                get_client(), top, profile,
+                on_token=lambda uni_id, text: why[uni_id].markdown(f"**لماذا هذا خيار جيد؟** {text or '—'}"),
+            )
 
 
 # ----------------------------
@@ -0,0 +1,495 @@
+"""
+تحديث الكتالوج من مواقع الجامعات: يجيب روابط universities.csv (website / admissions_url /
+programs_url / sch_url) بالتوازي عبر asyncio، ويحفظ نسخة خام من كل صفحة، ويستخرج الحقول بس من اللي تغير.
+
+- التوازي: حد عام (concurrency) + حد لكل host (per_host) + مهلة بين طلبين لنفس الـ host (delay)،
+  و robots.txt يتحترم (ينقرأ مرة لكل host). 429/503 = ننتظر Retry-After ونعيد (RETRIES)
+- conditional GET: نرسل If-None-Match / If-Modified-Since من آخر مرة، و 304 = ما تغير بدون تحميل
+- التخزين (data/.crawl/):
+    crawl.sqlite  pages: حالة كل رابط (etag, last_modified, content_hash, آخر جلب/تغير، الخطأ)
+                  links: (uni_id, kind) -> url؛ الرابط المشترك بين كذا جامعة/عمود ينجلب مرة وينحسب للكل
+                  extracts: الحقول المستخرجة لكل content_hash
+    raw/<hash[:2]>/<hash>.html.gz  نسخة خام لكل محتوى مختلف (content-addressed)
+- content_hash = sha256 للنص الظاهر (extract.parse_html)، فتغير الـ markup بس ما يعتبر تغيير؛
+  الاستخراج يصير بس لـ hash جديد (أو EXTRACT_VERSION تغير)
+- HTTP بمكتبة بايثون القياسية (urllib) داخل threads، فما فيه dependency جديدة
+
+    python -m ingest.crawler                          # كل الجامعات -> data/.crawl + review.csv
+    python -m ingest.crawler --only qa_qu --only qa_udst
+    python -m ingest.standin --port 8012 &            # موقع وهمي محلي للتجربة
+    python -m ingest.crawler --base-url http://127.0.0.1:8012 --delay 0.1
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+import urllib.robotparser
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Callable
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+from ingest.extract import EXTRACT_VERSION, content_hash, extract_fields, parse_html
+from src.core.catalog import DATA_DIR, UNIS_PATH
+
+CRAWL_DIR = DATA_DIR / ".crawl"
+URL_COLS = ["website", "admissions_url", "programs_url", "sch_url"]
+
+USER_AGENT = "GulfUniGuideBot/1.0 (+catalog refresh; polite crawler)"
+CONCURRENCY = 16
+PER_HOST = 2
+DELAY = 1.0  # ثواني بين بداية طلبين لنفس الـ host
+TIMEOUT = 20.0
+RETRIES = 2
+MAX_RETRY_AFTER = 30.0
+MAX_BYTES = 5 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class Job:
+    uni_id: str
+    kind: str  # اسم العمود (website / admissions_url / ...)
+    url: str
+    host: str
+    # كل (uni_id, kind) اللي يشيرون لنفس الرابط (أولهم = uni_id/kind فوق)
+    links: tuple[tuple[str, str], ...] = ()
+
+
+@dataclass(frozen=True)
+class Fetched:
+    status: int  # 0 = خطأ شبكة
+    body: bytes = b""
+    etag: str = ""
+    last_modified: str = ""
+    error: str = ""
+    retry_after: float = 0.0
+
+
+@dataclass
+class CrawlReport:
+    jobs: int = 0
+    fetched: int = 0
+    not_modified: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    extracted: int = 0
+    blocked: int = 0
+    errors: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+    hosts: int = 0
+    failures: list[tuple[str, str]] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return (
+            f"{self.jobs} urls on {self.hosts} hosts in {self.seconds:.1f}s: "
+            f"{self.fetched} fetched, {self.not_modified} not modified (304), "
+            f"{self.changed} changed, {self.unchanged} same content, {self.extracted} extracted, "
+            f"{self.blocked} blocked by robots.txt, {self.errors} errors, {self.retries} retries"
+        )
+
+
+def crawl_jobs(unis: pd.DataFrame, only: list[str] | None = None) -> list[Job]:
+    """جلب واحد لكل رابط مختلف؛ links فيه كل (جامعة، عمود) اللي ذكروه (عشان review.csv)."""
+    links: dict[str, list[tuple[str, str]]] = {}
+    if only:
+        unis = unis[unis["uni_id"].isin(only)]
+    for _, row in unis.iterrows():
+        for col in URL_COLS:
+            url = str(row.get(col, "") or "").strip()
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https") or not parts.hostname:
+                continue
+            links.setdefault(url, []).append((str(row["uni_id"]), col))
+    return [
+        Job(pairs[0][0], pairs[0][1], url, urlsplit(url).hostname.lower(), tuple(pairs))
+        for url, pairs in links.items()
+    ]
+
+
+def rewrite_to(base: str) -> Callable[[str], str]:
+    """كل رابط -> base/<host><path>?query (عشان نجرب على standin محلي بنفس الروابط)."""
+    base = base.rstrip("/")
+
+    def rewrite(url: str) -> str:
+        p = urlsplit(url)
+        return f"{base}/{p.hostname}{p.path or '/'}" + (f"?{p.query}" if p.query else "")
+
+    return rewrite
+
+
+# ----------------------------
+# Store
+# ----------------------------
+class CrawlStore:
+    """حالة الروابط + الحقول المستخرجة في SQLite، والنسخ الخام gzip على القرص."""
+
+    def __init__(self, directory: Path = CRAWL_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.directory / "crawl.sqlite"), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    uni_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    status INTEGER NOT NULL,
+                    etag TEXT NOT NULL DEFAULT '',
+                    last_modified TEXT NOT NULL DEFAULT '',
+                    content_hash TEXT NOT NULL DEFAULT '',
+                    fetched_at REAL NOT NULL,
+                    changed_at REAL NOT NULL DEFAULT 0,
+                    error TEXT NOT NULL DEFAULT ''
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS links (
+                    uni_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    PRIMARY KEY (uni_id, kind)
+                )
+                """
+            )
+            # قواعد قبل جدول links: كل رابط كان لـ (uni_id, kind) واحد في pages
+            self._conn.execute("INSERT OR IGNORE INTO links SELECT uni_id, kind, url FROM pages")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS extracts (
+                    content_hash TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    data TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+
+    def page(self, url: str) -> dict | None:
+        with self._lock:
+            cur = self._conn.execute("SELECT * FROM pages WHERE url = ?", (url,))
+            row = cur.fetchone()
+            cols = [d[0] for d in cur.description]
+        return dict(zip(cols, row)) if row else None
+
+    def save_page(self, job: Job, status: int, etag: str, last_modified: str, chash: str,
+                  changed: bool, error: str = "") -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO pages (url, uni_id, kind, status, etag, last_modified, content_hash, fetched_at, changed_at, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    uni_id = excluded.uni_id, kind = excluded.kind, status = excluded.status,
+                    etag = excluded.etag, last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash, fetched_at = excluded.fetched_at,
+                    changed_at = CASE WHEN ? THEN excluded.fetched_at ELSE pages.changed_at END,
+                    error = excluded.error
+                """,
+                (job.url, job.uni_id, job.kind, status, etag, last_modified, chash, now,
+                 now if changed else 0.0, error, int(changed)),
+            )
+            self._conn.commit()
+
+    def save_links(self, jobs: list[Job]) -> None:
+        """روابط الجامعات اللي في jobs تنكتب من جديد (عمود انشال/تغير رابطه ما يبقى في المراجعة)."""
+        rows = [(uni_id, kind, job.url) for job in jobs for uni_id, kind in (job.links or ((job.uni_id, job.kind),))]
+        with self._lock:
+            self._conn.executemany("DELETE FROM links WHERE uni_id = ?", [(u,) for u in {r[0] for r in rows}])
+            self._conn.executemany("INSERT OR REPLACE INTO links VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+
+    def raw_path(self, chash: str) -> Path:
+        return self.directory / "raw" / chash[:2] / f"{chash}.html.gz"
+
+    def save_raw(self, chash: str, body: bytes) -> None:
+        path = self.raw_path(chash)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(gzip.compress(body))
+        tmp.replace(path)
+
+    def has_extract(self, chash: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM extracts WHERE content_hash = ?", (chash,)).fetchone()
+        return row is not None and int(row[0]) == EXTRACT_VERSION
+
+    def save_extract(self, chash: str, data: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extracts VALUES (?, ?, ?)",
+                (chash, EXTRACT_VERSION, json.dumps(data, ensure_ascii=False)),
+            )
+            self._conn.commit()
+
+    def review(self) -> pd.DataFrame:
+        """جدول للمراجعة: صف لكل (جامعة، عمود) بآخر حالة لرابطه + الحقول المستخرجة من محتواه الحالي."""
+        with self._lock:
+            df = pd.read_sql_query(
+                """
+                SELECT l.uni_id, l.kind, p.url, p.status, p.error, p.fetched_at, p.changed_at, p.content_hash, e.data
+                FROM links l
+                JOIN pages p ON p.url = l.url
+                LEFT JOIN extracts e ON e.content_hash = p.content_hash
+                ORDER BY l.uni_id, l.kind
+                """,
+                self._conn,
+            )
+        data = df.pop("data").map(lambda s: json.loads(s) if isinstance(s, str) else {})
+        for col in ["fetched_at", "changed_at"]:
+            df[col] = pd.to_datetime(df[col].where(df[col] > 0), unit="s").dt.strftime("%Y-%m-%d %H:%M")
+        df["title"] = data.map(lambda d: d.get("title", ""))
+        df["english"] = data.map(lambda d: "; ".join(f"{k} {v:g}" for k, v in d.get("english", {}).items()))
+        df["tuition"] = data.map(lambda d: " | ".join(t["text"] for t in d.get("tuition", [])))
+        df["scholarship_tags"] = data.map(lambda d: "|".join(d.get("scholarship_tags", [])))
+        df["deadlines"] = data.map(lambda d: " | ".join(d.get("deadlines", [])))
+        return df
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# ----------------------------
+# HTTP (urllib داخل thread)
+# ----------------------------
+def _retry_after(value: str | None) -> float:
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return 0.0
+
+
+def http_get(url: str, etag: str = "", last_modified: str = "", timeout: float = TIMEOUT) -> Fetched:
+    headers = {"User-Agent": USER_AGENT, "Accept": "text/html,*/*;q=0.8", "Accept-Encoding": "gzip"}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            body = resp.read(MAX_BYTES + 1)[:MAX_BYTES]
+            if resp.headers.get("Content-Encoding", "").lower() == "gzip":
+                body = gzip.decompress(body)
+            return Fetched(resp.status, body, resp.headers.get("ETag", ""), resp.headers.get("Last-Modified", ""))
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return Fetched(304, etag=e.headers.get("ETag", "") or etag,
+                           last_modified=e.headers.get("Last-Modified", "") or last_modified)
+        return Fetched(e.code, error=f"HTTP {e.code}", retry_after=_retry_after(e.headers.get("Retry-After")))
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        reason = getattr(e, "reason", e)
+        return Fetched(0, error=f"{type(e).__name__}: {reason}")
+
+
+# ----------------------------
+# Politeness
+# ----------------------------
+class HostGate:
+    """حد per_host طلب متزامن لنفس الـ host، وبين بداية طلب وطلب delay ثانية على الأقل."""
+
+    def __init__(self, per_host: int, delay: float):
+        self._sem = asyncio.Semaphore(per_host)
+        self._lock = asyncio.Lock()
+        self._next = 0.0
+        self.delay = delay
+
+    async def __aenter__(self) -> None:
+        await self._sem.acquire()
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            start = max(now, self._next)
+            self._next = start + self.delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def __aexit__(self, *exc) -> None:
+        self._sem.release()
+
+    def push_back(self, seconds: float) -> None:
+        """السيرفر قال انتظر (Retry-After): الطلب الجاي لنفس الـ host يتأخر."""
+        self._next = max(self._next, asyncio.get_running_loop().time() + seconds)
+
+
+class Crawler:
+    def __init__(self, store: CrawlStore, concurrency: int = CONCURRENCY, per_host: int = PER_HOST,
+                 delay: float = DELAY, timeout: float = TIMEOUT, respect_robots: bool = True,
+                 url_map: Callable[[str], str] | None = None, fetch: Callable[..., Fetched] = http_get):
+        self.store = store
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.delay = delay
+        self.timeout = timeout
+        self.respect_robots = respect_robots
+        self.url_map = url_map or (lambda u: u)
+        self.fetch = fetch
+        self._gates: dict[str, HostGate] = {}
+        self._robots: dict[str, asyncio.Task] = {}
+        self.report = CrawlReport()
+
+    def _gate(self, host: str) -> HostGate:
+        if host not in self._gates:
+            self._gates[host] = HostGate(self.per_host, self.delay)
+        return self._gates[host]
+
+    async def _get(self, pool: ThreadPoolExecutor, job: Job, url: str, etag: str = "", last_modified: str = "") -> Fetched:
+        loop = asyncio.get_running_loop()
+        gate = self._gate(job.host)
+        for attempt in range(RETRIES + 1):
+            async with gate:
+                res = await loop.run_in_executor(pool, self.fetch, url, etag, last_modified, self.timeout)
+            if res.status not in (429, 503) or attempt == RETRIES:
+                return res
+            self.report.retries += 1
+            wait = min(res.retry_after or self.delay * 2 ** (attempt + 1), MAX_RETRY_AFTER)
+            gate.push_back(wait)
+        return res
+
+    async def _allowed(self, pool: ThreadPoolExecutor, job: Job) -> bool:
+        if not self.respect_robots:
+            return True
+        task = self._robots.get(job.host)
+        if task is None:
+            task = self._robots[job.host] = asyncio.ensure_future(self._load_robots(pool, job))
+        rp = await task
+        return rp is None or rp.can_fetch(USER_AGENT, job.url)
+
+    async def _load_robots(self, pool: ThreadPoolExecutor, job: Job):
+        p = urlsplit(job.url)
+        robots = Job(job.uni_id, "robots", f"{p.scheme}://{p.netloc}/robots.txt", job.host)
+        res = await self._get(pool, robots, self.url_map(robots.url))
+        if res.status != 200:
+            return None  # ما فيه robots.txt (أو ما انجاب) = مسموح
+        rp = urllib.robotparser.RobotFileParser()
+        rp.parse(res.body.decode("utf-8", errors="replace").splitlines())
+        return rp
+
+    async def _one(self, pool: ThreadPoolExecutor, job: Job) -> None:
+        r = self.report
+        if not await self._allowed(pool, job):
+            r.blocked += 1
+            self.store.save_page(job, 0, "", "", "", False, "blocked by robots.txt")
+            return
+
+        prev = self.store.page(job.url) or {}
+        etag, lm, old_hash = prev.get("etag", ""), prev.get("last_modified", ""), prev.get("content_hash", "")
+        # من غير content_hash (أول مرة/خطأ) ما نرسل شروط: نبي الصفحة كاملة
+        res = await self._get(pool, job, self.url_map(job.url), etag if old_hash else "", lm if old_hash else "")
+
+        if res.status == 304:
+            r.not_modified += 1
+            self.store.save_page(job, 304, res.etag, res.last_modified, old_hash, False)
+            await self._extract_if_needed(pool, old_hash, None)
+            return
+        if res.status != 200:
+            r.errors += 1
+            r.failures.append((job.url, res.error or f"HTTP {res.status}"))
+            # نحتفظ بآخر محتوى سليم (content_hash) عشان ما نفقد المستخرج
+            self.store.save_page(job, res.status, etag, lm, old_hash, False, res.error or f"HTTP {res.status}")
+            return
+
+        r.fetched += 1
+        loop = asyncio.get_running_loop()
+        title, text = await loop.run_in_executor(pool, parse_html, res.body)
+        chash = content_hash(f"{title}\n{text}")
+        changed = chash != old_hash
+        if changed:
+            r.changed += 1
+            await loop.run_in_executor(pool, self.store.save_raw, chash, res.body)
+        else:
+            r.unchanged += 1
+        self.store.save_page(job, 200, res.etag, res.last_modified, chash, changed)
+        await self._extract_if_needed(pool, chash, (title, text))
+
+    async def _extract_if_needed(self, pool: ThreadPoolExecutor, chash: str, parsed: tuple[str, str] | None) -> None:
+        if not chash or self.store.has_extract(chash):
+            return
+        loop = asyncio.get_running_loop()
+        if parsed is None:
+            # 304 بس الاستخراج قديم (EXTRACT_VERSION تغير): من النسخة الخام
+            path = self.store.raw_path(chash)
+            if not path.exists():
+                return
+            parsed = await loop.run_in_executor(pool, lambda: parse_html(gzip.decompress(path.read_bytes())))
+        data = await loop.run_in_executor(pool, extract_fields, *parsed)
+        self.store.save_extract(chash, data)
+        self.report.extracted += 1
+
+    async def run(self, jobs: list[Job]) -> CrawlReport:
+        self.report = CrawlReport(jobs=len(jobs), hosts=len({j.host for j in jobs}))
+        self.store.save_links(jobs)
+        t0 = time.perf_counter()
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def guarded(pool: ThreadPoolExecutor, job: Job) -> None:
+            async with sem:
+                try:
+                    await self._one(pool, job)
+                except Exception as e:  # رابط واحد خربان ما يوقف التحديث كله
+                    self.report.errors += 1
+                    self.report.failures.append((job.url, f"{type(e).__name__}: {e}"))
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            await asyncio.gather(*(guarded(pool, j) for j in jobs))
+        self.report.seconds = time.perf_counter() - t0
+        return self.report
+
+
+def refresh(unis: pd.DataFrame, store: CrawlStore, only: list[str] | None = None, **kwargs) -> CrawlReport:
+    return asyncio.run(Crawler(store, **kwargs).run(crawl_jobs(unis, only)))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.core.catalog import normalize_unis, read_csv
+
+    parser = argparse.ArgumentParser(description="Fetch university pages listed in universities.csv and extract fields")
+    parser.add_argument("--unis", type=Path, default=UNIS_PATH)
+    parser.add_argument("--out", type=Path, default=CRAWL_DIR)
+    parser.add_argument("--only", action="append", help="uni_id to refresh (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--per-host", type=int, default=PER_HOST)
+    parser.add_argument("--delay", type=float, default=DELAY, help="seconds between requests to the same host")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT)
+    parser.add_argument("--ignore-robots", action="store_true")
+    parser.add_argument("--base-url", help="send every request to this stand-in server (see ingest.standin)")
+    args = parser.parse_args()
+
+    store = CrawlStore(args.out)
+    report = refresh(
+        normalize_unis(read_csv(args.unis, "uni_id")), store, args.only,
+        concurrency=args.concurrency, per_host=args.per_host, delay=args.delay, timeout=args.timeout,
+        respect_robots=not args.ignore_robots, url_map=rewrite_to(args.base_url) if args.base_url else None,
+    )
+    print(report.summary())
+    for url, err in report.failures[:20]:
+        print(f"  {err:<30} {url}")
+    review = store.review()
+    review.to_csv(args.out / "review.csv", index=False, encoding="utf-8-sig")
+    print(f"review -> {args.out / 'review.csv'} ({len(review)} links)")
+    store.close()
@@ -0,0 +1,132 @@
+"""
+استخراج الحقول من صفحة جامعة (HTML خام) بمكتبة بايثون القياسية بس (html.parser).
+
+- page_text: النص الظاهر (بدون script/style/nav...)، مسافاته موحدة — وعليه ينحسب content hash،
+  فتغير tokens/تواريخ داخل الـ markup ما يعتبر تغيير في المحتوى
+- extract_fields: اللي يفيد الكتالوج: عنوان الصفحة، درجات اختبارات الإنجليزي، جمل الرسوم (وتحليلها
+  بنفس parse_tuition حق programs.csv)، أنواع المنح المذكورة، وجمل المواعيد النهائية
+نرفع EXTRACT_VERSION إذا تغير شكل المخرجات عشان الصفحات تنستخرج من جديد.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from html.parser import HTMLParser
+
+import numpy as np
+
+from src.core.requirements import ENGLISH_PATTERNS, SCORE_RANGES
+from src.core.tuition import parse_tuition
+
+EXTRACT_VERSION = 2
+
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "footer", "head"}
+BLOCK_TAGS = {"p", "div", "li", "tr", "td", "th", "br", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "table"}
+MAX_TEXT = 20000
+MAX_SENTENCES = 5
+
+TUITION_HINTS = ("tuition", "fees", "fee ", "الرسوم", "رسوم")
+DEADLINE_HINTS = ("deadline", "apply by", "applications close", "آخر موعد", "الموعد النهائي")
+# كلمات في الصفحة -> نوع المنحة (نفس أسماء SCHOLARSHIP_TAGS)
+SCHOLARSHIP_HINTS = {
+    "Local": ("nationals", "citizens", "للمواطنين", "المواطنين"),
+    "GCC": ("gcc", "الخليج", "مجلس التعاون"),
+    "International": ("international students", "الطلبة الدوليين", "الطلاب الدوليين", "الوافدين"),
+    "Children of citizen mothers": ("citizen mothers", "أبناء المواطنات"),
+}
+
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+_SENTENCES = re.compile(r"(?<=[.!?؟])\s+|\n+")
+
+
+class _TextParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self.title = ""
+        self._skip = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        elif tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip:
+            self.parts.append(data)
+
+
+def parse_html(body: bytes | str) -> tuple[str, str]:
+    """(العنوان، النص الظاهر) — سطر لكل block، والمسافات موحدة."""
+    html = body.decode("utf-8", errors="replace") if isinstance(body, bytes) else body
+    parser = _TextParser()
+    parser.feed(html)
+    parser.close()
+    lines = (_SPACES.sub(" ", line).strip() for line in "".join(parser.parts).split("\n"))
+    text = "\n".join(line for line in lines if line)
+    return " ".join(parser.title.split()), text[:MAX_TEXT]
+
+
+def page_text(body: bytes | str) -> str:
+    title, text = parse_html(body)
+    return f"{title}\n{text}" if title else text
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _sentences(text: str, hints: tuple[str, ...]) -> list[str]:
+    out = []
+    for s in _SENTENCES.split(text):
+        low = s.lower()
+        if any(h in low for h in hints):
+            out.append(s.strip()[:300])
+            if len(out) >= MAX_SENTENCES:
+                break
+    return out
+
+
+def english_scores(text: str) -> dict[str, float]:
+    """أقل درجة مذكورة لكل اختبار ("IELTS 6.5" / "TOEFL iBT: 79")، داخل حدود SCORE_RANGES."""
+    out: dict[str, float] = {}
+    upper = text.upper()
+    for test, pattern in ENGLISH_PATTERNS.items():
+        lo, hi = SCORE_RANGES[test]
+        for m in re.finditer(pattern + r"[^0-9\n]{0,20}?(\d{1,3}(?:\.\d)?)", upper):
+            v = float(m.group(1))
+            if lo <= v <= hi:
+                out[test] = min(out.get(test, v), v)
+    return out
+
+
+def extract_fields(title: str, text: str) -> dict:
+    """حقول الصفحة كـ dict (ينحفظ JSON)."""
+    tuition = []
+    for s in _sentences(text, TUITION_HINTS):
+        lo, hi, cur = parse_tuition(s)
+        if not np.isnan(lo):
+            tuition.append({"text": s, "min": float(lo), "max": float(hi), "currency": cur or ""})
+    low = text.lower()
+    return {
+        "title": title,
+        "english": english_scores(text),
+        "tuition": tuition,
+        "scholarship_tags": [tag for tag, hints in SCHOLARSHIP_HINTS.items() if any(h in low for h in hints)],
+        "deadlines": _sentences(text, DEADLINE_HINTS),
+        "chars": len(text),
+    }
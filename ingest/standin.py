@@ -0,0 +1,174 @@
+"""
+موقع جامعات وهمي محلي لتجربة ingest.crawler بدون شبكة (نفس فكرة src.core.fakellm).
+
+الروابط تجي بشكل /<host>/<path> (crawler.rewrite_to)، وكل صفحة تنولد من الـ host والمسار
+(أو من pages إذا حددناها)، ومعها:
+- ETag / Last-Modified حسب نسخة الصفحة، و 304 على If-None-Match / If-Modified-Since
+- nonce جديد في الـ markup كل طلب (يتغير الـ HTML بس النص الظاهر ثابت)
+- change(path) يغير محتوى الصفحة (نسخة جديدة)، disallow لمسارات في robots.txt
+- عدادات: الطلبات، 304، أعلى تزامن لكل host، و 429 إذا تعدى max_per_host
+
+    python -m ingest.standin --port 8012 --latency 0.05
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInSite:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.05,
+                 max_per_host: int = 0, pages: dict[str, str] | None = None, disallow: list[str] | None = None):
+        self.latency = latency
+        self.max_per_host = max_per_host
+        self.pages = dict(pages or {})
+        self.disallow = list(disallow or [])
+        self.versions: Counter = Counter()
+        self.modified: dict[str, float] = {}
+        self.requests = 0
+        self.not_modified = 0
+        self.rejected = 0
+        self.per_host: Counter = Counter()
+        self.active: Counter = Counter()
+        self.max_active: Counter = Counter()
+        self.started: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def change(self, path: str) -> None:
+        """نسخة جديدة من الصفحة (/<host>/<path>): محتوى مختلف + ETag/Last-Modified جديدين."""
+        with self._lock:
+            self.versions[path] += 1
+            self.modified[path] = time.time() + self.versions[path]
+
+    def body(self, path: str, version: int) -> str:
+        host, _, rest = path.lstrip("/").partition("/")
+        if path in self.pages:
+            main = self.pages[path]
+        else:
+            main = (
+                f"<h1>{host} /{rest}</h1>"
+                f"<p>Admission requires IELTS {6 + version % 3 * 0.5:g} or TOEFL iBT {79 + version}.</p>"
+                f"<p>Tuition fees: QAR {45000 + 1000 * version:,} per year.</p>"
+                "<p>Scholarships are available for GCC nationals and international students.</p>"
+                f"<p>Application deadline: {1 + version % 28} June.</p>"
+            )
+        return (
+            f"<html><head><title>{host}</title><meta name='csrf' content='{uuid.uuid4().hex}'>"
+            f"<script>var t={time.time()}</script></head><body><nav>menu</nav>{main}"
+            "<footer>© university</footer></body></html>"
+        )
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, code: int, body: bytes = b"", headers: dict | None = None) -> None:
+                self.send_response(code)
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                host = path.lstrip("/").partition("/")[0]
+                with site._lock:
+                    site.requests += 1
+                    site.per_host[host] += 1
+                    site.started.setdefault(host, []).append(time.monotonic())
+                    if site.max_per_host and site.active[host] >= site.max_per_host:
+                        site.rejected += 1
+                        busy = True
+                    else:
+                        site.active[host] += 1
+                        site.max_active[host] = max(site.max_active[host], site.active[host])
+                        busy = False
+                if busy:
+                    self._send(429, b"slow down", {"Retry-After": "1"})
+                    return
+                try:
+                    time.sleep(site.latency)
+                    self._page(path, host)
+                finally:
+                    with site._lock:
+                        site.active[host] -= 1
+
+            def _page(self, path: str, host: str) -> None:
+                if path.endswith("/robots.txt"):
+                    rules = "".join(f"Disallow: {p}\n" for p in site.disallow)
+                    self._send(200, f"User-agent: *\n{rules}".encode(), {"Content-Type": "text/plain"})
+                    return
+                with site._lock:
+                    version = site.versions[path]
+                    modified = site.modified.setdefault(path, 1_700_000_000.0)
+                etag = '"' + hashlib.sha1(f"{path}:{version}".encode()).hexdigest()[:16] + '"'
+                last_modified = formatdate(modified, usegmt=True)
+                if self.headers.get("If-None-Match") == etag or self._not_modified_since(modified):
+                    with site._lock:
+                        site.not_modified += 1
+                    self._send(304, headers={"ETag": etag, "Last-Modified": last_modified})
+                    return
+                self._send(200, site.body(path, version).encode("utf-8"), {
+                    "Content-Type": "text/html; charset=utf-8", "ETag": etag, "Last-Modified": last_modified,
+                })
+
+            def _not_modified_since(self, modified: float) -> bool:
+                since = self.headers.get("If-Modified-Since")
+                if not since or self.headers.get("If-None-Match"):
+                    return False
+                try:
+                    return int(modified) <= parsedate_to_datetime(since).timestamp()
+                except (TypeError, ValueError):
+                    return False
+
+        return Handler
+
+    def start(self) -> "StandInSite":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StandInSite":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stand-in for university websites (for ingest.crawler)")
+    parser.add_argument("--port", type=int, default=8012)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before each response")
+    parser.add_argument("--max-per-host", type=int, default=0, help="answer 429 above this many concurrent requests per host")
+    args = parser.parse_args()
+
+    site = StandInSite(port=args.port, latency=args.latency, max_per_host=args.max_per_host)
+    print(f"stand-in sites on {site.base_url}/<host>/<path>")
+    try:
+        site._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
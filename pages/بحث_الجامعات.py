@@ -1,7 +1,9 @@
 import streamlit as st
-import pandas as pd
 from pathlib import Path
 from ui import render_shell
+from src.core.catalog import get_catalog
+from src.core.facets import mask_to_bits, with_count
+from src.core.tuition import BASE_CURRENCY, to_base
 
 render_shell()
 
@@ -14,71 +16,10 @@ UNIS_PATH = DATA_DIR / "universities.csv"
 PROGS_PATH = DATA_DIR / "programs.csv"
 
 # ----------------------------
-# Loaders (ROBUST)
+# Load data (Catalog مشترك لكل الجلسات)
 # ----------------------------
-@st.cache_data(show_spinner=False)
-def load_csv(path: Path) -> pd.DataFrame:
-    if (not path.exists()) or path.stat().st_size == 0:
-        return pd.DataFrame()
-    return pd.read_csv(
-        path,
-        encoding="utf-8",
-        engine="python",      # مهم لتجاوز السطور المكسّرة
-        on_bad_lines="skip",  # يتجاوز السطور اللي تكسر الأعمدة بدل ما يطيّح التطبيق
-    )
-
-def normalize_unis(df: pd.DataFrame) -> pd.DataFrame:
-    """Normalize universities columns to expected names without changing UI."""
-    if df is None or df.empty:
-        return pd.DataFrame()
-
-    df = df.copy()
-
-    # إذا ملفك جاي بصيغة 12 عمود: extra_1/extra_2
-    current_cols_12 = [
-        "uni_id","name_ar","name_en","country","city","type",
-        "website","admissions_url","programs_url","ranking_source",
-        "extra_1","extra_2"
-    ]
-
-    # إذا ما فيه هيدر مضبوط وعدد الأعمدة 12 → نسميها ثم نعمل mapping
-    if len(df.columns) == 12 and not set(["ranking_value","accreditation_notes"]).issubset(set(df.columns)):
-        df.columns = current_cols_12
-        df["ranking_value"] = df.get("extra_1", "")
-        df["accreditation_notes"] = df.get("extra_2", "")
-
-    # تأكدي الأعمدة الأساسية موجودة (حتى لو ناقصة نعبّيها فاضي)
-    needed = [
-        "uni_id","name_ar","name_en","country","city","type",
-        "website","admissions_url","programs_url",
-        "ranking_source","ranking_value","accreditation_notes"
-    ]
-    for c in needed:
-        if c not in df.columns:
-            df[c] = ""
-
-    return df[needed]
-
-def normalize_progs(df: pd.DataFrame) -> pd.DataFrame:
-    if df is None or df.empty:
-        return pd.DataFrame()
-    df = df.copy()
-    # نضمن وجود الأعمدة اللي واجهتك تستخدمها
-    needed = [
-        "program_id","uni_id","level","degree_type","major_field",
-        "program_name_en","program_name_ar","city","language",
-        "duration_years","tuition_notes","admissions_requirements","url"
-    ]
-    for c in needed:
-        if c not in df.columns:
-            df[c] = ""
-    return df
-
-# ----------------------------
-# Load data
-# ----------------------------
-unis = normalize_unis(load_csv(UNIS_PATH))
-progs = normalize_progs(load_csv(PROGS_PATH))
+catalog = get_catalog(UNIS_PATH, PROGS_PATH)
+unis, progs, progs_joined = catalog.unis, catalog.progs, catalog.progs_joined
 
 st.write("")
 
@@ -89,30 +30,6 @@ if unis.empty:
 if progs.empty:
     st.warning(f"programs.csv not found or empty: {PROGS_PATH}")
 
-# ----------------------------
-# Normalize basics (safe)
-# ----------------------------
-unis = unis.copy()
-for c in ["country", "type", "city", "name_en", "name_ar"]:
-    unis[c] = unis[c].fillna("").astype(str)
-
-progs = progs.copy()
-if not progs.empty:
-    for c in ["uni_id", "level", "degree_type", "major_field", "program_name_en", "program_name_ar", "city", "language"]:
-        if c in progs.columns:
-            progs[c] = progs[c].fillna("").astype(str)
-
-# Join programs with university info (country/type/uni names)
-if (not progs.empty) and ("uni_id" in progs.columns) and ("uni_id" in unis.columns):
-    progs_joined = progs.merge(
-        unis[["uni_id", "name_en", "name_ar", "country", "type", "city", "website", "admissions_url", "programs_url"]],
-        on="uni_id",
-        how="left",
-        suffixes=("", "_uni")
-    )
-else:
-    progs_joined = progs
-
 # ----------------------------
 # Filters (NO DUPLICATION)
 # ----------------------------
@@ -120,59 +37,76 @@ st.subheader("Filters")
 
 col1, col2, col3, col4 = st.columns([1.2, 1, 1, 1.2])
 
-countries = sorted([c for c in unis["country"].unique() if str(c).strip()])
-country = col1.selectbox("Country", options=["All"] + countries, index=0)
-
-uni_types = sorted([t for t in unis["type"].unique() if str(t).strip()])
-uni_type = col2.selectbox("University type", options=["All"] + uni_types, index=0)
-
-levels = []
-if not progs.empty and "level" in progs.columns:
-    levels = sorted([x for x in progs["level"].unique() if str(x).strip()])
-level = col3.selectbox("Level", options=["All"] + levels, index=0)
-
-majors = []
-if not progs.empty and "major_field" in progs.columns:
-    majors = sorted([m for m in progs["major_field"].unique() if str(m).strip()])
-major = col4.selectbox("Major field", options=["All"] + majors, index=0)
-
-q = st.text_input("Search (university / program / city)", value="").strip().lower()
+# عدد البرامج جنب كل خيار (bitsets من الـ Catalog، بدون مسح الجدول)
+pidx = catalog.prog_facet_index
+tidx = catalog.tuition_index
+
+
+def budget_bits(budget: float, currency: str, include_unknown: bool) -> int | None:
+    """برامج رسومها تبدأ ضمن الميزانية (interval index)، كـ bitset."""
+    if budget <= 0:
+        return None
+    return mask_to_bits(tidx.budget_mask(to_base(budget, currency, catalog.rates), include_unknown))
+
+
+q_prev = str(st.session_state.get("search_q", "")).strip().lower()
+base = mask_to_bits(catalog.prog_search.mask(q_prev, progs_joined.index)) if q_prev else None
+b_prev = budget_bits(
+    float(st.session_state.get("search_budget", 0.0)),
+    st.session_state.get("search_currency", BASE_CURRENCY),
+    bool(st.session_state.get("search_budget_unknown", True)),
+)
+if b_prev is not None:
+    base = b_prev if base is None else base & b_prev
+counts = pidx.counts(
+    {
+        "country": st.session_state.get("search_country", "All"),
+        "type": st.session_state.get("search_type", "All"),
+        "level": st.session_state.get("search_level", "All"),
+        "major_field": st.session_state.get("search_major", "All"),
+    },
+    base=base,
+)
+
+facets = catalog.facets
+country = col1.selectbox("Country", options=["All", *facets.countries], index=0, key="search_country",
+                         format_func=lambda v: with_count(v, counts["country"]))
+uni_type = col2.selectbox("University type", options=["All", *facets.uni_types], index=0, key="search_type",
+                          format_func=lambda v: with_count(v, counts["type"]))
+level = col3.selectbox("Level", options=["All", *facets.levels], index=0, key="search_level",
+                       format_func=lambda v: with_count(v, counts["level"]))
+major = col4.selectbox("Major field", options=["All", *facets.majors], index=0, key="search_major",
+                       format_func=lambda v: with_count(v, counts["major_field"]))
+
+col5, col6, col7 = st.columns([1.2, 0.8, 2])
+budget = col5.number_input("Max yearly tuition (0 = any)", min_value=0.0, value=0.0, step=1000.0, key="search_budget")
+currency = col6.selectbox("Currency", list(catalog.rates), index=0, key="search_currency")
+include_unknown = col7.checkbox("Include programs with unknown tuition", value=True, key="search_budget_unknown")
+
+q = st.text_input("Search (university / program / city)", value="", key="search_q").strip().lower()
+ranked = st.checkbox("Rank by relevance (BM25)", value=False, disabled=not q)
 
 # ----------------------------
-# Apply filters
+# Apply filters (AND بين bitsets)
 # ----------------------------
-unis_f = unis.copy()
-if country != "All":
-    unis_f = unis_f[unis_f["country"] == country]
-if uni_type != "All":
-    unis_f = unis_f[unis_f["type"] == uni_type]
-if q:
-    mask_u = (
-        unis_f["name_en"].str.lower().str.contains(q, na=False)
-        | unis_f["name_ar"].str.lower().str.contains(q, na=False)
-        | unis_f["city"].str.lower().str.contains(q, na=False)
-    )
-    unis_f = unis_f[mask_u]
-
-progs_f = progs_joined.copy()
+uidx = catalog.uni_facet_index
+unis_f = unis.iloc[uidx.positions(uidx.select({"country": country, "type": uni_type}))]
+if q and ranked:
+    pos, scores = catalog.uni_bm25.top_k(q, k=50, candidates=unis_f.index.to_numpy())
+    unis_f = unis.iloc[pos].assign(relevance=scores.round(2))
+elif q:
+    unis_f = unis_f[catalog.uni_search.mask(q, unis_f.index)]
+
+progs_f = progs_joined
 if not progs_f.empty:
-    if country != "All" and "country" in progs_f.columns:
-        progs_f = progs_f[progs_f["country"] == country]
-    if uni_type != "All" and "type" in progs_f.columns:
-        progs_f = progs_f[progs_f["type"] == uni_type]
-    if level != "All" and "level" in progs_f.columns:
-        progs_f = progs_f[progs_f["level"] == level]
-    if major != "All" and "major_field" in progs_f.columns:
-        progs_f = progs_f[progs_f["major_field"] == major]
-    if q:
-        mask_p = (
-            progs_f.get("program_name_en", "").str.lower().str.contains(q, na=False)
-            | progs_f.get("program_name_ar", "").str.lower().str.contains(q, na=False)
-            | progs_f.get("name_en", "").str.lower().str.contains(q, na=False)
-            | progs_f.get("name_ar", "").str.lower().str.contains(q, na=False)
-            | progs_f.get("city", "").astype(str).str.lower().str.contains(q, na=False)
-        )
-        progs_f = progs_f[mask_p]
+    bits = pidx.select({"country": country, "type": uni_type, "level": level, "major_field": major},
+                       base=budget_bits(budget, currency, include_unknown))
+    progs_f = progs_joined.iloc[pidx.positions(bits)]
+    if q and ranked:
+        pos, scores = catalog.prog_bm25.top_k(q, k=100, candidates=progs_f.index.to_numpy())
+        progs_f = progs_joined.iloc[pos].assign(relevance=scores.round(2))
+    elif q:
+        progs_f = progs_f[catalog.prog_search.mask(q, progs_f.index)]
 
 # ----------------------------
 # Results (clean, only once)
@@ -187,6 +121,8 @@ with left:
         "website", "admissions_url", "programs_url",
         "ranking_source", "ranking_value", "accreditation_notes"
     ]
+    if "relevance" in unis_f.columns:
+        cols_unis = ["relevance"] + cols_unis
     st.dataframe(unis_f[cols_unis], use_container_width=True, hide_index=True)
 
 with right:
@@ -194,12 +130,16 @@ with right:
     if progs_f.empty:
         st.info("No programs match the filters (or programs.csv is empty).")
     else:
+        # الرسوم السنوية بالعملة المختارة (من الـ interval index)
+        rate = catalog.rates.get(currency, 1.0)
+        pos = progs_f.index.to_numpy()
+        progs_f = progs_f.assign(tuition_from=(tidx.lo[pos] / rate).round(0), tuition_to=(tidx.hi[pos] / rate).round(0))
         cols_prog = [
-            "program_id", "uni_id", "name_en", "country", "type",
+            "relevance", "program_id", "uni_id", "name_en", "country", "type",
             "level", "degree_type", "major_field",
             "program_name_en", "program_name_ar",
             "city", "language", "duration_years",
-            "tuition_notes", "admissions_requirements", "url"
+            "tuition_from", "tuition_to", "tuition_notes", "admissions_requirements", "url"
         ]
         cols_prog = [c for c in cols_prog if c in progs_f.columns]
         st.dataframe(progs_f[cols_prog], use_container_width=True, hide_index=True)
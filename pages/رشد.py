@@ -1,12 +1,80 @@
+import time
+
+import pandas as pd
 import streamlit as st
+from pathlib import Path
 from ui import render_shell
+from src.core.catalog import get_catalog
+from src.core.intent import extract_filters
+from src.core.llm import get_client, llm_available
+from src.core.prompts import build_prompt
+from src.core.recommender import Profile
+from src.core.reccache import cached_iter_top_k
+from src.core.throttle import RateLimited
 
 render_shell()
 
+ROOT = Path(__file__).resolve().parent.parent   # لأن الملف داخل pages/
+DATA_DIR = ROOT / "data"
+catalog = get_catalog(DATA_DIR / "universities.csv", DATA_DIR / "programs.csv")
+
+FIELD_LABELS = {
+    "country": "الدولة",
+    "city": "المدينة",
+    "level": "المستوى",
+    "major_field": "التخصص",
+    "language": "اللغة",
+    "scholarship": "المنح",
+}
+
 st.write("")
 st.subheader("رُشد — المعاون الذكي")
-st.write("هنا سنضيف لاحقًا المساعد الذكي لتحويل طلب المستخدم إلى فلاتر واقتراح جامعات وبرامج مناسبة.")
+st.write("اكتب طلبك بكلامك، ورُشد يحوله لفلاتر ويقترح جامعات مناسبة.")
 
 user_q = st.text_area("اكتب احتياجك", placeholder="مثال: أبي بكالوريوس في علوم الحاسب في الإمارات باللغة الإنجليزية")
-st.button("حلّل الطلب")
 
+if st.button("حلّل الطلب") and user_q.strip():
+    t0 = time.perf_counter()
+    filters = extract_filters(user_q, catalog.gazetteer, get_client() if llm_available() else None)
+    ms = (time.perf_counter() - t0) * 1000
+
+    known = filters.known()
+    if not known:
+        st.info("ما قدرت أحدد فلاتر من الطلب. جرّب تذكر الدولة أو التخصص أو المستوى.")
+        st.stop()
+
+    src = "قواعد محلية" if filters.source == "rules" else "قواعد + LLM"
+    st.caption(f"{src} · ثقة {filters.confidence:.0%} · {ms:.0f} ms")
+    st.dataframe(
+        pd.DataFrame(
+            [{"الفلتر": FIELD_LABELS[f], "القيمة": v, "من النص": filters.matched.get(f, "")} for f, v in known.items()]
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    profile = Profile(**filters.values(), note=user_q)
+    results = pd.concat(list(cached_iter_top_k(catalog, profile, sizes=(10,))) or [pd.DataFrame()])
+    if results.empty:
+        st.warning("ما لقيت جامعات تطابق هالفلاتر.")
+    else:
+        st.dataframe(
+            results[["name_ar", "country", "city", "score", "status", "website"]],
+            use_container_width=True,
+            hide_index=True,
+            column_config={"website": st.column_config.LinkColumn("Website", display_text="Click here")},
+        )
+
+    # رأي رُشد: الـ prompt فيه بس أفضل المرشحين (بميزانية توكنز ثابتة مهما كبر الكتالوج)
+    if llm_available():
+        prompt = build_prompt(catalog, profile, user_q)
+        try:
+            with st.spinner("رُشد يكتب..."):
+                answer = get_client().complete(prompt.messages, temperature=0.3)
+        except RateLimited:
+            st.warning("رُشد عليه ضغط الحين. النتائج فوق جاهزة، وجرّب رأي رُشد بعد شوي.")
+            st.stop()
+        st.markdown("**رأي رُشد**")
+        st.write(answer.text)
+        st.caption(f"{prompt.tokens} توكن · {len(prompt.unis)} جامعات · {answer.latency_ms:.0f} ms"
+                   + (" · من الكاش" if answer.cached else ""))
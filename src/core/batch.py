@@ -0,0 +1,199 @@
+"""
+وضع المرشد (batch): ملف CSV فيه طلاب كثير -> قائمة مختصرة مرتبة لكل طالب.
+
+كل عامل (process) يفتح نفس الـ Catalog للقراءة بس (من نفس الـ snapshot على القرص،
+ومع fork ينورث من الأب بدون نسخ)، والطلاب يتوزعون على دفعات عشان تكلفة IPC تكون قليلة.
+
+    python -m src.core.batch students.csv -o shortlists.csv --top 10
+    python -m src.core.batch students.csv -o shortlists.jsonl --workers 4
+"""
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from src.core.catalog import PROGS_PATH, SNAPSHOT_DIR, UNIS_PATH, get_catalog
+from src.core.recommender import Profile, top_k
+
+# أسماء أعمدة بديلة اللي نقبلها في ملف الطلاب -> حقل Profile
+PROFILE_ALIASES = {
+    "major": "major_field",
+    "average": "hs_avg",
+    "avg": "hs_avg",
+    "math": "math_avg",
+    "notes": "note",
+}
+NUMERIC_FIELDS = ["hs_avg", "ielts", "math_avg", "budget"]
+
+SHORTLIST_COLS = [
+    "student_id", "rank", "uni_id", "name_ar", "name_en", "country", "city",
+    "score", "status", "reasons", "website", "admissions_url",
+]
+
+CHUNK_SIZE = 64
+# أقل من كذا نحسب في نفس الـ process (تشغيل الـ pool أغلى من الحساب نفسه)
+MIN_PARALLEL = 200
+
+
+# ----------------------------
+# Input
+# ----------------------------
+def read_profiles(source) -> tuple[list[str], list[Profile]]:
+    """ملف الطلاب (مسار أو ملف مرفوع) -> (student_id لكل صف، Profile لكل صف). الخانات الفاضية = "All"/0."""
+    df = pd.read_csv(source, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    df = df.rename(columns={k: v for k, v in PROFILE_ALIASES.items() if v not in df.columns})
+
+    if "student_id" in df.columns:
+        ids = df["student_id"].astype(str).str.strip().tolist()
+    else:
+        ids = [str(i + 1) for i in range(len(df))]
+
+    names = [f.name for f in fields(Profile)]
+    cols = {}
+    for name in names:
+        if name not in df.columns:
+            continue
+        col = df[name].astype(str).str.strip()
+        if name in NUMERIC_FIELDS:
+            cols[name] = pd.to_numeric(col, errors="coerce").fillna(0.0).astype(float).tolist()
+        elif name == "note":
+            cols[name] = col.tolist()
+        else:
+            cols[name] = col.replace("", "All").tolist()
+
+    profiles = [Profile(**{k: v[i] for k, v in cols.items()}) for i in range(len(df))]
+    return ids, profiles
+
+
+# ----------------------------
+# Scoring
+# ----------------------------
+_PATHS: tuple[Path, Path, Path] = (UNIS_PATH, PROGS_PATH, SNAPSHOT_DIR)
+
+
+def _init_worker(unis_path: Path, progs_path: Path, snapshot_dir: Path) -> None:
+    global _PATHS
+    _PATHS = (unis_path, progs_path, snapshot_dir)
+    get_catalog(*_PATHS)
+
+
+def _score_chunk(chunk: list[tuple[str, Profile]], k: int) -> pd.DataFrame:
+    catalog = get_catalog(*_PATHS)
+    parts = []
+    for student_id, profile in chunk:
+        out = top_k(catalog, profile, k)
+        out.insert(0, "rank", range(1, len(out) + 1))
+        out.insert(0, "student_id", student_id)
+        parts.append(out)
+    if not parts:
+        return pd.DataFrame(columns=SHORTLIST_COLS)
+    return pd.concat(parts, ignore_index=True)[SHORTLIST_COLS]
+
+
+def score_batch(
+    ids: list[str],
+    profiles: list[Profile],
+    k: int = 10,
+    workers: int | None = None,
+    on_progress: Callable[[int, int], None] | None = None,
+    paths: tuple[Path, Path, Path] = (UNIS_PATH, PROGS_PATH, SNAPSHOT_DIR),
+    start_method: str | None = None,
+) -> pd.DataFrame:
+    """
+    أفضل k جامعة لكل طالب (جدول طويل: صف لكل طالب × ترتيب) بنفس ترتيب الملف.
+    on_progress(done, total) ينادى بعد كل دفعة.
+    start_method: "spawn" من داخل Streamlit (fork من process فيه threads مو آمن).
+    """
+    items = list(zip(ids, profiles))
+    total = len(items)
+    chunks = [items[i:i + CHUNK_SIZE] for i in range(0, total, CHUNK_SIZE)]
+    workers = workers or os.cpu_count() or 1
+
+    # الأب يحمّل الكتالوج أول: مع fork العمال يورثونه جاهز، ومع spawn الـ snapshot يكون مبني
+    get_catalog(*paths)
+
+    results: dict[int, pd.DataFrame] = {}
+    done = 0
+    if workers <= 1 or total < MIN_PARALLEL:
+        _init_worker(*paths)
+        for i, chunk in enumerate(chunks):
+            results[i] = _score_chunk(chunk, k)
+            done += len(chunk)
+            if on_progress:
+                on_progress(done, total)
+    else:
+        ctx = get_context(start_method) if start_method else None
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                 initializer=_init_worker, initargs=paths) as pool:
+            futures = {pool.submit(_score_chunk, chunk, k): i for i, chunk in enumerate(chunks)}
+            for fut in as_completed(futures):
+                i = futures[fut]
+                results[i] = fut.result()
+                done += len(chunks[i])
+                if on_progress:
+                    on_progress(done, total)
+
+    if not results:
+        return pd.DataFrame(columns=SHORTLIST_COLS)
+    return pd.concat([results[i] for i in sorted(results)], ignore_index=True)
+
+
+# ----------------------------
+# Output
+# ----------------------------
+def to_csv_bytes(shortlists: pd.DataFrame) -> bytes:
+    # utf-8-sig عشان Excel يقرأ العربي صح
+    return shortlists.to_csv(index=False).encode("utf-8-sig")
+
+
+def to_jsonl_bytes(shortlists: pd.DataFrame) -> bytes:
+    """سطر لكل طالب: {"student_id": ..., "shortlist": [...]}."""
+    lines = []
+    for student_id, grp in shortlists.groupby("student_id", sort=False):
+        items = grp.drop(columns=["student_id"]).astype(object).to_dict(orient="records")
+        items = [{k: (int(v) if k in ("rank", "score") else str(v)) for k, v in it.items()} for it in items]
+        lines.append(json.dumps({"student_id": str(student_id), "shortlist": items}, ensure_ascii=False))
+    return ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+
+def write_shortlists(shortlists: pd.DataFrame, path: Path) -> None:
+    path = Path(path)
+    data = to_jsonl_bytes(shortlists) if path.suffix.lower() in (".jsonl", ".json") else to_csv_bytes(shortlists)
+    path.write_bytes(data)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Score a CSV of student profiles and write ranked shortlists")
+    parser.add_argument("profiles", type=Path, help="CSV: student_id,country,city,level,major_field,language,scholarship,hs_avg,ielts,math_avg,note,budget")
+    parser.add_argument("-o", "--out", type=Path, default=Path("shortlists.csv"), help=".csv or .jsonl")
+    parser.add_argument("--top", type=int, default=10, help="universities per student")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--unis", type=Path, default=UNIS_PATH)
+    parser.add_argument("--progs", type=Path, default=PROGS_PATH)
+    args = parser.parse_args()
+
+    ids, profiles = read_profiles(args.profiles)
+    t0 = time.perf_counter()
+
+    def progress(done: int, total: int) -> None:
+        print(f"\r{done}/{total} students", end="", file=sys.stderr, flush=True)
+
+    result = score_batch(ids, profiles, k=args.top, workers=args.workers, on_progress=progress,
+                         paths=(args.unis, args.progs, SNAPSHOT_DIR))
+    elapsed = time.perf_counter() - t0
+    print(file=sys.stderr)
+    write_shortlists(result, args.out)
+    rate = len(profiles) / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"{len(profiles)} students -> {args.out} ({elapsed:.1f} s, {rate:,.0f} profiles/min)")
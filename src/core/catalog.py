@@ -0,0 +1,540 @@
+"""
+كتالوج الجامعات والبرامج.
+
+نقرأ data/universities.csv و data/programs.csv مرة وحدة، ننظفها (normalize)،
+ونحفظ النتيجة كـ snapshot بصيغة Parquet داخل data/.snapshot/<hash>/.
+الـ hash مبني على محتوى الملفين، فأي تعديل على CSV يبني snapshot جديد تلقائياً.
+
+بناء يدوي (اختياري):
+    python -m src.core.catalog
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.core.eligibility import ProgramConstraints, compile_constraints
+from src.core.facets import (
+    FacetDictionary,
+    FacetIndex,
+    build_facets,
+    build_prog_facet_index,
+    build_uni_facet_index,
+)
+from src.core.geo import GeoIndex, coords_lookup, load_city_coords, load_test_centers, locate
+from src.core.intent import Gazetteer, build_gazetteer
+from src.core.requirements import REQ_COLS, parse_requirements, requirements_report
+from src.core.scholarships import TAG_COLUMNS, parse_scholarships, unknown_tags
+from src.core.search import (
+    PROG_RANK_COLS,
+    PROG_SEARCH_COLS,
+    SEP,
+    UNI_NAME_COLS,
+    UNI_RANK_COLS,
+    UNI_SEARCH_COLS,
+    BM25Index,
+    TextIndex,
+    build_match_key,
+)
+from src.core.neighbors import NeighborTable, program_items, university_items
+from src.core.semantic import PROG_SEMANTIC_COLS, UNI_SEMANTIC_COLS, SemanticIndex, document_texts
+from src.core.tuition import TUITION_COLS, TuitionIndex, load_rates, parse_tuition_column, tuition_report
+
+# ----------------------------
+# Paths
+# ----------------------------
+ROOT = Path(__file__).resolve().parents[2]
+DATA_DIR = ROOT / "data"
+UNIS_PATH = DATA_DIR / "universities.csv"
+PROGS_PATH = DATA_DIR / "programs.csv"
+SNAPSHOT_DIR = DATA_DIR / ".snapshot"
+# الفهرس الدلالي برا مجلدات الـ snapshot: يتحدث تزايدياً بين نسخ الكتالوج
+# (Catalog.semantic_dir: جنب snapshot_dir، فالافتراضي data/.semantic)
+SEMANTIC_DIR = DATA_DIR / ".semantic"
+# جداول "قد يعجبك أيضاً" (نفس الفكرة: برا الـ snapshot وتتحدث تزايدياً؛ Catalog.neighbors_dir)
+NEIGHBORS_DIR = DATA_DIR / ".neighbors"
+# أسعار العملات للرسوم (تنقرأ وقت تحميل الكتالوج، مو جزء من الـ snapshot)
+RATES_PATH = DATA_DIR / "currency_rates.csv"
+# إحداثيات المدن + مراكز الاختبارات (جداول صغيرة، تنقرأ وقت تحميل الكتالوج)
+CITY_COORDS_PATH = DATA_DIR / "city_coords.csv"
+TEST_CENTERS_PATH = DATA_DIR / "test_centers.csv"
+
+# نرفع الرقم إذا تغيّر شكل الـ snapshot (أعمدة/أنواع/تنظيف) عشان ما نقرأ نسخة قديمة
+SNAPSHOT_VERSION = "7"
+
+UNIS_COLS = [
+    "uni_id", "name_ar", "name_en", "country", "city", "type",
+    "scholarship", "sch_notes", "sch_url",
+    "website", "admissions_url", "programs_url",
+    "ranking_source", "ranking_value", "accreditation_notes",
+]
+
+PROGS_COLS = [
+    "program_id", "uni_id", "level", "degree_type", "major_field",
+    "program_name_en", "program_name_ar", "city", "language",
+    "duration_years", "tuition_notes", "admissions_requirements", "url",
+    "english_test", "english_score", "math_test", "math_score",
+    "admission_tests", "admission_notes",
+]
+
+# أعمدة الفلاتر: نخزنها categorical (جدول أكواد ثابت مرتب أبجدياً) بدل نصوص متكررة
+UNI_FACETS = ["country", "city", "type", "scholarship"]
+PROG_FACETS = ["level", "degree_type", "major_field", "language", "city"]
+
+# مفاتيح المطابقة (نص موحّد عبر textnorm) تنحسب وقت البناء وتنحفظ مع الـ snapshot
+UNI_KEY_COLS = ["name_key", "match_key"]
+
+# المنح محللة وقت البناء: Yes/No/Unknown + عمود bool لكل نوع
+UNI_SCH_COLS = ["sch_availability", *TAG_COLUMNS.values()]
+PROG_KEY_COLS = ["match_key"]
+
+
+# ----------------------------
+# CSV -> DataFrame (نصوص فقط)
+# ----------------------------
+def read_csv(path: Path, header_key: str) -> pd.DataFrame:
+    """
+    قراءة CSV كنصوص:
+    - إذا أول سطر يبدأ بـ header_key نعتبره هيدر، غير كذا header=None.
+    - نستخدم محرك C (أسرع بكثير)، ونرجع لمحرك python فقط إذا الملف مكسّر.
+    """
+    path = Path(path)
+    if (not path.exists()) or path.stat().st_size == 0:
+        return pd.DataFrame()
+
+    with path.open(encoding="utf-8", errors="ignore") as f:
+        first_line = f.readline().strip().lower()
+    header = 0 if first_line.startswith(header_key) else None
+
+    kwargs = dict(encoding="utf-8", header=header, dtype=str, on_bad_lines="skip")
+    try:
+        return pd.read_csv(path, **kwargs)
+    except (pd.errors.ParserError, UnicodeDecodeError):
+        return pd.read_csv(path, engine="python", **kwargs)
+
+
+def _clean_text(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
+    for c in cols:
+        if c not in df.columns:
+            df[c] = ""
+        df[c] = df[c].fillna("").astype(str).str.strip()
+    return df[cols].reset_index(drop=True)
+
+
+def encode_facets(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
+    """نص -> Categorical. الأكواد مرتبة حسب القيمة، فنفس البيانات تعطي نفس الأكواد دائماً."""
+    for c in cols:
+        if c in df.columns:
+            values = df[c].astype(str)
+            df[c] = pd.Categorical(values, categories=sorted(values.unique()))
+    return df
+
+
+def facet_mask(s: pd.Series, value: str) -> pd.Series:
+    """فلتر == على عمود categorical كمقارنة أكواد (int) بدل مقارنة نصوص."""
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        return s == value
+    code = s.cat.categories.get_indexer([value])[0]
+    if code < 0:
+        return pd.Series(False, index=s.index)
+    return s.cat.codes == code
+
+
+def normalize_unis(df: pd.DataFrame) -> pd.DataFrame:
+    if df is None or df.empty:
+        return pd.DataFrame(columns=UNIS_COLS + UNI_KEY_COLS + UNI_SCH_COLS)
+
+    df = df.copy()
+
+    cols_12 = [
+        "uni_id", "name_ar", "name_en", "country", "city", "type",
+        "website", "admissions_url", "programs_url",
+        "ranking_source", "extra_1", "extra_2"
+    ]
+    cols_15 = cols_12 + ["scholarship", "sch_notes", "sch_url"]
+
+    if list(df.columns) == list(range(len(df.columns))):
+        if len(df.columns) == 12:
+            df.columns = cols_12
+        elif len(df.columns) == 15:
+            df.columns = cols_15
+
+    if "uni_id" in df.columns:
+        df = df[df["uni_id"].fillna("").astype(str).str.strip().str.lower() != "uni_id"]
+
+    if "ranking_value" not in df.columns:
+        df["ranking_value"] = df.get("extra_1", "")
+    if "accreditation_notes" not in df.columns:
+        df["accreditation_notes"] = df.get("extra_2", "")
+
+    df = _clean_text(df, UNIS_COLS)
+    df["scholarship"] = (
+        df["scholarship"]
+        .str.replace("  ", " ")
+        .replace({"": "Unknown", "nan": "Unknown"})
+    )
+    df["name_key"] = build_match_key(df, UNI_NAME_COLS)
+    df["match_key"] = build_match_key(df, UNI_SEARCH_COLS)
+    df = pd.concat([df, parse_scholarships(df["scholarship"])], axis=1)
+    return encode_facets(df, UNI_FACETS)
+
+
+def normalize_progs(df: pd.DataFrame) -> pd.DataFrame:
+    if df is None or df.empty:
+        return pd.DataFrame(columns=PROGS_COLS + PROG_KEY_COLS + REQ_COLS + TUITION_COLS)
+    df = _clean_text(df.copy(), PROGS_COLS)
+    df["match_key"] = build_match_key(df, PROG_SEARCH_COLS)
+    df = pd.concat([df, parse_requirements(df)], axis=1)
+    df = pd.concat([df, parse_tuition_column(df)], axis=1)
+    return encode_facets(df, PROG_FACETS)
+
+
+# ----------------------------
+# Snapshot (Parquet) keyed by content hash
+# ----------------------------
+def source_fingerprint(*paths: Path) -> tuple:
+    """بصمة رخيصة (mtime + size) نستخدمها كمفتاح cache بدل قراءة الملفات كل rerun."""
+    out = []
+    for p in paths:
+        p = Path(p)
+        st_ = p.stat() if p.exists() else None
+        out.append((str(p), st_.st_mtime_ns if st_ else 0, st_.st_size if st_ else 0))
+    return tuple(out)
+
+
+def content_hash(*paths: Path) -> str:
+    h = hashlib.sha256(f"snapshot-v{SNAPSHOT_VERSION}".encode())
+    for p in paths:
+        p = Path(p)
+        h.update(b"\0" + p.name.encode() + b"\0")
+        if p.exists():
+            h.update(p.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def build_snapshot(
+    unis_path: Path = UNIS_PATH,
+    progs_path: Path = PROGS_PATH,
+    snapshot_dir: Path = SNAPSHOT_DIR,
+) -> tuple[str, pd.DataFrame, pd.DataFrame]:
+    """يقرأ الـ CSV، ينظفها، ويكتبها Parquet. يرجّع (hash, unis, progs)."""
+    version = content_hash(unis_path, progs_path)
+    unis = normalize_unis(read_csv(unis_path, "uni_id"))
+    progs = normalize_progs(read_csv(progs_path, "program_id"))
+
+    snapshot_dir = Path(snapshot_dir)
+    try:
+        snapshot_dir.mkdir(parents=True, exist_ok=True)
+        # نكتب في مجلد مؤقت ثم rename عشان عمليتين بنفس الوقت ما يقرون نسخة ناقصة
+        tmp = Path(tempfile.mkdtemp(prefix=f".{version}-", dir=snapshot_dir))
+        unis.to_parquet(tmp / "universities.parquet", index=False)
+        progs.to_parquet(tmp / "programs.parquet", index=False)
+        target = snapshot_dir / version
+        try:
+            os.replace(tmp, target)
+        except OSError:
+            # عملية ثانية سبقتنا وبنت نفس النسخة
+            shutil.rmtree(tmp, ignore_errors=True)
+        prune_snapshots(snapshot_dir, keep=version)
+    except (ImportError, OSError):
+        # بدون pyarrow أو بدون صلاحية كتابة: نكمل بالبيانات من الذاكرة
+        pass
+
+    return version, unis, progs
+
+
+def prune_snapshots(snapshot_dir: Path = SNAPSHOT_DIR, keep: str = "") -> None:
+    for d in Path(snapshot_dir).iterdir():
+        if d.is_dir() and d.name != keep and not d.name.startswith("."):
+            shutil.rmtree(d, ignore_errors=True)
+
+
+def load_snapshot(
+    unis_path: Path = UNIS_PATH,
+    progs_path: Path = PROGS_PATH,
+    snapshot_dir: Path = SNAPSHOT_DIR,
+) -> tuple[str, pd.DataFrame, pd.DataFrame]:
+    """يقرأ الـ snapshot إذا موجود لنفس المحتوى، وإلا يبنيه من جديد."""
+    version = content_hash(unis_path, progs_path)
+    target = Path(snapshot_dir) / version
+    try:
+        unis = pd.read_parquet(target / "universities.parquet")
+        progs = pd.read_parquet(target / "programs.parquet")
+        return version, unis, progs
+    except (ImportError, OSError, ValueError):
+        return build_snapshot(unis_path, progs_path, snapshot_dir)
+
+
+# ----------------------------
+# Catalog (مشترك لكل الجلسات في نفس العملية)
+# ----------------------------
+# أعمدة الجامعة اللي نلصقها مع كل برنامج في progs_joined
+JOIN_UNI_COLS = ["uni_id", "name_en", "name_ar", "country", "type", "city", "website", "admissions_url", "programs_url"]
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """
+    نسخة واحدة للقراءة فقط من البيانات:
+    - unis / progs: الجداول بعد التنظيف
+    - progs_joined: البرامج + بيانات الجامعة (الدولة/النوع/الاسم/الروابط)
+    - uni_labels: uni_id -> نص العرض في القوائم
+    - facets: خيارات الفلاتر جاهزة ومرتبة
+    - uni_search / prog_search: فهارس البحث النصي (تنبني أول مرة تنطلب)
+    - uni_bm25 / prog_bm25: ترتيب حسب الصلة، محفوظة جنب الـ snapshot عشان ما تنبني كل تشغيل
+    - uni_facet_index / prog_facet_index: bitsets للفلاتر وعدد النتائج لكل خيار
+    - gazetteer: قيم الفلاتر + أسماءها البديلة لفهم الطلب النصي الحر
+    - uni_semantic / prog_semantic: تشابه دلالي (memmap في data/.semantic، تحديث تزايدي)
+    - uni_neighbors / prog_neighbors: أقرب جامعات/برامج لكل عنصر (data/.neighbors، تحديث تزايدي)
+    الصفحات تفلتر منها مباشرة (الفلترة ترجع DataFrame جديد) بدون copy ولا تعديل in-place.
+    """
+    version: str
+    unis: pd.DataFrame
+    progs: pd.DataFrame
+    progs_joined: pd.DataFrame
+    uni_labels: dict = field(default_factory=dict)
+    facets: FacetDictionary = field(default_factory=FacetDictionary)
+    snapshot_dir: Path = SNAPSHOT_DIR
+
+    @classmethod
+    def from_frames(
+        cls,
+        version: str,
+        unis: pd.DataFrame,
+        progs: pd.DataFrame,
+        snapshot_dir: Path = SNAPSHOT_DIR,
+    ) -> "Catalog":
+        unis = unis.drop_duplicates(subset=["uni_id"], keep="first").reset_index(drop=True)
+        unis = unis[unis["uni_id"].ne("")].reset_index(drop=True)
+        progs_joined = progs.merge(
+            unis[JOIN_UNI_COLS],
+            on="uni_id",
+            how="left",
+            suffixes=("", "_uni"),
+        )
+        for c in [c for c in progs_joined.columns if c not in progs.columns]:
+            col = progs_joined[c]
+            if isinstance(col.dtype, pd.CategoricalDtype) and "" not in col.cat.categories:
+                col = col.cat.add_categories("")
+            progs_joined[c] = col.fillna("")
+        labels = (
+            unis["name_ar"] + " — " + unis["name_en"]
+            + " (" + unis["city"].astype(str) + ", " + unis["country"].astype(str) + ")"
+        )
+        labels = dict(zip(unis["uni_id"], labels))
+        return cls(
+            version=version,
+            unis=unis,
+            progs=progs,
+            progs_joined=progs_joined,
+            uni_labels=labels,
+            facets=build_facets(unis, progs),
+            snapshot_dir=Path(snapshot_dir),
+        )
+
+    @cached_property
+    def uni_search(self) -> TextIndex:
+        return TextIndex(self.unis["match_key"].tolist())
+
+    @cached_property
+    def prog_search(self) -> TextIndex:
+        name_key = self.progs_joined["uni_id"].map(dict(zip(self.unis["uni_id"], self.unis["name_key"])))
+        keys = self.progs_joined["match_key"] + SEP + name_key.fillna("")
+        return TextIndex(keys.tolist())
+
+    @cached_property
+    def prog_uni_pos(self) -> np.ndarray:
+        """لكل برنامج: موقع جامعته في unis (-1 إذا الجامعة مو موجودة). نفس ترتيب progs و progs_joined."""
+        return pd.Index(self.unis["uni_id"]).get_indexer(self.progs["uni_id"])
+
+    @cached_property
+    def prog_constraints(self) -> ProgramConstraints:
+        """قيود القبول لكل برنامج كـ arrays (لتقييم الأهلية دفعة وحدة)."""
+        return compile_constraints(self.progs)
+
+    @cached_property
+    def gazetteer(self) -> Gazetteer:
+        """قاموس قيم الفلاتر للطلبات النصية الحرة (رُشد)."""
+        return build_gazetteer(self.facets)
+
+    @cached_property
+    def rates(self) -> dict[str, float]:
+        return load_rates(RATES_PATH)
+
+    @cached_property
+    def rates_version(self) -> str:
+        """hash الأسعار: الأسعار مو جزء من version (تنقرأ وقت التحميل)، فالكاش يحتاجها بمفتاحه."""
+        return hashlib.sha256(repr(sorted(self.rates.items())).encode()).hexdigest()[:16]
+
+    @cached_property
+    def tuition_index(self) -> TuitionIndex:
+        """مدى الرسوم السنوية (USD) لكل برنامج، نفس ترتيب progs/progs_joined."""
+        return TuitionIndex.from_frame(self.progs_joined, self.rates)
+
+    @cached_property
+    def cities(self) -> pd.DataFrame:
+        """city_coords.csv: country, city, lat, lon."""
+        return load_city_coords(CITY_COORDS_PATH)
+
+    @cached_property
+    def city_coords(self) -> dict[tuple[str, str], tuple[float, float]]:
+        return coords_lookup(self.cities)
+
+    @cached_property
+    def test_centers(self) -> pd.DataFrame:
+        """test_centers.csv مع lat/lon (من المدينة إذا ما انكتبت)."""
+        centers = load_test_centers(TEST_CENTERS_PATH)
+        lat, lon = locate(centers, self.city_coords)
+        return centers.assign(lat=lat, lon=lon)
+
+    @cached_property
+    def center_index(self) -> GeoIndex:
+        return GeoIndex(self.test_centers["lat"].to_numpy(), self.test_centers["lon"].to_numpy())
+
+    @cached_property
+    def uni_geo_index(self) -> GeoIndex:
+        """الجامعات حسب إحداثيات مدينتها (نفس ترتيب unis)."""
+        lat, lon = locate(self.unis.astype({"country": str, "city": str}), self.city_coords)
+        return GeoIndex(lat, lon)
+
+    @cached_property
+    def tuition_report(self) -> dict[str, int]:
+        """نصوص tuition_notes ما طلع منها مبلغ (نص -> عدد البرامج)."""
+        return tuition_report(self.progs)
+
+    @cached_property
+    def scholarship_report(self) -> dict[str, int]:
+        """أنواع منح موجودة في البيانات لكنها مو ضمن SCHOLARSHIP_TAGS (نص -> عدد الجامعات)."""
+        return unknown_tags(self.unis["scholarship"])
+
+    @cached_property
+    def requirements_report(self) -> pd.DataFrame:
+        """قيم متطلبات ما انفهمت وقت التحليل (column / value / problem / programs)."""
+        return requirements_report(self.progs)
+
+    @cached_property
+    def uni_facet_index(self) -> FacetIndex:
+        return build_uni_facet_index(self.unis)
+
+    @cached_property
+    def prog_facet_index(self) -> FacetIndex:
+        return build_prog_facet_index(self.progs_joined)
+
+    @cached_property
+    def uni_bm25(self) -> BM25Index:
+        path = self.snapshot_dir / self.version / "bm25_universities.npz"
+        return BM25Index.load_or_build(path, self.unis, UNI_RANK_COLS)
+
+    @cached_property
+    def prog_bm25(self) -> BM25Index:
+        path = self.snapshot_dir / self.version / "bm25_programs.npz"
+        return BM25Index.load_or_build(path, self.progs_joined, PROG_RANK_COLS)
+
+    @property
+    def semantic_dir(self) -> Path:
+        """جنب الـ snapshots (كتالوج ببيانات ثانية = فهرس ثاني)."""
+        return self.snapshot_dir.parent / SEMANTIC_DIR.name
+
+    @cached_property
+    def uni_semantic(self) -> SemanticIndex:
+        return SemanticIndex.load_or_build(self.semantic_dir / "universities", document_texts(self.unis, UNI_SEMANTIC_COLS))
+
+    @cached_property
+    def prog_semantic(self) -> SemanticIndex:
+        return SemanticIndex.load_or_build(self.semantic_dir / "programs", document_texts(self.progs, PROG_SEMANTIC_COLS))
+
+    @property
+    def neighbors_dir(self) -> Path:
+        return self.snapshot_dir.parent / NEIGHBORS_DIR.name
+
+    @cached_property
+    def uni_neighbors(self) -> NeighborTable:
+        return NeighborTable.load_or_build(self.neighbors_dir / "universities", university_items(self.unis, self.progs))
+
+    @cached_property
+    def prog_neighbors(self) -> NeighborTable:
+        """مواقع الجيران = مواقع في progs / progs_joined."""
+        return NeighborTable.load_or_build(self.neighbors_dir / "programs", program_items(self.progs_joined))
+
+
+_CATALOG: Catalog | None = None
+_CATALOG_KEY: tuple | None = None
+_CATALOG_LOCK = threading.Lock()
+
+
+def get_catalog(
+    unis_path: Path = UNIS_PATH,
+    progs_path: Path = PROGS_PATH,
+    snapshot_dir: Path = SNAPSHOT_DIR,
+) -> Catalog:
+    """
+    يرجّع نفس الـ Catalog لكل الجلسات. نعيد التحميل فقط إذا تغيّرت بصمة الملفات
+    (وحتى وقتها الـ snapshot يُقرأ من القرص إذا المحتوى نفسه).
+    """
+    global _CATALOG, _CATALOG_KEY
+    key = source_fingerprint(unis_path, progs_path) + (str(snapshot_dir),)
+    if _CATALOG is not None and _CATALOG_KEY == key:
+        return _CATALOG
+    with _CATALOG_LOCK:
+        if _CATALOG is None or _CATALOG_KEY != key:
+            version, unis, progs = load_snapshot(unis_path, progs_path, snapshot_dir)
+            # نفس البيانات بس مجلد snapshot ثاني = مجلدات فهارس ثانية، فلازم Catalog جديد
+            if _CATALOG is None or _CATALOG.version != version or _CATALOG.snapshot_dir != Path(snapshot_dir):
+                _CATALOG = Catalog.from_frames(version, unis, progs, snapshot_dir)
+            _CATALOG_KEY = key
+        return _CATALOG
+
+
+# ----------------------------
+# Memory report
+# ----------------------------
+def memory_report(catalog: Catalog) -> pd.DataFrame:
+    """حجم أعمدة الفلاتر: نصوص (object) مقابل categorical."""
+    rows = []
+    for table, df, cols in [("universities", catalog.unis, UNI_FACETS), ("programs", catalog.progs, PROG_FACETS)]:
+        for c in cols:
+            if c not in df.columns:
+                continue
+            before = int(df[c].astype(str).astype(object).memory_usage(deep=True, index=False))
+            after = int(df[c].memory_usage(deep=True, index=False))
+            rows.append({"table": table, "column": c, "before_bytes": before, "after_bytes": after})
+    out = pd.DataFrame(rows, columns=["table", "column", "before_bytes", "after_bytes"])
+    out["ratio"] = (out["before_bytes"] / out["after_bytes"].clip(lower=1)).round(1)
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the catalog snapshot from data/*.csv")
+    parser.add_argument("--memory", action="store_true", help="print before/after memory of facet columns")
+    args = parser.parse_args()
+
+    v, u, p = build_snapshot()
+    print(f"snapshot {v}: {len(u)} universities, {len(p)} programs -> {SNAPSHOT_DIR / v}")
+    catalog = Catalog.from_frames(v, u, p)
+    if catalog.scholarship_report:
+        print("unknown scholarship tags (not in SCHOLARSHIP_TAGS):")
+        for tag, n in catalog.scholarship_report.items():
+            print(f"  {n:>3}  {tag}")
+    if catalog.tuition_report:
+        print("tuition_notes without an amount:")
+        for text, n in catalog.tuition_report.items():
+            print(f"  {n:>3}  {text}")
+    if not catalog.requirements_report.empty:
+        print("unparsed admission requirements:")
+        print(catalog.requirements_report.to_string(index=False))
+    if args.memory:
+        report = memory_report(catalog)
+        print(report.to_string(index=False))
+        total_before, total_after = report["before_bytes"].sum(), report["after_bytes"].sum()
+        print(f"total: {total_before:,} -> {total_after:,} bytes")
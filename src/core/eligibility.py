@@ -0,0 +1,123 @@
+"""
+أهلية الطالب لكل برنامج (Suitable / Conditional / Unknown) دفعة وحدة على كل الكتالوج.
+
+كل برنامج يتحول مرة وحدة (مع الـ Catalog) إلى vector قيود من أعمدة المتطلبات المحللة:
+- الإنجليزي: نوع الاختبار + أقل درجة
+- الرياضيات: المستوى المطلوب + أقل درجة
+- أقل معدل (من نص admissions_requirements / admission_notes إذا مذكور)
+- اختبارات قبول (تحديد مستوى / مقابلة / قدرات)
+وتقييم ملف الطالب = مقارنات على المصفوفات، بدون لف على البرامج.
+
+القاعدة:
+- Unknown: البرنامج ما له أي قيد معروف في البيانات
+- Conditional: قيد ما تحقق، أو بيانات الطالب ناقصة له، أو فيه اختبار قبول لازم ينجح فيه
+- Suitable: كل القيود المعروفة متحققة
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.core.requirements import ADMISSION_TESTS
+
+VERDICTS = ["Suitable", "Conditional", "Unknown"]
+
+# أكواد اختبار الإنجليزي في الـ vector
+ENG_NONE, ENG_IELTS, ENG_OTHER = 0, 1, 2
+# مستوى 3 (رياضيات + فيزياء) ما نقدر نتحقق منه من ملف الطالب
+MATH_VERIFIABLE_LEVEL = 2
+
+_MIN_AVG = [
+    re.compile(r"(\d{2,3}(?:\.\d+)?)\s*%"),
+    re.compile(r"(?:average|avg|gpa|معدل|نسبة)\D{0,12}(\d{2,3}(?:\.\d+)?)", re.IGNORECASE),
+]
+
+
+def min_average(text: str) -> float:
+    """أقل معدل مذكور في النص ("70%" / "معدل 80") أو NaN."""
+    for pat in _MIN_AVG:
+        m = pat.search(str(text))
+        if m:
+            v = float(m.group(1))
+            if 40 <= v <= 100:
+                return v
+    return np.nan
+
+
+@dataclass(frozen=True)
+class ProgramConstraints:
+    """Vector قيود لكل برنامج (arrays بطول catalog.progs)."""
+    eng_test: np.ndarray
+    eng_min: np.ndarray
+    math_level: np.ndarray
+    math_min: np.ndarray
+    avg_min: np.ndarray
+    tests: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.eng_test.size)
+
+
+def compile_constraints(progs: pd.DataFrame) -> ProgramConstraints:
+    n = len(progs)
+    if n == 0 or "req_test" not in progs.columns:
+        z = np.zeros(n, dtype=np.float32)
+        return ProgramConstraints(np.zeros(n, dtype=np.int8), z, np.zeros(n, dtype=np.int8), z, z,
+                                  np.zeros(n, dtype=bool))
+
+    test = progs["req_test"].astype(str).to_numpy()
+    eng_test = np.select([test == "None", test == "IELTS"], [ENG_NONE, ENG_IELTS], ENG_OTHER).astype(np.int8)
+
+    text = progs["admissions_requirements"].astype(str) + " " + progs["admission_notes"].astype(str)
+    uniq = pd.unique(text)
+    avg_min = text.map({v: min_average(v) for v in uniq}).to_numpy(dtype=np.float32)
+
+    return ProgramConstraints(
+        eng_test=eng_test,
+        eng_min=progs["req_test_score"].to_numpy(dtype=np.float32),
+        math_level=progs["req_math_level"].to_numpy(dtype=np.int8),
+        math_min=progs["req_math_score"].to_numpy(dtype=np.float32),
+        avg_min=avg_min,
+        tests=progs[list(ADMISSION_TESTS.values())].to_numpy(dtype=bool).any(axis=1),
+    )
+
+
+def evaluate(c: ProgramConstraints, ielts: float = 0.0, hs_avg: float = 0.0, math_avg: float = 0.0) -> np.ndarray:
+    """
+    الحكم لكل برنامج كأكواد (0 = Suitable، 1 = Conditional، 2 = Unknown) — VERDICTS[code].
+    قيم الطالب 0 = ما دخلها.
+    """
+    # ---- الإنجليزي ----
+    eng_known = c.eng_test != ENG_NONE
+    has_min = ~np.isnan(c.eng_min) & (c.eng_min > 0)
+    if ielts > 0:
+        eng_ok = (c.eng_test == ENG_IELTS) & (~has_min | (ielts >= np.nan_to_num(c.eng_min)))
+    else:
+        eng_ok = np.zeros(len(c), dtype=bool)
+
+    # ---- الرياضيات ----
+    math_score_known = ~np.isnan(c.math_min) & (c.math_min > 0)
+    math_known = (c.math_level > 0) | math_score_known
+    if math_avg > 0:
+        math_ok = np.where(
+            math_score_known,
+            math_avg >= np.nan_to_num(c.math_min),
+            c.math_level <= MATH_VERIFIABLE_LEVEL,
+        )
+    else:
+        math_ok = np.zeros(len(c), dtype=bool)
+
+    # ---- المعدل ----
+    avg_known = ~np.isnan(c.avg_min)
+    avg_ok = (hs_avg >= np.nan_to_num(c.avg_min)) if hs_avg > 0 else np.zeros(len(c), dtype=bool)
+
+    known = eng_known | math_known | avg_known | c.tests
+    failed = (eng_known & ~eng_ok) | (math_known & ~math_ok) | (avg_known & ~avg_ok) | c.tests
+    return np.select([~known, failed], [2, 1], 0).astype(np.int8)
+
+
+def verdicts(c: ProgramConstraints, ielts: float = 0.0, hs_avg: float = 0.0, math_avg: float = 0.0) -> np.ndarray:
+    return np.asarray(VERDICTS, dtype=object)[evaluate(c, ielts, hs_avg, math_avg)]
@@ -0,0 +1,113 @@
+"""
+"ليش هالجامعة تناسبك؟" لكل بطاقة في رُشد، من الـ LLM بالتوازي.
+
+كل الجامعات تنطلب مع بعض (asyncio)، فالوقت الكلي ≈ أبطأ شرح واحد بدل مجموعهم.
+كل طلب له timeout، واللي يتأخر (أو يطيح) ينلغى ويرجع للأسباب الثابتة (عمود reasons من الترتيب).
+النص يوصل أول بأول عبر on_token(uni_id, النص لين الحين) عشان البطاقة تتعبى وهي تنكتب.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import pandas as pd
+
+from src.core.llm import LLMClient
+from src.core.recommender import Profile
+
+# ثواني: لكل جامعة، وللدفعة كلها
+EXPLAIN_TIMEOUT = 8.0
+TOTAL_TIMEOUT = 12.0
+
+SYSTEM_PROMPT = (
+    "You are Rushd, a university admissions advisor for Gulf students. "
+    "In 2-3 short sentences of simple Arabic, explain why this university fits the student. "
+    "Use only the facts given; do not invent rankings, fees or deadlines."
+)
+
+OnToken = Callable[[str, str], None]
+
+
+@dataclass(frozen=True)
+class Explanation:
+    uni_id: str
+    text: str
+    source: str  # "llm" / "reasons"
+    latency_ms: float
+
+
+def explanation_prompt(row: pd.Series, profile: Profile) -> str:
+    wants = {
+        "country": profile.country, "city": profile.city, "level": profile.level,
+        "major": profile.major_field, "language": profile.language, "scholarship": profile.scholarship,
+    }
+    student = ", ".join(f"{k}: {v}" for k, v in wants.items() if v not in ("", "All"))
+    lines = [
+        f"Student wants: {student or 'no preferences'}",
+        f"Student note: {profile.note.strip()}" if profile.note.strip() else "",
+        f"University: {row['name_ar']} / {row['name_en']} ({row['city']}, {row['country']}, {row['type']})",
+        f"Scholarships: {row['scholarship']}",
+        f"Admission fit: {row['status']}",
+        f"Matched reasons: {row['reasons']}",
+    ]
+    return "\n".join(line for line in lines if line)
+
+
+async def explain_one(client: LLMClient, row: pd.Series, profile: Profile,
+                      on_token: OnToken | None = None, timeout: float = EXPLAIN_TIMEOUT) -> Explanation:
+    uni_id = str(row["uni_id"])
+    t0 = time.perf_counter()
+    parts: list[str] = []
+    try:
+        async with asyncio.timeout(timeout):
+            async for piece in client.astream(explanation_prompt(row, profile), system=SYSTEM_PROMPT, temperature=0.3):
+                parts.append(piece)
+                if on_token:
+                    on_token(uni_id, "".join(parts))
+        text = "".join(parts).strip()
+        if text:
+            return Explanation(uni_id, text, "llm", round((time.perf_counter() - t0) * 1000, 1))
+    except Exception:
+        # timeout / الـ API طاح: الأسباب الثابتة تكفي
+        pass
+    return fallback(row, on_token, t0)
+
+
+def fallback(row: pd.Series, on_token: OnToken | None = None, t0: float | None = None) -> Explanation:
+    uni_id = str(row["uni_id"])
+    text = str(row["reasons"] or "")
+    if on_token:
+        on_token(uni_id, text)
+    ms = round((time.perf_counter() - t0) * 1000, 1) if t0 is not None else 0.0
+    return Explanation(uni_id, text, "reasons", ms)
+
+
+async def explain_all(client: LLMClient, rows: pd.DataFrame, profile: Profile, on_token: OnToken | None = None,
+                      timeout: float = EXPLAIN_TIMEOUT, total_timeout: float = TOTAL_TIMEOUT) -> list[Explanation]:
+    """شرح لكل صف (بنفس الترتيب). اللي ما خلص قبل total_timeout ينلغى ويرجع للأسباب."""
+    t0 = time.perf_counter()
+    items = [row for _, row in rows.iterrows()]
+    tasks = [asyncio.create_task(explain_one(client, row, profile, on_token, timeout)) for row in items]
+    if not tasks:
+        return []
+    done, pending = await asyncio.wait(tasks, timeout=total_timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    out = []
+    for task, row in zip(tasks, items):
+        if task in done and not task.cancelled() and task.exception() is None:
+            out.append(task.result())
+        else:
+            out.append(fallback(row, on_token, t0))
+    return out
+
+
+def explain_top(client: LLMClient, rows: pd.DataFrame, profile: Profile, on_token: OnToken | None = None,
+                timeout: float = EXPLAIN_TIMEOUT, total_timeout: float = TOTAL_TIMEOUT) -> list[Explanation]:
+    """نسخة sync لـ explain_all (من سكربت Streamlit: ما فيه event loop شغال)."""
+    return asyncio.run(explain_all(client, rows, profile, on_token, timeout, total_timeout))
@@ -0,0 +1,185 @@
+"""
+قوائم الفلاتر (الدول/الأنواع/المراحل/التخصصات/اللغات/المدن حسب الدولة).
+
+تنبني مرة وحدة مع الـ Catalog، والصفحات تعرضها في selectbox مباشرة بدون ما تلمس الـ DataFrames.
+وفيه FacetIndex: bitset لكل قيمة فلتر عشان الفلترة + عدد النتائج لكل خيار تكون AND/popcount.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from src.core.scholarships import AVAILABILITY, SCHOLARSHIP_TAGS, TAG_COLUMNS
+from src.core.textnorm import normalize_text
+
+
+def collation_key(s: str) -> tuple:
+    # ترتيب عربي: نقارن بعد التوحيد (أشكال الألف/الياء/التاء المربوطة + بدون تشكيل)
+    # عشان "أبوظبي" تجي جنب "ابها" مو آخر القائمة
+    return (normalize_text(s), str(s))
+
+
+def sorted_options(values) -> tuple[str, ...]:
+    """قيم فريدة غير فاضية، مرتبة بترتيب يناسب العربي والإنجليزي."""
+    uniq = {str(v).strip() for v in values if str(v).strip()}
+    return tuple(sorted(uniq, key=collation_key))
+
+
+@dataclass(frozen=True)
+class FacetDictionary:
+    countries: tuple[str, ...] = ()
+    uni_types: tuple[str, ...] = ()
+    cities: tuple[str, ...] = ()
+    levels: tuple[str, ...] = ()
+    degree_types: tuple[str, ...] = ()
+    majors: tuple[str, ...] = ()
+    languages: tuple[str, ...] = ()
+    cities_by_country: dict = field(default_factory=dict)
+    # uni_id مرتبة (الدولة، المدينة، الاسم) لقائمة المقارنة
+    uni_ids: tuple[str, ...] = ()
+
+    def cities_for(self, country: str) -> tuple[str, ...]:
+        if country in ("", "All"):
+            return self.cities
+        return self.cities_by_country.get(country, ())
+
+
+def _col(df: pd.DataFrame, col: str) -> pd.Series:
+    return df[col] if col in df.columns else pd.Series([], dtype=str)
+
+
+def build_facets(unis: pd.DataFrame, progs: pd.DataFrame) -> FacetDictionary:
+    by_country = {}
+    if not unis.empty:
+        pairs = unis[["country", "city"]].astype(str).drop_duplicates()
+        for country, grp in pairs.groupby("country", sort=False):
+            if country.strip():
+                by_country[country] = sorted_options(grp["city"])
+
+    uni_ids = ()
+    if not unis.empty:
+        order = unis[["uni_id", "country", "city", "name_en"]].astype(str)
+        uni_ids = tuple(order.sort_values(["country", "city", "name_en"])["uni_id"])
+
+    return FacetDictionary(
+        countries=sorted_options(_col(unis, "country")),
+        uni_types=sorted_options(_col(unis, "type")),
+        cities=sorted_options(_col(unis, "city")),
+        levels=sorted_options(_col(progs, "level")),
+        degree_types=sorted_options(_col(progs, "degree_type")),
+        majors=sorted_options(_col(progs, "major_field")),
+        languages=sorted_options(_col(progs, "language")),
+        cities_by_country=by_country,
+        uni_ids=uni_ids,
+    )
+
+
+# ----------------------------
+# Bitmap facet engine
+# ----------------------------
+def mask_to_bits(mask) -> int:
+    """Boolean array -> bitset (Python int، البت رقم i = الصف i)."""
+    packed = np.packbits(np.asarray(mask, dtype=bool), bitorder="little")
+    return int.from_bytes(packed.tobytes(), "little")
+
+
+def bits_to_positions(bits: int, n: int) -> np.ndarray:
+    raw = np.frombuffer(bits.to_bytes((n + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little")[:n])
+
+
+class FacetIndex:
+    """
+    لكل قيمة فلتر bitset جاهز. أي تركيبة فلاتر = AND بين bitsets،
+    وعدد النتائج لكل قيمة متبقية = popcount بدون ما نمسح الجدول.
+
+    mode لكل فلتر:
+    - "any": اختيار قيمة (أو أكثر) من نفس الفلتر = OR (الدولة، النوع...)
+    - "all": كل القيم المختارة لازم تتحقق = AND (أنواع المنح)
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.all = (1 << n) - 1
+        self.bits: dict[str, dict[str, int]] = {}
+        self.modes: dict[str, str] = {}
+
+    def add_column(self, facet: str, values: pd.Series, mode: str = "any") -> None:
+        codes, uniques = pd.factorize(values.astype(str), sort=False)
+        self.modes[facet] = mode
+        self.bits[facet] = {
+            str(v): mask_to_bits(codes == i) for i, v in enumerate(uniques) if str(v).strip()
+        }
+
+    def add_masks(self, facet: str, masks: dict[str, np.ndarray], mode: str = "any") -> None:
+        self.modes[facet] = mode
+        self.bits[facet] = {str(v): mask_to_bits(m) for v, m in masks.items()}
+
+    def _facet_bits(self, facet: str, selected) -> int:
+        if isinstance(selected, str):
+            selected = [] if selected in ("", "All") else [selected]
+        if not selected:
+            return self.all
+        table = self.bits.get(facet, {})
+        if self.modes.get(facet) == "all":
+            out = self.all
+            for v in selected:
+                out &= table.get(v, 0)
+            return out
+        out = 0
+        for v in selected:
+            out |= table.get(v, 0)
+        return out
+
+    def select(self, selection: dict, base: int | None = None, skip: str | None = None) -> int:
+        out = self.all if base is None else base
+        for facet, selected in selection.items():
+            if facet != skip and facet in self.bits:
+                out &= self._facet_bits(facet, selected)
+        return out
+
+    def counts(self, selection: dict, base: int | None = None) -> dict[str, dict[str, int]]:
+        """
+        عدد النتائج لكل قيمة لو انضافت للاختيار الحالي.
+        فلاتر "any" نحسبها بدون اختيارها هي (عشان تبين البدائل)، و"all" مع اختيارها (تضييق).
+        """
+        out = {}
+        for facet, table in self.bits.items():
+            skip = facet if self.modes.get(facet) != "all" else None
+            b = self.select(selection, base, skip=skip)
+            out[facet] = {v: (b & bits).bit_count() for v, bits in table.items()}
+        return out
+
+    def positions(self, bits: int) -> np.ndarray:
+        return bits_to_positions(bits, self.n)
+
+
+def with_count(value: str, counts: dict[str, int]) -> str:
+    """نص الخيار في selectbox: "Qatar (12)"."""
+    if value in counts:
+        return f"{value} ({counts[value]})"
+    return value
+
+
+def build_uni_facet_index(unis: pd.DataFrame, tags: list[str] = SCHOLARSHIP_TAGS) -> FacetIndex:
+    idx = FacetIndex(len(unis))
+    if unis.empty:
+        return idx
+    idx.add_column("country", unis["country"])
+    idx.add_column("type", unis["type"])
+
+    # المنح محللة مسبقاً في الـ snapshot (sch_availability + مصفوفة sch_tag_*)
+    avail = unis["sch_availability"]
+    idx.add_masks("availability", {a: (avail == a).to_numpy() for a in AVAILABILITY})
+    idx.add_masks("tags", {t: unis[TAG_COLUMNS[t]].to_numpy(dtype=bool) for t in tags}, mode="all")
+    return idx
+
+
+def build_prog_facet_index(progs_joined: pd.DataFrame) -> FacetIndex:
+    idx = FacetIndex(len(progs_joined))
+    for c in ["country", "type", "level", "major_field"]:
+        if c in progs_joined.columns:
+            idx.add_column(c, progs_joined[c])
+    return idx
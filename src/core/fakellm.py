@@ -0,0 +1,141 @@
+"""
+خادم LLM وهمي محلي متوافق مع OpenAI (POST /v1/chat/completions، عادي أو stream=true).
+
+للاختبار بدون شبكة ولا فلوس: يتأخر latency ثانية (+ chunk_delay بين قطع الـ stream)،
+يعد الطلبات اللي وصلته، ويرجع 429 إذا الطلبات المتزامنة أكثر من max_concurrent.
+
+    python -m src.core.fakellm --port 8011 --latency 0.5
+    OPENAI_BASE_URL=http://127.0.0.1:8011/v1 OPENAI_API_KEY=x LLM_BACKEND=openai streamlit run app.py
+"""
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLLMServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.2,
+                 chunk_delay: float = 0.0, max_concurrent: int = 0):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.max_concurrent = max_concurrent
+        self.requests = 0
+        self.rejected = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def reply(self, messages: list[dict]) -> str:
+        last = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        return f"[fake] {str(last)[:200]}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _json(self, code: int, payload: dict) -> None:
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._json(404, {"error": {"message": "not found"}})
+                    return
+                req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                    if server.max_concurrent and server.active >= server.max_concurrent:
+                        server.rejected += 1
+                        busy = True
+                    else:
+                        server.active += 1
+                        server.max_active = max(server.max_active, server.active)
+                        busy = False
+                if busy:
+                    self._json(429, {"error": {"message": "rate limited", "type": "rate_limit_error"}})
+                    return
+                try:
+                    time.sleep(server.latency)
+                    text = server.reply(req.get("messages", []))
+                    if req.get("stream"):
+                        self._stream(req, text)
+                    else:
+                        self._json(200, {
+                            "id": "fake-1", "object": "chat.completion", "created": int(time.time()),
+                            "model": req.get("model", "fake"),
+                            "choices": [{"index": 0, "finish_reason": "stop",
+                                         "message": {"role": "assistant", "content": text}}],
+                            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                        })
+                finally:
+                    with server._lock:
+                        server.active -= 1
+
+            def _stream(self, req: dict, text: str) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for piece in re.findall(r"\S+\s*", text):
+                    if server.chunk_delay:
+                        time.sleep(server.chunk_delay)
+                    chunk = {"id": "fake-1", "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": req.get("model", "fake"),
+                             "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+        return Handler
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible fake LLM server")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds before each reply")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="seconds between streamed chunks")
+    parser.add_argument("--max-concurrent", type=int, default=0, help="answer 429 above this (0 = no limit)")
+    args = parser.parse_args()
+
+    srv = FakeLLMServer(port=args.port, latency=args.latency, chunk_delay=args.chunk_delay,
+                        max_concurrent=args.max_concurrent)
+    print(f"fake LLM on {srv.base_url}")
+    try:
+        srv._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
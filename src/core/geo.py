@@ -0,0 +1,167 @@
+"""
+مواقع: إحداثيات المدن (data/city_coords.csv) + مراكز الاختبارات (data/test_centers.csv).
+
+GeoIndex: النقاط مرتبة حسب خط العرض، فسؤال "خلال R كم" = searchsorted على شريط عرض
+ثم haversine (vectorized) على المرشحين بس، و"أقرب N" = haversine على الكل + argpartition
+(آلاف المراكز = أجزاء من المللي ثانية).
+المراكز اللي ما لها lat/lon تاخذ إحداثيات مدينتها.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from src.core.textnorm import normalize_text
+
+if TYPE_CHECKING:
+    from src.core.catalog import Catalog
+
+EARTH_RADIUS_KM = 6371.0088
+
+TEST_TYPES = ["IELTS", "TOEFL", "SAT"]
+CENTER_COLS = ["center_id", "name", "test_type", "country", "city", "lat", "lon", "url"]
+
+
+def city_key(country: str, city: str) -> tuple[str, str]:
+    return normalize_text(country), normalize_text(city)
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """المسافة (كم) من نقطة وحدة لكل النقاط. كل القيم بالدرجات."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+# ----------------------------
+# Tables
+# ----------------------------
+def load_city_coords(path: Path) -> pd.DataFrame:
+    """city_coords.csv: country, city, lat, lon (الصفوف بدون إحداثيات صحيحة تنشال)."""
+    path = Path(path)
+    if not path.exists():
+        return pd.DataFrame(columns=["country", "city", "lat", "lon"])
+    df = pd.read_csv(path, dtype=str).fillna("")
+    df["lat"] = pd.to_numeric(df["lat"], errors="coerce")
+    df["lon"] = pd.to_numeric(df["lon"], errors="coerce")
+    return df.dropna(subset=["lat", "lon"])[["country", "city", "lat", "lon"]].reset_index(drop=True)
+
+
+def coords_lookup(cities: pd.DataFrame) -> dict[tuple[str, str], tuple[float, float]]:
+    """{(country, city) بعد التوحيد: (lat, lon)}."""
+    return {
+        city_key(country, city): (float(a), float(b))
+        for country, city, a, b in zip(cities["country"], cities["city"], cities["lat"], cities["lon"])
+    }
+
+
+def locate(df: pd.DataFrame, coords: dict) -> tuple[np.ndarray, np.ndarray]:
+    """lat/lon لكل صف: من أعمدة lat/lon إذا موجودة، وإلا من مدينته (NaN إذا المدينة مو معروفة)."""
+    n = len(df)
+    lat = pd.to_numeric(df["lat"], errors="coerce").to_numpy(dtype=np.float64) if "lat" in df.columns else np.full(n, np.nan)
+    lon = pd.to_numeric(df["lon"], errors="coerce").to_numpy(dtype=np.float64) if "lon" in df.columns else np.full(n, np.nan)
+    missing = np.isnan(lat) | np.isnan(lon)
+    if missing.any():
+        keys = [city_key(c, t) for c, t in zip(df["country"].astype(str), df["city"].astype(str))]
+        from_city = np.array([coords.get(k, (np.nan, np.nan)) for k in keys], dtype=np.float64).reshape(n, 2)
+        lat = np.where(missing, from_city[:, 0], lat)
+        lon = np.where(missing, from_city[:, 1], lon)
+    return lat, lon
+
+
+def load_test_centers(path: Path) -> pd.DataFrame:
+    path = Path(path)
+    if not path.exists():
+        return pd.DataFrame(columns=CENTER_COLS)
+    df = pd.read_csv(path, dtype=str).fillna("")
+    for c in CENTER_COLS:
+        if c not in df.columns:
+            df[c] = ""
+        df[c] = df[c].astype(str).str.strip()
+    return df[CENTER_COLS].reset_index(drop=True)
+
+
+# ----------------------------
+# Spatial index
+# ----------------------------
+class GeoIndex:
+    """نقاط (lat/lon بالدرجات) مرتبة حسب خط العرض. النقاط بدون إحداثيات برا الفهرس."""
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        self.n = lat.size
+        known = np.flatnonzero(~np.isnan(lat) & ~np.isnan(lon))
+        order = known[np.argsort(lat[known], kind="stable")]
+        self.pos = order
+        self.lat = lat[order]
+        self.lon = lon[order]
+
+    def __len__(self) -> int:
+        return int(self.pos.size)
+
+    def nearest(self, lat: float, lon: float, k: int = 3, allowed: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """أقرب k نقطة: (positions الأصلية، المسافة كم) مرتبة تصاعدياً. allowed = mask على النقاط الأصلية."""
+        pos, la, lo = self.pos, self.lat, self.lon
+        if allowed is not None:
+            keep = np.asarray(allowed, dtype=bool)[pos]
+            pos, la, lo = pos[keep], la[keep], lo[keep]
+        if pos.size == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        d = haversine_km(lat, lon, la, lo)
+        if d.size > k:
+            top = np.argpartition(d, k - 1)[:k]
+        else:
+            top = np.arange(d.size)
+        top = top[np.lexsort((pos[top], d[top]))]
+        return pos[top], d[top]
+
+    def within(self, lat: float, lon: float, radius_km: float, allowed: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """كل النقاط خلال radius_km: (positions، المسافة) مرتبة تصاعدياً."""
+        # شريط خط العرض: أي نقطة خلال R لازم تكون خلال R/6371 radian شمال/جنوب
+        dlat = np.degrees(radius_km / EARTH_RADIUS_KM)
+        lo_i = np.searchsorted(self.lat, lat - dlat, side="left")
+        hi_i = np.searchsorted(self.lat, lat + dlat, side="right")
+        pos, la, lo = self.pos[lo_i:hi_i], self.lat[lo_i:hi_i], self.lon[lo_i:hi_i]
+        if allowed is not None:
+            keep = np.asarray(allowed, dtype=bool)[pos]
+            pos, la, lo = pos[keep], la[keep], lo[keep]
+        d = haversine_km(lat, lon, la, lo)
+        hit = d <= radius_km
+        pos, d = pos[hit], d[hit]
+        order = np.lexsort((pos, d))
+        return pos[order], d[order]
+
+
+# ----------------------------
+# Queries on the catalog
+# ----------------------------
+def city_location(catalog: Catalog, country: str, city: str) -> tuple[float, float] | None:
+    return catalog.city_coords.get(city_key(country, city))
+
+
+def nearest_centers(catalog: Catalog, country: str, city: str, tests=TEST_TYPES, k: int = 3) -> pd.DataFrame:
+    """أقرب k مراكز لكل نوع اختبار من المدينة (مع distance_km). فاضي إذا المدينة ما لها إحداثيات."""
+    loc = city_location(catalog, country, city)
+    centers = catalog.test_centers
+    if loc is None or centers.empty:
+        return centers.head(0).assign(distance_km=pd.Series(dtype=float))
+    test_type = centers["test_type"].str.upper().to_numpy()
+    parts = []
+    for t in tests:
+        pos, dist = catalog.center_index.nearest(*loc, k=k, allowed=test_type == t.upper())
+        parts.append(centers.iloc[pos].assign(distance_km=dist.round(1)))
+    return pd.concat(parts) if parts else centers.head(0)
+
+
+def universities_within(catalog: Catalog, country: str, city: str, radius_km: float) -> pd.DataFrame:
+    """الجامعات خلال radius_km من المدينة، الأقرب أول (مع distance_km)."""
+    loc = city_location(catalog, country, city)
+    if loc is None:
+        return catalog.unis.head(0).assign(distance_km=pd.Series(dtype=float))
+    pos, dist = catalog.uni_geo_index.within(*loc, radius_km)
+    return catalog.unis.iloc[pos].assign(distance_km=dist.round(1))
@@ -0,0 +1,303 @@
+"""
+طلب الطالب بالكلام الحر ("أبي بكالوريوس في علوم الحاسب في الإمارات بالإنجليزي") -> فلاتر.
+
+المسار السريع بدون LLM: قاموس (gazetteer) مبني من قيم الفلاتر في الكتالوج (FacetDictionary)
++ أسماء عربية/إنجليزية بديلة، ومطابقة عبارات على كلمات النص بعد التوحيد
+("بالإنجليزية" = ب + ال + انجليزيه). الأطول يغلب ("علوم الحاسب" قبل "علوم").
+الثقة = نسبة الكلمات المفيدة اللي انفهمت؛ إذا قليلة (أو فيه تعارض) نسأل الـ LLM يكمل الناقص.
+"""
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+from src.core.facets import FacetDictionary
+from src.core.textnorm import normalize_text
+
+FILTER_FIELDS = ["country", "city", "level", "major_field", "language", "scholarship"]
+SCHOLARSHIP_VALUES = ("Yes", "No")
+
+# أقل ثقة نعتمد فيها على القواعد بروحها
+CONFIDENCE_MIN = 0.6
+
+# أسماء بديلة -> قيمة الفلتر. تنضاف للقاموس بس إذا القيمة موجودة في الكتالوج
+COUNTRY_ALIASES = {
+    "Qatar": ["قطر"],
+    "Saudi Arabia": ["السعودية", "المملكة العربية السعودية", "saudi", "ksa"],
+    "UAE": ["الإمارات", "الامارات العربية المتحدة", "emirates", "united arab emirates"],
+    "Kuwait": ["الكويت"],
+    "Bahrain": ["البحرين"],
+    "Oman": ["عمان", "سلطنة عمان"],
+}
+CITY_ALIASES = {
+    "Doha": ["الدوحة"],
+    "Lusail": ["لوسيل"],
+    "Dubai": ["دبي"],
+    "Abu Dhabi": ["أبوظبي", "أبو ظبي", "abudhabi"],
+    "Sharjah": ["الشارقة"],
+    "Al Ain": ["العين"],
+    "Ras Al Khaimah": ["رأس الخيمة", "rak"],
+    "Riyadh": ["الرياض"],
+    "Jeddah": ["جدة", "jeddah", "jidda"],
+    "Dammam": ["الدمام"],
+    "Dhahran": ["الظهران"],
+    "Makkah": ["مكة", "مكة المكرمة", "mecca"],
+    "Madinah": ["المدينة المنورة", "medina"],
+    "Manama": ["المنامة"],
+    "Isa Town": ["مدينة عيسى"],
+    "Sakhir": ["الصخير"],
+    "Muscat": ["مسقط"],
+    "Kuwait City": ["مدينة الكويت"],
+    "Salmiya": ["السالمية"],
+    "Mishref": ["مشرف"],
+    "Egaila": ["العقيلة"],
+}
+LEVEL_ALIASES = {
+    "Bachelor": ["بكالوريوس", "بكلوريوس", "بكالوريس", "bachelors", "undergraduate", "bsc", "ba"],
+    "Master": ["ماجستير", "ماستر", "masters", "msc", "postgraduate"],
+    "PhD": ["دكتوراه", "دكتوراة", "doctorate"],
+    "Diploma": ["دبلوم"],
+}
+MAJOR_ALIASES = {
+    "Computer Science": ["علوم الحاسب", "علوم الحاسوب", "علوم الكمبيوتر", "حاسب آلي", "علوم حاسب", "cs"],
+    "Artificial Intelligence": ["الذكاء الاصطناعي", "ai"],
+    "Cybersecurity": ["الأمن السيبراني", "أمن المعلومات", "cyber security"],
+    "Data Science": ["علم البيانات", "علوم البيانات"],
+    "Information Technology": ["تقنية المعلومات", "تكنولوجيا المعلومات"],
+    "Engineering": ["هندسة"],
+    "Business Administration": ["إدارة الأعمال", "إدارة أعمال", "mba"],
+    "Business": ["بزنس", "الأعمال"],
+    "Economics": ["اقتصاد", "economy"],
+    "Education": ["تربية", "التعليم"],
+    "Health Sciences": ["العلوم الصحية", "علوم صحية"],
+    "Medicine": ["طب", "الطب البشري", "medical"],
+    "Pharmacy": ["صيدلة"],
+}
+LANGUAGE_ALIASES = {
+    "English": ["الإنجليزية", "الإنجليزي", "انجليزي", "الانقليزي", "انقليزي"],
+    "Arabic": ["العربية", "العربي", "عربي"],
+    "Arabic/English": ["ثنائي اللغة", "bilingual"],
+}
+SCHOLARSHIP_ALIASES = {
+    "Yes": ["منحة", "منح", "منحه دراسية", "ابتعاث", "مبتعث", "scholarship", "scholarships", "funded", "funding"],
+    "No": ["بدون منحة", "بدون منح", "على حسابي", "على حسابي الخاص", "self funded", "no scholarship"],
+}
+
+# كلمات ما تغيّر الفلاتر (ما تنحسب ضد الثقة)
+STOPWORDS = {
+    "ابي", "ابغي", "ابغى", "ودي", "اريد", "احب", "ابحث", "عن", "في", "من", "على", "الى", "او", "و", "مع",
+    "جامعه", "جامعات", "برنامج", "برامج", "تخصص", "دراسه", "ادرس", "لغه", "دوله", "شي", "اي", "يكون",
+    "درجه", "شهاده", "بلد", "مدينه", "اللي", "فيها", "فيه", "وين",
+    "i", "want", "a", "an", "the", "in", "at", "of", "for", "to", "with", "and", "or", "study", "studying",
+    "university", "universities", "program", "programs", "programme", "degree", "language", "taught",
+    "please", "me", "my", "looking", "need", "like", "would", "some", "any", "country", "city", "is",
+}
+
+_WORD = re.compile(r"\w+")
+# أدوات لاصقة في أول الكلمة: "وال/بال/فال/كال/لل/ال" ثم حرف واحد (و/ب/ل/ف/ك)
+_DEFINITE = ("وال", "بال", "فال", "كال", "لل", "ال")
+_PROCLITICS = "وبلفك"
+
+
+def _strip_definite(tok: str) -> str:
+    for p in _DEFINITE:
+        if tok.startswith(p) and len(tok) - len(p) >= 2:
+            return tok[len(p):]
+    return tok
+
+
+def token_forms(tok: str) -> frozenset[str]:
+    """أشكال الكلمة المحتملة بعد شيل الأدوات اللاصقة ("بقطر" -> قطر، "والامارات" -> امارات)."""
+    forms = {tok, _strip_definite(tok)}
+    if tok[:1] in _PROCLITICS and len(tok) > 3:
+        forms.add(tok[1:])
+        forms.add(_strip_definite(tok[1:]))
+    return frozenset(forms)
+
+
+def phrase_tokens(phrase: str) -> tuple[str, ...]:
+    """عبارة القاموس بشكل ثابت: بعد التوحيد وبدون "ال"."""
+    return tuple(_strip_definite(t) for t in _WORD.findall(normalize_text(phrase)))
+
+
+class RequestFilters(BaseModel):
+    """فلاتر طلب الطالب. "All" = ما انذكر. matched: الحقل -> العبارة اللي انفهمت منه."""
+    model_config = ConfigDict(frozen=True)
+
+    country: str = "All"
+    city: str = "All"
+    level: str = "All"
+    major_field: str = "All"
+    language: str = "All"
+    scholarship: str = "All"
+    confidence: float = 0.0
+    source: str = "rules"
+    matched: dict[str, str] = {}
+
+    def values(self) -> dict[str, str]:
+        return {f: getattr(self, f) for f in FILTER_FIELDS}
+
+    def known(self) -> dict[str, str]:
+        return {f: v for f, v in self.values().items() if v != "All"}
+
+
+@dataclass(frozen=True)
+class Gazetteer:
+    """عبارات القاموس مرتبة (الأطول أول): (tokens، الحقل، القيمة)."""
+    phrases: tuple[tuple[tuple[str, ...], str, str], ...]
+    allowed: dict
+    city_country: dict
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+
+def build_gazetteer(facets: FacetDictionary) -> Gazetteer:
+    allowed = {
+        "country": set(facets.countries),
+        "city": set(facets.cities),
+        "level": set(facets.levels),
+        "major_field": set(facets.majors),
+        "language": set(facets.languages),
+        "scholarship": set(SCHOLARSHIP_VALUES),
+    }
+    aliases = {
+        "country": COUNTRY_ALIASES,
+        "city": CITY_ALIASES,
+        "level": LEVEL_ALIASES,
+        "major_field": MAJOR_ALIASES,
+        "language": LANGUAGE_ALIASES,
+        "scholarship": SCHOLARSHIP_ALIASES,
+    }
+    seen: dict[tuple[str, ...], tuple[str, str]] = {}
+    # أول اللي ياخذ العبارة يغلب: القيم نفسها، بعدين الأسماء البديلة،
+    # وآخر شي أجزاء القيم المركبة ("Abu Dhabi / Dubai" -> "dubai" إذا ما لها قيمة خاصة)
+    for f in FILTER_FIELDS:
+        for value in sorted(allowed[f]) if f != "scholarship" else ():
+            toks = phrase_tokens(value)
+            if toks:
+                seen.setdefault(toks, (f, value))
+    for f in FILTER_FIELDS:
+        for value, names in aliases[f].items():
+            if value not in allowed[f]:
+                continue
+            for name in names:
+                toks = phrase_tokens(name)
+                if toks:
+                    seen.setdefault(toks, (f, value))
+    for f in FILTER_FIELDS:
+        for value in sorted(v for v in allowed[f] if "/" in v):
+            for part in re.split(r"\s*/\s*", value):
+                toks = phrase_tokens(part)
+                if toks:
+                    seen.setdefault(toks, (f, value))
+
+    phrases = sorted(((toks, f, v) for toks, (f, v) in seen.items()), key=lambda p: (-len(p[0]), p[0]))
+    # مدينة اسمها موجود في أكثر من دولة ما تحدد الدولة
+    owners: dict[str, set[str]] = {}
+    for country, cities in facets.cities_by_country.items():
+        for city in cities:
+            owners.setdefault(city, set()).add(country)
+    city_country = {city: next(iter(cs)) for city, cs in owners.items() if len(cs) == 1}
+    return Gazetteer(tuple(phrases), {f: frozenset(v) for f, v in allowed.items()}, city_country)
+
+
+# ----------------------------
+# Rules
+# ----------------------------
+def parse_request(text: str, gaz: Gazetteer) -> RequestFilters:
+    """المسار السريع: مطابقة القاموس على النص. الحقل اللي انذكر له قيمتين مختلفتين يبقى "All"."""
+    words = _WORD.findall(normalize_text(text))
+    if not words:
+        return RequestFilters()
+    forms = [token_forms(w) for w in words]
+    covered = [False] * len(words)
+    found: dict[str, dict[str, str]] = {}
+
+    present = frozenset().union(*forms)
+    for toks, f, value in gaz.phrases:
+        if toks[0] not in present:
+            continue
+        n = len(toks)
+        for i in range(len(words) - n + 1):
+            if any(covered[i:i + n]):
+                continue
+            if all(toks[j] in forms[i + j] for j in range(n)):
+                covered[i:i + n] = [True] * n
+                found.setdefault(f, {}).setdefault(value, " ".join(words[i:i + n]))
+
+    out: dict[str, str] = {}
+    matched: dict[str, str] = {}
+    conflicts = 0
+    for f, values in found.items():
+        if len(values) == 1:
+            (value, phrase), = values.items()
+            out[f] = value
+            matched[f] = phrase
+        else:
+            conflicts += 1
+
+    # المدينة تحدد الدولة إذا ما انذكرت
+    if "city" in out and "country" not in out and out["city"] in gaz.city_country:
+        out["country"] = gaz.city_country[out["city"]]
+
+    content = [c for c, w, fs in zip(covered, words, forms) if c or not (fs & STOPWORDS or w.isdigit())]
+    confidence = (sum(content) / len(content)) if content and matched else 0.0
+    if conflicts:
+        confidence *= 0.5
+    return RequestFilters(**out, confidence=round(confidence, 3), matched=matched)
+
+
+# ----------------------------
+# LLM fallback
+# ----------------------------
+SYSTEM_PROMPT = (
+    "You extract search filters for a Gulf university catalog from a student's request "
+    "(Arabic or English). Reply with one JSON object only, keys: "
+    "country, city, level, major_field, language, scholarship. "
+    "Use exactly one of the allowed values for each key, or \"All\" when the request does not say."
+)
+
+
+def _llm_prompt(text: str, gaz: Gazetteer) -> str:
+    allowed = {f: sorted(gaz.allowed[f]) for f in FILTER_FIELDS}
+    return f"Allowed values:\n{json.dumps(allowed, ensure_ascii=False)}\n\nRequest:\n{text.strip()}"
+
+
+def _parse_llm(reply: str, gaz: Gazetteer) -> dict[str, str]:
+    """رد الـ LLM -> قيم صالحة بس (أي قيمة برا القاموس تنشال)."""
+    m = re.search(r"\{.*\}", reply, re.DOTALL)
+    if not m:
+        return {}
+    try:
+        data = RequestFilters.model_validate({k: str(v) for k, v in json.loads(m.group()).items() if k in FILTER_FIELDS})
+    except (ValueError, ValidationError):
+        return {}
+    return {f: v for f, v in data.known().items() if v in gaz.allowed[f]}
+
+
+def extract_filters(text: str, gaz: Gazetteer, client=None, threshold: float = CONFIDENCE_MIN) -> RequestFilters:
+    """
+    القواعد أول؛ الـ LLM (client من src.core.llm) ينسأل بس إذا الثقة أقل من threshold،
+    ويكمل الحقول اللي القواعد ما فهمتها (اللي فهمتها القواعد تبقى).
+    """
+    rules = parse_request(text, gaz)
+    if client is None or rules.confidence >= threshold or not str(text).strip():
+        return rules
+    try:
+        reply = client.complete(_llm_prompt(text, gaz), system=SYSTEM_PROMPT, temperature=0).text
+    except Exception:
+        # الـ LLM مو متوفر/طاح: نرجع اللي فهمناه محلياً
+        return rules
+    extra = {f: v for f, v in _parse_llm(reply, gaz).items() if rules.values()[f] == "All"}
+    if not extra:
+        return rules
+    return rules.model_copy(update={**extra, "source": "llm"})
+
+
+def apply_filters(selected: dict[str, str], filters: RequestFilters) -> dict[str, str]:
+    """اختيارات الـ selectbox تغلب؛ النص يعبّي بس اللي تركه الطالب "All"."""
+    return {f: (v if v != "All" else filters.values().get(f, "All")) for f, v in selected.items()}
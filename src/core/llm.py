@@ -1 +1,412 @@
+"""
+طبقة الـ LLM لرُشد: client واحد فوق backend قابل للتبديل + كاش للردود.
 
+المفتاح = sha256 لـ (backend, model, messages, params) بصيغة JSON ثابتة (content-addressed)،
+فنفس السؤال بنفس الإعدادات ما يروح للـ API مرتين: يرجع من SQLite على القرص بدون انتظار.
+- OpenAIBackend: مكتبة openai (OPENAI_API_KEY)
+- StubBackend: محلي بدون شبكة (للتطوير والاختبار)، رد ثابت أو دالة + تأخير اختياري
+كل رد يرجع معه زمنه (ms) وعدد التوكنز، والـ client يجمعهم في stats().
+astream: نفس الشي بس الرد يوصل قطع أول بأول (async)، والرد الكامل بس يتخزن في الكاش.
+get_client() يلف الطلبات بـ SingleFlight + TokenBucket (src.core.throttle) للزحمة.
+
+    LLM_BACKEND=stub|openai   (الافتراضي: openai إذا فيه مفتاح، وإلا ما فيه LLM: llm_available() = False
+                               والواجهة تكتفي بالقواعد؛ get_client() وقتها يرجع stub)
+    LLM_MODEL=gpt-4o-mini
+    LLM_RATE=2  LLM_BURST=5  LLM_MAX_QUEUE=50   (طلبات بالثانية للـ API)
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Callable
+
+from dotenv import load_dotenv
+
+from src.core.throttle import SingleFlight, StreamFlight, TokenBucket
+
+ROOT = Path(__file__).resolve().parents[2]
+CACHE_PATH = ROOT / "data" / ".llm_cache" / "responses.sqlite"
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+Messages = list[dict[str, str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """تقدير محلي لعدد التوكنز (~4 حروف إنجليزي للتوكن، العربي أثقل: ~2.5)."""
+    text = str(text)
+    if not text:
+        return 0
+    arabic = sum(1 for ch in text if "\u0600" <= ch <= "\u06ff")
+    return math.ceil(arabic / 2.5 + (len(text) - arabic) / 4)
+
+
+def as_messages(prompt: str | Messages, system: str = "") -> Messages:
+    if isinstance(prompt, str):
+        msgs = [{"role": "user", "content": prompt}]
+    else:
+        msgs = [{"role": str(m["role"]), "content": str(m["content"])} for m in prompt]
+    if system:
+        msgs = [{"role": "system", "content": system}, *msgs]
+    return msgs
+
+
+def request_key(model: str, messages: Messages, params: dict, backend: str = "") -> str:
+    """
+    hash ثابت للطلب: نفس المحتوى = نفس المفتاح بغض النظر عن ترتيب الـ params.
+    backend (هوية الـ backend + base_url) جزء من المفتاح: رد الـ stub أو خادم تجربة ما ينرد كأنه من الـ API.
+    """
+    payload = json.dumps({"backend": backend, "model": model, "messages": messages, "params": params},
+                         ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class Completion:
+    """رد الـ backend الخام."""
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+
+
+@dataclass(frozen=True)
+class LLMResponse:
+    key: str
+    model: str
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency_ms: float
+    cached: bool = False
+
+
+# ----------------------------
+# Backends
+# ----------------------------
+class StubBackend:
+    """
+    بدون شبكة: reply نص ثابت أو دالة (messages -> نص). الافتراضي يرجع آخر رسالة للمستخدم.
+    delay (ثواني) يحاكي زمن الـ API، وchunk_delay بين كل كلمة في astream.
+    calls = عدد الطلبات اللي وصلته فعلاً.
+    """
+
+    def __init__(self, reply: str | Callable[[Messages], str] | None = None, delay: float = 0.0,
+                 chunk_delay: float = 0.0):
+        self.reply = reply
+        self.delay = delay
+        self.chunk_delay = chunk_delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def identity(self) -> str:
+        return "stub"
+
+    def _text(self, messages: Messages) -> str:
+        if callable(self.reply):
+            return str(self.reply(messages))
+        if self.reply is not None:
+            return str(self.reply)
+        last = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        return f"[stub] {last[:200]}"
+
+    def complete(self, model: str, messages: Messages, **params) -> Completion:
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        text = self._text(messages)
+        return Completion(text, sum(estimate_tokens(m["content"]) for m in messages), estimate_tokens(text))
+
+    async def astream(self, model: str, messages: Messages, **params) -> AsyncIterator[str]:
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        for piece in re.findall(r"\S+\s*", self._text(messages)):
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            yield piece
+
+
+class OpenAIBackend:
+    def __init__(self, api_key: str | None = None, timeout: float = 30.0, base_url: str | None = None):
+        from openai import OpenAI
+
+        self._api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self._timeout = timeout
+        # base_url: خادم متوافق مع OpenAI (مثلاً src.core.fakellm للاختبار)
+        self._base_url = base_url or os.getenv("OPENAI_BASE_URL") or None
+        self._client = OpenAI(api_key=self._api_key, timeout=timeout, base_url=self._base_url)
+
+    @property
+    def identity(self) -> str:
+        return f"openai:{self._base_url or 'default'}"
+
+    def complete(self, model: str, messages: Messages, **params) -> Completion:
+        resp = self._client.chat.completions.create(model=model, messages=messages, **params)
+        text = resp.choices[0].message.content or ""
+        usage = resp.usage
+        if usage is None:
+            return Completion(text, sum(estimate_tokens(m["content"]) for m in messages), estimate_tokens(text))
+        return Completion(text, int(usage.prompt_tokens), int(usage.completion_tokens))
+
+    async def astream(self, model: str, messages: Messages, **params) -> AsyncIterator[str]:
+        from openai import AsyncOpenAI
+
+        # client لكل stream: asyncio.run يسكر الـ loop بعد كل دفعة شروحات
+        async with AsyncOpenAI(api_key=self._api_key, timeout=self._timeout, base_url=self._base_url) as client:
+            stream = await client.chat.completions.create(model=model, messages=messages, stream=True, **params)
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+
+# ----------------------------
+# Response store
+# ----------------------------
+class ResponseStore:
+    """كاش الردود في SQLite (path=":memory:" للتجارب). آمن بين الـ threads."""
+
+    def __init__(self, path: Path | str = CACHE_PATH):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    prompt_tokens INTEGER NOT NULL,
+                    completion_tokens INTEGER NOT NULL,
+                    latency_ms REAL NOT NULL,
+                    created REAL NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> LLMResponse | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT model, text, prompt_tokens, completion_tokens, latency_ms FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        return LLMResponse(key, row[0], row[1], int(row[2]), int(row[3]), float(row[4]), cached=True)
+
+    def put(self, resp: LLMResponse) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (resp.key, resp.model, resp.text, resp.prompt_tokens, resp.completion_tokens,
+                 resp.latency_ms, time.time()),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0])
+
+
+# ----------------------------
+# Client
+# ----------------------------
+class LLMClient:
+    def __init__(self, backend, model: str = DEFAULT_MODEL, store: ResponseStore | None = None,
+                 flight: SingleFlight | None = None, limiter: TokenBucket | None = None):
+        self.backend = backend
+        self.model = model
+        self.store = store
+        self.flight = flight
+        # مع flight: الـ streams المتطابقة بعد تتجمع (stream واحد للـ API)
+        self.streams = StreamFlight() if flight is not None else None
+        self.limiter = limiter
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.cache_hits = 0
+        self.deduped = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency_ms = 0.0
+
+    @property
+    def backend_id(self) -> str:
+        return str(getattr(self.backend, "identity", type(self.backend).__name__))
+
+    def _key(self, model: str, messages: Messages, params: dict) -> str:
+        return request_key(model, messages, params, self.backend_id)
+
+    def key(self, prompt: str | Messages, system: str = "", model: str | None = None, **params) -> str:
+        return self._key(model or self.model, as_messages(prompt, system), params)
+
+    def cached(self, key: str) -> LLMResponse | None:
+        if self.store is None:
+            return None
+        hit = self.store.get(key)
+        if hit is not None:
+            with self._lock:
+                self.cache_hits += 1
+        return hit
+
+    def _call(self, key: str, model: str, messages: Messages, params: dict) -> LLMResponse:
+        if self.limiter is not None:
+            self.limiter.acquire()
+        t0 = time.perf_counter()
+        out = self.backend.complete(model, messages, **params)
+        ms = (time.perf_counter() - t0) * 1000
+        return self._record(LLMResponse(key, model, out.text, out.prompt_tokens, out.completion_tokens, round(ms, 2)))
+
+    def _record(self, resp: LLMResponse) -> LLMResponse:
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += resp.prompt_tokens
+            self.completion_tokens += resp.completion_tokens
+            self.latency_ms += resp.latency_ms
+        if self.store is not None:
+            self.store.put(resp)
+        return resp
+
+    def complete(self, prompt: str | Messages, system: str = "", model: str | None = None, **params) -> LLMResponse:
+        """رد واحد: من الكاش إذا نفس الطلب انسأل قبل، وإلا من الـ backend (ويتخزن)."""
+        model = model or self.model
+        messages = as_messages(prompt, system)
+        key = self._key(model, messages, params)
+        return self._resolve(key, model, messages, params)
+
+    def _resolve(self, key: str, model: str, messages: Messages, params: dict) -> LLMResponse:
+        hit = self.cached(key)
+        if hit is not None:
+            return hit
+        if self.flight is None:
+            return self._call(key, model, messages, params)
+        # نفس الطلب من كذا جلسة في نفس اللحظة: واحد يروح للـ API والباقي ياخذون رده.
+        # اللي يصير leader يشيك الكاش مرة ثانية (يمكن اللي قبله توه خزن)
+        resp, _ = self.flight.do(key, lambda: self.cached(key) or self._call(key, model, messages, params))
+        return resp
+
+    def complete_many(self, prompts: list[str | Messages], system: str = "", model: str | None = None,
+                      **params) -> list[LLMResponse]:
+        """نفس complete لقائمة، والطلبات المكررة داخل القائمة تنرسل مرة وحدة."""
+        model = model or self.model
+        out: dict[str, LLMResponse] = {}
+        keys = []
+        for prompt in prompts:
+            messages = as_messages(prompt, system)
+            key = self._key(model, messages, params)
+            keys.append(key)
+            if key in out:
+                with self._lock:
+                    self.deduped += 1
+                continue
+            out[key] = self._resolve(key, model, messages, params)
+        return [out[k] for k in keys]
+
+    async def astream(self, prompt: str | Messages, system: str = "", model: str | None = None,
+                      **params) -> AsyncIterator[str]:
+        """
+        الرد قطع أول بأول. من الكاش = قطعة وحدة فوراً.
+        الرد يتخزن بس إذا وصل كامل (اللي انلغى بـ timeout/cancel ما يتخزن). التوكنز تقدير محلي.
+        """
+        model = model or self.model
+        messages = as_messages(prompt, system)
+        key = self._key(model, messages, params)
+        hit = self.cached(key)
+        if hit is not None:
+            yield hit.text
+            return
+        if self.streams is None:
+            stream = self._stream(key, model, messages, params)
+        else:
+            stream = self.streams.stream(key, lambda: self._stream(key, model, messages, params))
+        async for piece in stream:
+            yield piece
+
+    async def _stream(self, key: str, model: str, messages: Messages, params: dict) -> AsyncIterator[str]:
+        if self.limiter is not None:
+            await asyncio.to_thread(self.limiter.acquire)
+        t0 = time.perf_counter()
+        parts = []
+        async for piece in self.backend.astream(model, messages, **params):
+            parts.append(piece)
+            yield piece
+        text = "".join(parts)
+        ms = (time.perf_counter() - t0) * 1000
+        self._record(LLMResponse(key, model, text, sum(estimate_tokens(m["content"]) for m in messages),
+                                 estimate_tokens(text), round(ms, 2)))
+
+    def stats(self) -> dict[str, float]:
+        extra = {}
+        if self.flight is not None:
+            extra.update({f"flight_{k}": v for k, v in self.flight.stats().items()})
+        if self.streams is not None:
+            extra.update({f"stream_{k}": v for k, v in self.streams.stats().items()})
+        if self.limiter is not None:
+            extra.update({f"limiter_{k}": v for k, v in self.limiter.stats().items()})
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "cache_hits": self.cache_hits,
+                "deduped": self.deduped,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "latency_ms_total": round(self.latency_ms, 2),
+                "latency_ms_avg": round(self.latency_ms / self.calls, 2) if self.calls else 0.0,
+                **extra,
+            }
+
+
+def _backend_name() -> str:
+    load_dotenv()
+    name = os.getenv("LLM_BACKEND", "").strip().lower()
+    if name in ("stub", "openai"):
+        return name
+    return "openai" if os.getenv("OPENAI_API_KEY") else ""
+
+
+def llm_available() -> bool:
+    """فيه LLM مضبوط (مفتاح، أو LLM_BACKEND=stub صريح للتطوير)؛ وإلا الواجهة تكتفي بالقواعد."""
+    return _backend_name() != ""
+
+
+def _default_backend():
+    return OpenAIBackend() if _backend_name() == "openai" else StubBackend()
+
+
+_CLIENT: LLMClient | None = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> LLMClient:
+    """client واحد لكل الـ process (الكاش على القرص مشترك بين كل الجلسات)."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            limiter = TokenBucket(
+                rate=float(os.getenv("LLM_RATE", "2")),
+                capacity=float(os.getenv("LLM_BURST", "5")),
+                max_queue=int(os.getenv("LLM_MAX_QUEUE", "50")),
+            )
+            _CLIENT = LLMClient(_default_backend(), os.getenv("LLM_MODEL", DEFAULT_MODEL), ResponseStore(),
+                                flight=SingleFlight(), limiter=limiter)
+        return _CLIENT
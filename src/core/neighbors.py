@@ -0,0 +1,372 @@
+"""
+جدول "قد يعجبك أيضاً": أقرب N برنامج لكل برنامج، وأقرب N جامعة لكل جامعة — محسوبة مسبقاً.
+
+- كل عنصر = مجموعة خصائص (tokens لكل خاصية)، والتشابه = مجموع أوزان cosine لكل خاصية (0..1):
+  البرنامج: التخصص (مع كلمات موضوعه، فـ CS قريب من IT) / المستوى / الدرجة / اللغة / الدولة / المدينة / المتطلبات
+  الجامعة: التخصصات والمستويات اللي تقدمها / الدولة / المدينة / النوع
+- العناصر بنفس الخصائص = توقيع واحد، فالحساب توقيع × توقيع (مو برنامج × برنامج)
+- برامج نفس الجامعة ما تنحسب جيران لبعض (الفكرة بدائل في جامعات ثانية)، وكل جامعة ثانية بحد أقصى MAX_PER_GROUP
+- التخزين: data/.neighbors/<name>/ ids.npy + keys.npy + nbr.npy (int32، n × N مواقع الجيران) + score.npy
+  والقراءة memmap + dict id -> صف = O(1) لكل عنصر
+- البناء تزايدي: نعيد حساب الصف بس إذا تغيرت خصائصه، أو انحذف/تغير واحد من جيرانه،
+  أو عنصر جديد/متغير ممكن يدخل قائمته (تشابهه معه >= آخر جار محفوظ)
+
+    python -m src.core.neighbors          # يبني/يحدث الجدولين من data/*.csv
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.core.semantic import MAJOR_TOPICS
+
+TOP_N = 10
+# تحت هالتشابه ما نقترح (ما بينهم شي مشترك يستاهل)
+MIN_SCORE = 0.3
+# أكثر عدد جيران من نفس المجموعة (نفس الجامعة) في القائمة، عشان البدائل تتنوع
+MAX_PER_GROUP = 2
+REBUILD_FRACTION = 0.3
+# التشابه يتقرب لهالعدد من الخانات: ترتيب التعادل (بالـ id) ما يتأثر بفروق float بين بناء وبناء
+DECIMALS = 4
+FORMAT_VERSION = 1
+
+# (الخاصية، الوزن)
+PROG_FEATURES = [
+    ("major", 4.0), ("level", 2.0), ("degree_type", 1.0), ("language", 1.0),
+    ("country", 1.0), ("city", 0.5), ("english_test", 0.5), ("math_level", 0.5),
+]
+UNI_FEATURES = [("majors", 3.0), ("levels", 1.0), ("country", 1.5), ("city", 0.5), ("type", 0.5)]
+
+
+@dataclass(frozen=True)
+class Items:
+    """
+    العناصر بترتيب جدولها في الكتالوج: id، مجموعة (ما يصيرون جيران لبعض)،
+    ولكل خاصية: كود لكل عنصر + tokens كل قيمة فريدة (الشغل على القيم الفريدة، مو الصفوف).
+    """
+    ids: np.ndarray
+    groups: np.ndarray
+    codes: dict[str, np.ndarray]
+    values: dict[str, list[tuple[str, ...]]]
+    weights: dict[str, float]
+
+    def signatures(self) -> tuple[np.ndarray, np.ndarray, list[str]]:
+        """(توقيع كل عنصر، أول عنصر لكل توقيع، نص ثابت لكل توقيع)."""
+        names = list(self.weights)
+        if not len(self.ids):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), []
+        mat = np.stack([self.codes[name] for name in names], axis=1)
+        # أكواد الخصائص -> كود واحد لكل تركيبة (factorize بعد كل خاصية عشان الرقم يظل صغير)
+        sig = np.zeros(len(self.ids), dtype=np.int64)
+        for j, name in enumerate(names):
+            sig = pd.factorize(sig * (len(self.values[name]) + 1) + mat[:, j])[0]
+        first = pd.Series(sig).drop_duplicates().index.to_numpy()
+        texts = [
+            "|".join(f"{name}=" + ",".join(self.values[name][mat[i, j]]) for j, name in enumerate(names))
+            for i in first.tolist()
+        ]
+        return sig.astype(np.int64), first, texts
+
+    def keys(self) -> np.ndarray:
+        """مفتاح التغيير لكل عنصر: hash (نص خصائصه + مجموعته)، محسوب لكل زوج فريد."""
+        sig, _, texts = self.signatures()
+        group, groups = pd.factorize(pd.Series(self.groups, dtype=object))
+        stride = max(len(groups), 1)
+        pair, uniq = pd.factorize(sig * stride + group)
+        keys = [_key(texts[v // stride], str(groups[v % stride])) for v in uniq.tolist()]
+        return np.array(keys, dtype="U16")[pair]
+
+
+def _feature(s: pd.Series, tokens=None) -> tuple[np.ndarray, list[tuple[str, ...]]]:
+    """كود لكل صف + tokens لكل قيمة فريدة (الافتراضي: القيمة نفسها، والفاضي = بدون tokens)."""
+    codes, uniq = pd.factorize(s.astype(str).str.strip())
+    tokens = tokens or (lambda v: (v,) if v else ())
+    return codes.astype(np.int64), [tuple(tokens(str(v))) for v in uniq]
+
+
+def major_tokens(major: str) -> tuple[str, ...]:
+    m = str(major).strip()
+    return tuple(sorted({m, *MAJOR_TOPICS.get(m, [])})) if m else ()
+
+
+def _items(ids: pd.Series, groups: pd.Series, features: dict[str, tuple[np.ndarray, list]], weights: list) -> Items:
+    return Items(
+        ids=ids.astype(str).to_numpy(dtype=str),
+        groups=groups.astype(str).to_numpy(dtype=str),
+        codes={name: f[0] for name, f in features.items()},
+        values={name: f[1] for name, f in features.items()},
+        weights=dict(weights),
+    )
+
+
+def program_items(progs_joined: pd.DataFrame) -> Items:
+    p = progs_joined
+    empty = pd.Series("", index=p.index)
+    features = {
+        "major": _feature(p["major_field"], major_tokens),
+        "level": _feature(p["level"]),
+        "degree_type": _feature(p["degree_type"]),
+        "language": _feature(p["language"]),
+        "country": _feature(p["country"]),
+        "city": _feature(p["city"]),
+        "english_test": _feature(p["req_test"] if "req_test" in p.columns else empty),
+        "math_level": _feature(p["req_math_level"] if "req_math_level" in p.columns else empty),
+    }
+    return _items(p["program_id"], p["uni_id"], features, PROG_FEATURES)
+
+
+def university_items(unis: pd.DataFrame, progs: pd.DataFrame) -> Items:
+    def offered(col: str) -> pd.Series:
+        pairs = progs[["uni_id", col]].astype(str).drop_duplicates()
+        pairs = pairs[pairs[col].str.strip() != ""].sort_values(col)
+        joined = pairs.groupby("uni_id", sort=False)[col].agg("\x00".join)
+        return unis["uni_id"].astype(str).map(joined).fillna("")
+
+    def split(v: str) -> tuple[str, ...]:
+        return tuple(v.split("\x00")) if v else ()
+
+    features = {
+        "majors": _feature(offered("major_field"), split),
+        "levels": _feature(offered("level"), split),
+        "country": _feature(unis["country"]),
+        "city": _feature(unis["city"]),
+        "type": _feature(unis["type"]),
+    }
+    # الجامعة مجموعة نفسها: بس نستثني نفسها
+    return _items(unis["uni_id"], unis["uni_id"], features, UNI_FEATURES)
+
+
+def signature_vectors(items: Items, first: np.ndarray) -> np.ndarray:
+    """
+    متجه لكل توقيع (أول عنصر فيه = first) بحيث dot = التشابه:
+    كل خاصية one-hot على tokens مقسومة على الجذر (cosine) ومضروبة في sqrt(وزنها / مجموع الأوزان).
+    """
+    total = sum(items.weights.values()) or 1.0
+    blocks = []
+    for name, w in items.weights.items():
+        sets = [items.values[name][c] for c in items.codes[name][first]]
+        vocab = {t: j for j, t in enumerate(sorted({t for s in sets for t in s}))}
+        block = np.zeros((len(sets), max(len(vocab), 1)), dtype=np.float32)
+        for r, s in enumerate(sets):
+            if s:
+                block[r, [vocab[t] for t in s]] = 1.0 / np.sqrt(len(s))
+        blocks.append(block * np.float32(np.sqrt(w / total)))
+    return np.hstack(blocks) if blocks else np.zeros((len(first), 1), dtype=np.float32)
+
+
+def _key(text: str, group: str) -> str:
+    return hashlib.sha1(f"{text}\x00{group}".encode("utf-8")).hexdigest()[:16]
+
+
+class NeighborTable:
+    def __init__(self, ids: np.ndarray, nbr: np.ndarray, score: np.ndarray, reused: int = 0, computed: int = 0):
+        self.ids = ids
+        self.nbr = nbr
+        self.score = score
+        self.reused = reused
+        self.computed = computed
+        self._row = {str(x): i for i, x in enumerate(ids.tolist())}
+
+    def __len__(self) -> int:
+        return len(self._row)
+
+    def neighbors(self, item_id: str, n: int = TOP_N) -> tuple[np.ndarray, np.ndarray]:
+        """(مواقع الجيران في جدول الكتالوج، التشابه) تنازلياً. id مو موجود -> فاضي."""
+        i = self._row.get(str(item_id))
+        if i is None:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        pos = np.asarray(self.nbr[i, :n])
+        keep = pos >= 0
+        return pos[keep], np.asarray(self.score[i, :n])[keep]
+
+    # ---------- build ----------
+    @classmethod
+    def load_or_build(cls, directory: Path, items: Items, n: int = TOP_N) -> "NeighborTable":
+        directory = Path(directory)
+        ids = items.ids
+        keys = items.keys()
+
+        old = cls._load_files(directory, n)
+        if old is not None and np.array_equal(old[0], ids) and np.array_equal(old[1], keys):
+            return cls(old[0], old[2], old[3], reused=len(ids))
+
+        builder = _Builder(items, n)
+        nbr = np.full((len(ids), n), -1, dtype=np.int32)
+        score = np.zeros((len(ids), n), dtype=np.float32)
+        dirty = np.ones(len(ids), dtype=bool)
+
+        if old is not None:
+            old_ids, old_keys, old_nbr, old_score = old
+            old_row = {x: i for i, x in enumerate(old_ids.tolist())}
+            prev = np.array([old_row.get(x, -1) for x in ids.tolist()], dtype=np.int64)
+            same = prev >= 0
+            same[same] = old_keys[prev[same]] == keys[same]
+            if len(ids) and (~same).mean() <= REBUILD_FRACTION:
+                dirty = builder.affected(same, prev, old_nbr, old_score, old_ids)
+                clean = ~dirty
+                # مواقع الجيران القديمة -> مواقع جديدة (كلهم موجودين وما تغيروا، وإلا الصف صار dirty)
+                old_to_new = np.full(len(old_ids) + 1, -1, dtype=np.int32)
+                old_to_new[prev[same]] = np.flatnonzero(same)
+                rows = old_nbr[prev[clean]]
+                nbr[clean] = old_to_new[np.where(rows >= 0, rows, len(old_ids))]
+                score[clean] = old_score[prev[clean]]
+
+        rows = np.flatnonzero(dirty)
+        nbr[rows], score[rows] = builder.compute(rows)
+        try:
+            ids_m, nbr_m, score_m = cls._save_files(directory, ids, keys, nbr, score)
+        except OSError:
+            ids_m, nbr_m, score_m = ids, nbr, score
+        return cls(ids_m, nbr_m, score_m, reused=int(len(ids) - rows.size), computed=int(rows.size))
+
+    @staticmethod
+    def _load_files(directory: Path, n: int):
+        try:
+            meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+            if meta.get("format") != FORMAT_VERSION or meta.get("n") != n or meta.get("min_score") != MIN_SCORE:
+                return None
+            ids = np.load(directory / "ids.npy", allow_pickle=False)
+            keys = np.load(directory / "keys.npy", allow_pickle=False)
+            nbr = np.load(directory / "nbr.npy", mmap_mode="r")
+            score = np.load(directory / "score.npy", mmap_mode="r")
+        except (OSError, ValueError, KeyError):
+            return None
+        if not (ids.size == keys.size == nbr.shape[0] == score.shape[0]) or nbr.shape[1] != n:
+            return None
+        return ids, keys, nbr, score
+
+    @staticmethod
+    def _save_files(directory: Path, ids, keys, nbr, score):
+        directory.mkdir(parents=True, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp.npy"
+        arrays = {"ids": ids, "keys": keys, "nbr": nbr, "score": score}
+        for name, arr in arrays.items():
+            np.save(directory / (name + suffix), arr)
+        for name in arrays:
+            (directory / (name + suffix)).replace(directory / f"{name}.npy")
+        meta = {"format": FORMAT_VERSION, "n": nbr.shape[1], "min_score": MIN_SCORE}
+        (directory / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        return (
+            np.load(directory / "ids.npy", allow_pickle=False),
+            np.load(directory / "nbr.npy", mmap_mode="r"),
+            np.load(directory / "score.npy", mmap_mode="r"),
+        )
+
+
+class _Builder:
+    """الحساب على مستوى التوقيعات. الترتيب: التشابه تنازلياً ثم id (عشان التزايدي = البناء الكامل)."""
+
+    def __init__(self, items: Items, n: int):
+        self.n = n
+        self.sig, first, _ = items.signatures()  # عنصر -> توقيع
+        self.vectors = signature_vectors(items, first)
+        self.group = pd.factorize(pd.Series(items.groups, dtype=object))[0]
+        self.id_rank = np.argsort(np.argsort(items.ids, kind="stable"), kind="stable")
+        # أعضاء كل توقيع مرتبين بالـ id
+        order = np.lexsort((self.id_rank, self.sig))
+        counts = np.bincount(self.sig, minlength=len(self.vectors))
+        self.counts = counts
+        self.members = np.split(order, np.cumsum(counts)[:-1])
+
+    def _sims(self, q: np.ndarray) -> np.ndarray:
+        return np.round(self.vectors @ q, DECIMALS).clip(0.0, 1.0)
+
+    def _candidates(self, s: int, need: int) -> tuple[np.ndarray, np.ndarray, bool]:
+        """
+        أول need عنصر (على الأقل) بالترتيب من التوقيعات الأقرب لـ s، مع كل المتعادلين عند الحد،
+        وكل مجموعة بحد MAX_PER_GROUP (الحد ما يعتمد على مجموعة العنصر نفسه، فينحسب مرة لكل توقيع).
+        الثالث = True إذا هذي كل العناصر فوق MIN_SCORE (ما فيه أكثر نجيبه).
+        """
+        sims = self._sims(self.vectors[s])
+        order = np.argsort(-sims, kind="stable")
+        cum = np.cumsum(self.counts[order])
+        j = min(int(np.searchsorted(cum, need)), len(order) - 1)
+        cut = max(sims[order[j]], MIN_SCORE)
+        chosen = np.flatnonzero(sims >= cut)
+        complete = cut == MIN_SCORE or j == len(order) - 1
+        if chosen.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), True
+        cand = np.concatenate([self.members[c] for c in chosen])
+        cand_sims = np.repeat(sims[chosen], self.counts[chosen])
+        o = np.lexsort((self.id_rank[cand], -cand_sims))
+        cand, cand_sims = cand[o], cand_sims[o]
+        # ترتيب كل عنصر داخل مجموعته (cumcount) بـ sort ثابت
+        grp = self.group[cand]
+        by = np.argsort(grp, kind="stable")
+        starts = np.flatnonzero(np.r_[True, grp[by][1:] != grp[by][:-1]])
+        rank = np.empty(cand.size, dtype=np.int64)
+        rank[by] = np.arange(cand.size) - np.repeat(starts, np.diff(np.r_[starts, cand.size]))
+        keep = rank < MAX_PER_GROUP
+        return cand[keep], cand_sims[keep], complete
+
+    def _pick(self, cand: np.ndarray, sims: np.ndarray, g: int) -> tuple[np.ndarray, np.ndarray]:
+        """نشيل مجموعة العنصر نفسه ونأخذ أول n."""
+        head = slice(0, self.n + MAX_PER_GROUP)
+        keep = self.group[cand[head]] != g
+        return cand[head][keep][:self.n], sims[head][keep][:self.n]
+
+    def compute(self, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        nbr = np.full((rows.size, self.n), -1, dtype=np.int32)
+        score = np.zeros((rows.size, self.n), dtype=np.float32)
+        cands: dict[int, tuple[np.ndarray, np.ndarray, bool]] = {}
+        done: dict[tuple[int, int], tuple[np.ndarray, np.ndarray]] = {}
+        for r, i in enumerate(rows.tolist()):
+            s, g = int(self.sig[i]), int(self.group[i])
+            hit = done.get((s, g))
+            if hit is None:
+                need = 4 * self.n
+                if s not in cands:
+                    cands[s] = self._candidates(s, need)
+                hit = self._pick(*cands[s][:2], g)
+                # القائمة ناقصة والمرشحين مو كاملين: نوسع لين تكمل أو يخلصون
+                while hit[0].size < self.n and not cands[s][2]:
+                    need = max(need, cands[s][0].size) * 2
+                    cands[s] = self._candidates(s, need)
+                    hit = self._pick(*cands[s][:2], g)
+                done[(s, g)] = hit
+            nbr[r, :hit[0].size] = hit[0]
+            score[r, :hit[1].size] = hit[1]
+        return nbr, score
+
+    def affected(self, same: np.ndarray, prev: np.ndarray, old_nbr, old_score, old_ids) -> np.ndarray:
+        """الصفوف اللي لازم تنحسب من جديد (same = العنصر موجود قبل وبنفس الخصائص)."""
+        dirty = ~same
+        # جار انحذف أو تغير
+        old_valid = np.zeros(len(old_ids) + 1, dtype=bool)
+        old_valid[prev[same]] = True
+        rows = np.asarray(old_nbr)[prev[same]]
+        bad = ~old_valid[np.where(rows >= 0, rows, len(old_ids))] & (rows >= 0)
+        dirty[np.flatnonzero(same)[bad.any(axis=1)]] = True
+
+        # عنصر جديد/متغير ممكن يدخل القائمة: تشابهه >= آخر جار (أو القائمة ناقصة)
+        changed_sigs = np.unique(self.sig[~same])
+        if changed_sigs.size:
+            best = self._sims(self.vectors[changed_sigs].T).max(axis=1)[self.sig]
+            last = np.asarray(old_score)[prev.clip(min=0), -1]
+            full = np.asarray(old_nbr)[prev.clip(min=0), -1] >= 0
+            reach = (best >= MIN_SCORE) & (~full | (best >= last))
+            dirty |= same & reach
+        return dirty
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from src.core.catalog import get_catalog
+
+    parser = argparse.ArgumentParser(description="Build/update the precomputed similar programs/universities tables")
+    parser.parse_args()
+
+    catalog = get_catalog()
+    for name, attr in [("programs", "prog_neighbors"), ("universities", "uni_neighbors")]:
+        t0 = time.perf_counter()
+        table = getattr(catalog, attr)
+        print(f"{name}: {len(table)} rows, {table.computed} computed, {table.reused} reused "
+              f"({time.perf_counter() - t0:.2f}s) -> {catalog.neighbors_dir / name}")
@@ -1 +1,156 @@
+"""
+بناء prompt رُشد من الكتالوج بحجم محدود مهما كبر الكتالوج.
 
+بدل ما نحط صفوف CSV كاملة في الـ prompt:
+1) retrieval: أفضل N جامعات للطالب (top_k) + أول M برامج مطابقة في كل وحدة (مع حكم الأهلية)
+2) كل جامعة/برنامج سطر واحد مختصر (الحقول تنقص لحد أقصى من الحروف)
+3) الأسطر تنضاف بترتيب الأفضلية لين توصل ميزانية التوكنز (تقدير محلي: estimate_tokens)،
+   وإذا ما كفت نشيل برامج الجامعة أول قبل ما نشيل الجامعة نفسها.
+رسالة الـ system ثابتة لكل الطلبات (stable prefix) عشان كاش الـ prompt عند مزود الـ API يشتغل،
+وكل المتغير (المرشحين + الطالب + السؤال) في آخر رسالة.
+"""
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.core.catalog import Catalog
+from src.core.llm import Messages, estimate_tokens
+from src.core.recommender import Profile, program_eligibility, top_k
+
+SYSTEM_PREFIX = (
+    "You are Rushd (رُشد), an admissions advisor for students choosing universities in the Gulf (GCC).\n"
+    "Answer in the student's language (Arabic by default), briefly and concretely.\n"
+    "Use ONLY the candidate universities and programs listed in the user message; "
+    "if the answer is not in them, say so instead of guessing.\n"
+    "Candidate format:\n"
+    "U <uni_id> | <name> | <city>, <country> | <type> | scholarships: <...> | fit: <...>\n"
+    "  P <program> | <level>, <language> | english: <test score> | tuition/yr USD: <range> | eligibility: <...>\n"
+    "Recommend at most 3 universities, each with one sentence on why, and name the program."
+)
+PREFIX_KEY = hashlib.sha256(SYSTEM_PREFIX.encode("utf-8")).hexdigest()[:16]
+
+# حدود الـ retrieval والميزانية (توكنز للجزء المتغير)
+N_UNIS = 8
+N_PROGRAMS = 3
+TOKEN_BUDGET = 900  # المرشحين + الطالب + السؤال (الـ prefix برا الميزانية)
+FIELD_CHARS = 60
+
+
+@dataclass(frozen=True)
+class Prompt:
+    messages: Messages
+    prefix_key: str
+    tokens: int
+    unis: tuple[str, ...]
+    programs: tuple[str, ...]
+    # مرشحين (جامعات/برامج) انشالوا عشان الميزانية
+    dropped: int = 0
+
+
+def clip(value, n: int = FIELD_CHARS) -> str:
+    s = " ".join(str(value).split())
+    if s.lower() in ("", "nan", "none"):
+        return "-"
+    return s if len(s) <= n else s[:n - 1].rstrip() + "…"
+
+
+def _money(lo: float, hi: float) -> str:
+    if np.isnan(lo):
+        return "unknown"
+    if hi <= 0:
+        return "free"
+    return f"{lo:,.0f}" if lo == hi else f"{lo:,.0f}-{hi:,.0f}"
+
+
+def uni_line(row: pd.Series) -> str:
+    return (
+        f"U {row['uni_id']} | {clip(row['name_en'])} | {clip(row['city'], 30)}, {row['country']} | "
+        f"{row['type']} | scholarships: {clip(row['scholarship'], 40)} | fit: {row['status']}"
+    )
+
+
+def program_line(row: pd.Series) -> str:
+    test, score = str(row["req_test"]), float(row["req_test_score"])
+    if test == "None":
+        eng = "-"
+    else:
+        eng = test if np.isnan(score) else f"{test} {score:g}"
+    return (
+        f"  P {clip(row['program_name_en'] or row['program_name_ar'])} | {row['level']}, {row['language']} | "
+        f"english: {eng} | tuition/yr USD: {_money(row['tuition_lo'], row['tuition_hi'])} | eligibility: {row['verdict']}"
+    )
+
+
+def student_block(profile: Profile, question: str) -> str:
+    wants = {
+        "country": profile.country, "city": profile.city, "level": profile.level,
+        "major": profile.major_field, "language": profile.language, "scholarship": profile.scholarship,
+    }
+    prefs = ", ".join(f"{k}: {v}" for k, v in wants.items() if v not in ("", "All")) or "none"
+    scores = ", ".join(
+        f"{k}: {v:g}" for k, v in [("average", profile.hs_avg), ("IELTS", profile.ielts), ("math", profile.math_avg),
+                                   ("budget USD/yr", profile.budget)] if v > 0
+    ) or "none"
+    return f"Student preferences: {prefs}\nStudent scores: {scores}\nQuestion: {clip(question, 500)}"
+
+
+def retrieve(catalog: Catalog, profile: Profile, n_unis: int = N_UNIS,
+             n_programs: int = N_PROGRAMS) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """أفضل n_unis جامعة + أول n_programs برامج مطابقة لكل وحدة (بترتيب الملف) مع الأهلية والرسوم."""
+    unis = top_k(catalog, profile, n_unis)
+    elig = program_eligibility(catalog, profile)
+    elig = elig[elig["uni_id"].isin(unis["uni_id"])].groupby("uni_id", sort=False).head(n_programs)
+    pos = catalog.progs.index.get_indexer(elig.index)
+    cols = ["level", "language", "req_test", "req_test_score"]
+    progs = elig.assign(**{c: catalog.progs[c].to_numpy()[pos] for c in cols})
+    tidx = catalog.tuition_index
+    progs = progs.assign(tuition_lo=tidx.lo[pos], tuition_hi=tidx.hi[pos])
+    return unis, progs
+
+
+def build_prompt(catalog: Catalog, profile: Profile, question: str, budget: int = TOKEN_BUDGET,
+                 n_unis: int = N_UNIS, n_programs: int = N_PROGRAMS) -> Prompt:
+    unis, progs = retrieve(catalog, profile, n_unis, n_programs)
+    tail = student_block(profile, question)
+    used = estimate_tokens(tail) + estimate_tokens("Candidates:\n")
+
+    # أول: سطر لكل جامعة بترتيبها، بعدين برامجها بنفس الترتيب بالمتبقي من الميزانية
+    kept: list[tuple[pd.Series, list[str]]] = []
+    dropped = 0
+    for _, u in unis.iterrows():
+        cost = estimate_tokens(uni_line(u)) + 1
+        if used + cost > budget:
+            dropped += 1
+            continue
+        used += cost
+        kept.append((u, []))
+
+    by_uni = {uid: grp for uid, grp in progs.groupby("uni_id", sort=False)}
+    kept_progs: list[str] = []
+    for u, prog_lines in kept:
+        for _, p in by_uni.get(u["uni_id"], progs.head(0)).iterrows():
+            line = program_line(p)
+            cost = estimate_tokens(line) + 1
+            if used + cost > budget:
+                dropped += 1
+                continue
+            used += cost
+            prog_lines.append(line)
+            kept_progs.append(str(p["program_id"]))
+    dropped += int((~progs["uni_id"].isin([u["uni_id"] for u, _ in kept])).sum())
+
+    lines = [line for u, prog_lines in kept for line in (uni_line(u), *prog_lines)]
+    user = "Candidates:\n" + ("\n".join(lines) if lines else "(none)") + "\n\n" + tail
+    messages = [{"role": "system", "content": SYSTEM_PREFIX}, {"role": "user", "content": user}]
+    return Prompt(
+        messages=messages,
+        prefix_key=PREFIX_KEY,
+        tokens=estimate_tokens(SYSTEM_PREFIX) + estimate_tokens(user),
+        unis=tuple(str(u["uni_id"]) for u, _ in kept),
+        programs=tuple(kept_progs),
+        dropped=dropped,
+    )
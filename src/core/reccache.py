@@ -0,0 +1,178 @@
+"""
+كاش نتائج رُشد: نفس الملف (Bachelor + Computer Science + Qatar + English...) ما ينحسب من جديد كل ضغطة.
+
+المفتاح = (نسخة الكتالوج = hash المحتوى، hash أسعار العملات، k، ملف الطالب بعد التوحيد)،
+فأي تحديث للـ CSV أو للأسعار (تأثر على نقاط الميزانية) يخلي القديم miss تلقائياً (ونمسحه من الذاكرة).
+- الذاكرة: LRU + TTL، مشترك بين كل الجلسات في نفس الـ process
+- القرص (اختياري): pickle داخل مجلد الـ snapshot للنسخة (catalog.snapshot_dir)، فينمسح مع prune_snapshots
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import astuple
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+
+from src.core.catalog import Catalog
+from src.core.recommender import Profile, iter_top_k
+from src.core.textnorm import normalize_text
+
+MAXSIZE = 512
+TTL_SECONDS = 3600.0
+
+
+def canonical_profile(profile: Profile) -> tuple:
+    """ملف الطالب بشكل ثابت: فراغات/خانات فاضية = "All"، الأرقام مقربة، الملاحظة بعد التوحيد."""
+    out = []
+    for v in astuple(profile)[:6]:
+        v = str(v).strip()
+        out.append(v if v else "All")
+    out += [round(float(profile.hs_avg), 2), round(float(profile.ielts), 2), round(float(profile.math_avg), 2)]
+    out.append(normalize_text(profile.note))
+    out.append(round(float(profile.budget), 2))
+    return tuple(out)
+
+
+class RecommendationCache:
+    def __init__(self, maxsize: int = MAXSIZE, ttl: float = TTL_SECONDS, disk: bool = False):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk = disk
+        self._data: OrderedDict[tuple, tuple[float, pd.DataFrame]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: tuple | None = None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+    def key(self, catalog: Catalog, profile: Profile, k: int) -> tuple:
+        return (catalog.version, catalog.rates_version, int(k), canonical_profile(profile))
+
+    def _disk_path(self, key: tuple, snapshot_dir: Path | None) -> Path | None:
+        if not self.disk or snapshot_dir is None:
+            return None
+        name = hashlib.sha256(repr(key).encode()).hexdigest()[:24]
+        return Path(snapshot_dir) / key[0] / "recs" / f"{name}.pkl"
+
+    def _check_version(self, version: tuple) -> None:
+        # الكتالوج أو الأسعار تغيّرت: القديم ما عاد له فايدة في الذاكرة
+        if self._version != version:
+            self._data.clear()
+            self._version = version
+
+    def get(self, key: tuple, snapshot_dir: Path | None = None) -> pd.DataFrame | None:
+        """snapshot_dir = catalog.snapshot_dir (مكان طبقة القرص، إذا مفعلة)."""
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(key[:2])
+            item = self._data.get(key)
+            if item is not None:
+                if now - item[0] <= self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return item[1]
+                del self._data[key]
+
+        path = self._disk_path(key, snapshot_dir)
+        if path is not None:
+            try:
+                if time.time() - path.stat().st_mtime <= self.ttl:
+                    df = pd.read_pickle(path)
+                    with self._lock:
+                        self.hits += 1
+                        self.disk_hits += 1
+                    self._store(key, df)
+                    return df
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _store(self, key: tuple, df: pd.DataFrame) -> None:
+        with self._lock:
+            self._check_version(key[:2])
+            self._data[key] = (time.monotonic(), df)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def put(self, key: tuple, df: pd.DataFrame, snapshot_dir: Path | None = None) -> None:
+        self._store(key, df)
+        path = self._disk_path(key, snapshot_dir)
+        if path is not None:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(f".{os.getpid()}.tmp")
+                df.to_pickle(tmp)
+                tmp.replace(path)
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+            }
+
+
+def _default_cache() -> RecommendationCache:
+    # REC_CACHE_DISK=1 يفعّل طبقة القرص (داخل <snapshot_dir>/<version>/recs)
+    return RecommendationCache(disk=os.getenv("REC_CACHE_DISK", "").strip() in ("1", "true", "yes"))
+
+
+# واحد لكل الـ process (Streamlit يستورد الموديول مرة وحدة لكل الجلسات)
+REC_CACHE = _default_cache()
+
+
+def cached_iter_top_k(
+    catalog: Catalog,
+    profile: Profile,
+    sizes=(3, 30),
+    cache: RecommendationCache = REC_CACHE,
+) -> Iterator[pd.DataFrame]:
+    """
+    نفس iter_top_k بس من الكاش إذا موجود (الدفعات تتقطع من النتيجة المخزنة).
+    في حالة miss نحسب عادي (البطاقات أول) ونخزن النتيجة كاملة *قبل* ما نسلم آخر دفعة:
+    الصفحة تاخذ len(sizes) دفعة بـ next وما تكمل الـ generator، فالتخزين بعد الـ loop ما كان يصير.
+    """
+    key = cache.key(catalog, profile, max(sizes))
+    hit = cache.get(key, catalog.snapshot_dir)
+    if hit is not None:
+        done = 0
+        for k in sizes:
+            if len(hit) <= done:
+                return
+            yield hit.iloc[done:k]
+            done = k
+        return
+
+    parts = []
+    stored = False
+    for i, part in enumerate(iter_top_k(catalog, profile, sizes)):
+        parts.append(part)
+        if i == len(sizes) - 1:
+            cache.put(key, pd.concat(parts), catalog.snapshot_dir)
+            stored = True
+        yield part
+    # النتائج خلصت قبل آخر حجم (كتالوج صغير/فلاتر ضيقة): هذي النتيجة كاملة
+    if not stored:
+        cache.put(key, pd.concat(parts) if parts else pd.DataFrame(), catalog.snapshot_dir)
@@ -1 +1,334 @@
+"""
+رُشد: ترتيب الجامعات للطالب.
 
+التقييم كله عمليات على مصفوفات (بدون iterrows ولا فلترة البرامج لكل جامعة):
+- البرامج المطابقة (المستوى/التخصص/اللغة) = mask واحد على جدول البرامج
+- لكل جامعة: هل عندها برنامج مطابق + أول قيمة غير فاضية لكل متطلب (english_test/score/notes)
+- مكونات التقييم (برامج 40، دولة 15، مدينة 10، منح 20، ميزانية 10، معدل 5، رياضيات 5) = arrays تنجمع
+- الترتيب top-k (argpartition)، والأسباب/المتطلبات تنحسب بس للصفوف اللي بتنعرض
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from src.core.catalog import Catalog, facet_mask
+from src.core.eligibility import verdicts
+
+# المتطلبات اللي نعرضها في بطاقة الجامعة: مفتاح النتيجة -> عمود البرامج
+REQ_FIELDS = {
+    "req_english_test": "english_test",
+    "req_english_score": "english_score",
+    "req_math": "math_test",
+    "req_notes": "admission_notes",
+}
+
+RESULT_COLS = [
+    "uni_id", "name_ar", "name_en", "country", "city", "type", "scholarship",
+    "score", "status", "reasons",
+    "website", "admissions_url", "programs_url",
+    "req_english_test", "req_english_score", "req_math", "req_notes",
+]
+
+UNI_RESULT_COLS = ["uni_id", "name_ar", "name_en", "country", "city", "type", "scholarship",
+                   "website", "admissions_url", "programs_url"]
+
+REASONS = {
+    "match": "يوجد برامج مطابقة لخياراتك",
+    "no_match": "لا توجد برامج مطابقة (جرّبي توسيع الفلاتر)",
+    "country": "ضمن الدولة المفضلة",
+    "city": "ضمن المدينة المفضلة",
+    "sch": "تظهر كجامعة لديها منح (حسب البيانات)",
+    "no_sch": "المنح غير متاحة/غير واضحة (حسب البيانات)",
+    "budget": "فيها برامج رسومها ضمن ميزانيتك",
+    "hs_avg": "تم إدخال معدل تقريبي (للتوجيه)",
+    "math": "تم إدخال مستوى الرياضيات (للتوجيه)",
+}
+
+
+@dataclass(frozen=True)
+class Profile:
+    """ملف الطالب كما في صفحة رُشد ("All" = بدون تفضيل)."""
+    country: str = "All"
+    city: str = "All"
+    level: str = "All"
+    major_field: str = "All"
+    language: str = "All"
+    scholarship: str = "All"
+    hs_avg: float = 0.0
+    ielts: float = 0.0
+    math_avg: float = 0.0
+    note: str = ""
+    # الميزانية السنوية بعملة الأساس (USD)، 0 = بدون حد
+    budget: float = 0.0
+
+
+def matching_programs(catalog: Catalog, profile: Profile) -> np.ndarray:
+    """Boolean mask على catalog.progs: البرامج المطابقة للمستوى/التخصص/اللغة."""
+    progs = catalog.progs
+    mask = np.ones(len(progs), dtype=bool)
+    for col, value in [("level", profile.level), ("major_field", profile.major_field), ("language", profile.language)]:
+        if value != "All" and col in progs.columns:
+            mask &= facet_mask(progs[col], value).to_numpy()
+    return mask
+
+
+def first_rows(present: np.ndarray, uni_pos: np.ndarray, rows: np.ndarray, n_unis: int) -> np.ndarray:
+    """لكل جامعة: رقم أول برنامج (بترتيب الملف) من rows اللي present فيه True، أو -1."""
+    out = np.full(n_unis, -1, dtype=np.int64)
+    rows = rows[present[rows]]
+    if rows.size == 0:
+        return out
+    first_uni, first_idx = np.unique(uni_pos[rows], return_index=True)
+    out[first_uni] = rows[first_idx]
+    return out
+
+
+def first_non_empty(values: pd.Series, uni_pos: np.ndarray, rows: np.ndarray, n_unis: int) -> np.ndarray:
+    """لكل جامعة: أول قيمة غير فاضية (بترتيب الملف) من البرامج المختارة في rows."""
+    out = np.full(n_unis, "", dtype=object)
+    if values is None:
+        return out
+    vals = values.to_numpy(dtype=object)
+    first = first_rows(vals != "", uni_pos, rows, n_unis)
+    found = first >= 0
+    out[found] = vals[first[found]]
+    return out
+
+
+def required_ielts(catalog: Catalog, uni_pos: np.ndarray, rows: np.ndarray, n_unis: int) -> np.ndarray:
+    """
+    لكل جامعة: درجة IELTS المطلوبة (0 = غير معروف) — نوع الاختبار من أول برنامج فيه اختبار،
+    والدرجة من أول برنامج فيه درجة (نفس منطق البطاقة).
+    """
+    progs = catalog.progs
+    out = np.zeros(n_unis, dtype=np.float64)
+    if "req_test" not in progs.columns or progs.empty:
+        return out
+    test = progs["req_test"].to_numpy(dtype=object)
+    score = progs["req_test_score"].to_numpy(dtype=np.float64)
+    test_row = first_rows(progs["english_test"].to_numpy(dtype=object) != "", uni_pos, rows, n_unis)
+    score_row = first_rows(progs["english_score"].to_numpy(dtype=object) != "", uni_pos, rows, n_unis)
+    ok = (test_row >= 0) & (score_row >= 0)
+    is_ielts = np.zeros(n_unis, dtype=bool)
+    is_ielts[ok] = test[test_row[ok]] == "IELTS"
+    out[is_ielts] = np.nan_to_num(score[score_row[is_ielts]], nan=0.0)
+    return out
+
+
+def admission_status(req_ielts: np.ndarray, user_ielts: float) -> np.ndarray:
+    if user_ielts <= 0:
+        return np.where(req_ielts > 0, "Conditional", "Unknown")
+    return np.select(
+        [req_ielts <= 0, user_ielts >= req_ielts],
+        ["Unknown", "Suitable"],
+        default="Conditional",
+    )
+
+
+@dataclass(frozen=True)
+class Scores:
+    """مكونات التقييم لكل جامعة (arrays بطول catalog.unis) قبل تجهيز صفوف النتيجة."""
+    profile: Profile
+    keep: np.ndarray
+    score: np.ndarray
+    has_match: np.ndarray
+    in_country: np.ndarray
+    in_city: np.ndarray
+    has_sch: np.ndarray
+    in_budget: np.ndarray
+    rows: np.ndarray
+    relevance: np.ndarray | None = None
+
+
+def compute_scores(catalog: Catalog, profile: Profile) -> Scores:
+    """التقييم فقط (أرقام)، بدون الأسباب والمتطلبات — هذي تنحسب لاحقاً للصفوف اللي بتنعرض."""
+    unis = catalog.unis
+    n = len(unis)
+
+    # ---- جامعات ضمن الدولة/المدينة (ونفس الـ masks مكونات للتقييم) ----
+    in_country = (facet_mask(unis["country"], profile.country).to_numpy()
+                  if profile.country != "All" else np.zeros(n, dtype=bool))
+    in_city = (facet_mask(unis["city"], profile.city).to_numpy()
+               if profile.city != "All" else np.zeros(n, dtype=bool))
+    keep = np.ones(n, dtype=bool)
+    if profile.country != "All":
+        keep &= in_country
+    if profile.city != "All":
+        keep &= in_city
+
+    # ---- برامج مطابقة، مجمعة حسب الجامعة ----
+    uni_pos = catalog.prog_uni_pos
+    rows = np.flatnonzero(matching_programs(catalog, profile) & (uni_pos >= 0))
+    has_match = np.bincount(uni_pos[rows], minlength=n)[:n] > 0
+
+    # ---- مكونات التقييم ----
+    want_sch = profile.scholarship == "Yes"
+    has_sch = (unis["sch_availability"] == "Yes").to_numpy() if want_sch else np.zeros(n, dtype=bool)
+
+    # ---- الميزانية: عندها برنامج مطابق رسومه تبدأ ضمن الميزانية (interval index) ----
+    in_budget = np.zeros(n, dtype=bool)
+    if profile.budget > 0:
+        affordable = rows[catalog.tuition_index.budget_mask(profile.budget)[rows]]
+        in_budget = np.bincount(uni_pos[affordable], minlength=n)[:n] > 0
+
+    score = (
+        40 * has_match
+        + 15 * in_country
+        + 10 * in_city
+        + 20 * has_sch
+        + 10 * in_budget
+        + (5 if profile.hs_avg > 0 else 0)
+        + (5 if profile.math_avg > 0 else 0)
+    ).astype(int)
+
+    relevance = None
+    if profile.note.strip():
+        relevance = text_relevance(catalog, profile.note).to_numpy()
+
+    return Scores(profile, keep, score, has_match, in_country, in_city, has_sch, in_budget, rows, relevance)
+
+
+def result_rows(catalog: Catalog, scores: Scores, pos: np.ndarray) -> pd.DataFrame:
+    """صفوف النتيجة (RESULT_COLS) للجامعات في pos وبنفس ترتيبها: الحالة + الأسباب + المتطلبات."""
+    unis = catalog.unis
+    n = len(unis)
+    profile = scores.profile
+    pos = np.asarray(pos, dtype=np.int64)
+
+    # المتطلبات من برامج الجامعات المطلوبة بس
+    uni_pos = catalog.prog_uni_pos
+    wanted = np.zeros(n, dtype=bool)
+    wanted[pos] = True
+    rows = scores.rows[wanted[uni_pos[scores.rows]]]
+    progs = catalog.progs
+    req = {
+        key: first_non_empty(progs.get(col), uni_pos, rows, n)[pos]
+        for key, col in REQ_FIELDS.items()
+    }
+
+    # ---- IELTS المطلوب (من أعمدة المتطلبات المحللة وقت البناء، بدون تحليل نصوص هنا) ----
+    status = admission_status(required_ielts(catalog, uni_pos, rows, n)[pos], profile.ielts)
+
+    # ---- الأسباب (أول 3 بنفس الترتيب) ----
+    m = pos.size
+    has_match, in_country, in_city, has_sch = (
+        scores.has_match[pos], scores.in_country[pos], scores.in_city[pos], scores.has_sch[pos]
+    )
+    parts = [
+        np.where(has_match, REASONS["match"], REASONS["no_match"]),
+        np.where(in_country, REASONS["country"], ""),
+        np.where(in_city, REASONS["city"], ""),
+        np.where(has_sch, REASONS["sch"], REASONS["no_sch"]) if profile.scholarship == "Yes" else np.full(m, ""),
+        np.where(scores.in_budget[pos], REASONS["budget"], ""),
+        np.full(m, REASONS["hs_avg"] if profile.hs_avg > 0 else ""),
+        np.full(m, REASONS["math"] if profile.math_avg > 0 else ""),
+    ]
+    reasons = [" • ".join([p for p in row if p][:3]) for row in zip(*parts)]
+
+    # DataFrame واحد من dict (أرخص من إضافة الأعمدة وحدة وحدة، يفرق في وضع المرشد)
+    data = {c: unis[c].to_numpy(dtype=object)[pos] for c in UNI_RESULT_COLS}
+    data.update(score=scores.score[pos], status=status, reasons=reasons, **req)
+    if scores.relevance is not None:
+        data["relevance"] = scores.relevance[pos]
+    cols = RESULT_COLS + (["relevance"] if scores.relevance is not None else [])
+    return pd.DataFrame({c: data[c] for c in cols}, index=unis.index[pos])
+
+
+def score_universities(catalog: Catalog, profile: Profile) -> pd.DataFrame:
+    """كل الجامعات ضمن الدولة/المدينة المختارة مع التقييم والحالة والأسباب (بدون ترتيب)."""
+    scores = compute_scores(catalog, profile)
+    return result_rows(catalog, scores, np.flatnonzero(scores.keep))
+
+
+# ----------------------------
+# Ranking (top-k)
+# ----------------------------
+def top_positions(scores: Scores, k: int | None = None) -> np.ndarray:
+    """
+    مواقع أفضل k جامعة: التقييم تنازلياً، ثم الصلة (إذا فيه ملاحظة)، ثم ترتيب الملف.
+    argpartition يحدد حد التقييم للـ k، ونرتب المرشحين فوق الحد بس (مو كل الجامعات).
+    """
+    cand = np.flatnonzero(scores.keep)
+    score = scores.score[cand]
+    if k is not None and k < cand.size:
+        if k <= 0:
+            return cand[:0]
+        kth = -np.partition(-score, k - 1)[k - 1]
+        # المتساويين عند الحد كلهم يدخلون الترتيب عشان نفس نتيجة الترتيب الكامل (stable)
+        cand, score = cand[score >= kth], score[score >= kth]
+    keys = [cand]
+    if scores.relevance is not None:
+        keys.append(-scores.relevance[cand])
+    keys.append(-score)
+    return cand[np.lexsort(keys)][:k]
+
+
+def top_k(catalog: Catalog, profile: Profile, k: int) -> pd.DataFrame:
+    """أفضل k جامعة مرتبة (نفس recommend(...).head(k) بدون ما نجهز صفوف الباقي)."""
+    scores = compute_scores(catalog, profile)
+    return result_rows(catalog, scores, top_positions(scores, k))
+
+
+def iter_top_k(catalog: Catalog, profile: Profile, sizes=(3, 30)) -> Iterator[pd.DataFrame]:
+    """
+    النتائج على دفعات: أول دفعة = أفضل sizes[0]، بعدها الصفوف لين sizes[1]، ...
+    الصفحة تعرض البطاقات من أول دفعة قبل ما ينحسب باقي الجدول.
+    """
+    scores = compute_scores(catalog, profile)
+    done = 0
+    for k in sizes:
+        pos = top_positions(scores, k)
+        if pos.size <= done:
+            return
+        yield result_rows(catalog, scores, pos[done:])
+        done = pos.size
+
+
+def recommend(catalog: Catalog, profile: Profile) -> pd.DataFrame:
+    """score_universities مرتبة تنازلياً. الملاحظة الحرة (note) ترتّب المتساويين حسب صلتها (BM25)."""
+    scores = compute_scores(catalog, profile)
+    return result_rows(catalog, scores, top_positions(scores))
+
+
+def program_eligibility(catalog: Catalog, profile: Profile) -> pd.DataFrame:
+    """
+    البرامج المطابقة (المستوى/التخصص/اللغة) مع حكم الأهلية لكل برنامج:
+    program_id, uni_id, program_name_ar, program_name_en, verdict.
+    الحكم محسوب لكل الكتالوج مرة وحدة (catalog.prog_constraints).
+    """
+    progs = catalog.progs
+    cols = ["program_id", "uni_id", "program_name_ar", "program_name_en"]
+    if progs.empty:
+        return pd.DataFrame(columns=cols + ["verdict"])
+    verdict = verdicts(catalog.prog_constraints, profile.ielts, profile.hs_avg, profile.math_avg)
+    rows = np.flatnonzero(matching_programs(catalog, profile))
+    out = progs.iloc[rows][cols].copy()
+    out["verdict"] = verdict[rows]
+    return out
+
+
+def text_relevance(catalog: Catalog, query: str) -> pd.Series:
+    """
+    صلة نص حر (مثل ملاحظة الطالب) بكل جامعة (0..1):
+    max(BM25 مقسوم على أعلى نتيجة، التشابه الدلالي) — كل واحد = max(الجامعة نفسها، أعلى برنامج فيها).
+    BM25 للكلمات الحرفية، والدلالي يربط "تقنية" بـ Computer Science/AI. يرجّع Series بـ index = uni_id.
+    """
+    unis = catalog.unis
+    rel = np.zeros(len(unis), dtype=np.float32)
+    if not str(query).strip() or unis.empty:
+        return pd.Series(rel, index=unis["uni_id"], name="relevance")
+
+    bm25 = catalog.uni_bm25.scores(query)
+    sem = catalog.uni_semantic.scores(query)
+    if not catalog.progs_joined.empty:
+        uni_pos = catalog.prog_uni_pos
+        ok = uni_pos >= 0
+        np.maximum.at(bm25, uni_pos[ok], catalog.prog_bm25.scores(query)[ok])
+        np.maximum.at(sem, uni_pos[ok], catalog.prog_semantic.scores(query)[ok])
+    top = float(bm25.max())
+    rel = np.maximum(bm25 / top if top > 0 else bm25, sem).astype(np.float32)
+    return pd.Series(rel, index=unis["uni_id"], name="relevance")
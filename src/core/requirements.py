@@ -0,0 +1,165 @@
+"""
+متطلبات القبول في programs.csv (english_test/score, math_test/score, admission_tests, duration_years...).
+
+نحللها مرة وحدة وقت بناء الـ snapshot إلى أعمدة typed:
+- req_test: نوع اختبار الإنجليزي (IELTS / TOEFL / ... / None)
+- req_test_score: أقل درجة (float، NaN إذا ما فيه)
+- req_math_level: مستوى الرياضيات المطلوب (0 = لا شيء ... 3 = رياضيات + فيزياء)
+- req_math_score: أقل درجة رياضيات (float)
+- req_placement / req_interview / req_aptitude: اختبارات القبول (bool)
+- req_duration: مدة البرنامج بالسنوات (float)
+والقيم اللي ما انفهمت تطلع في تقرير (requirements_report) بدل ما تنتجاهل بصمت.
+"""
+from __future__ import annotations
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# الترتيب مهم: أول اختبار يظهر في النص هو اللي ينحسب ("IELTS/TOEFL" = IELTS)
+ENGLISH_TESTS = ["IELTS", "TOEFL", "Duolingo", "PTE", "Other", "None"]
+ENGLISH_PATTERNS = {
+    "IELTS": "IELTS",
+    "TOEFL": "TOEFL",
+    "Duolingo": "DUOLINGO",
+    "PTE": "PTE",
+}
+# حدود معقولة للدرجة حسب الاختبار (خارجها = قيمة مشكوك فيها في التقرير)
+SCORE_RANGES = {"IELTS": (0.0, 9.0), "TOEFL": (0.0, 120.0), "Duolingo": (10.0, 160.0), "PTE": (10.0, 90.0)}
+
+MATH_LEVELS = {
+    "None": 0,
+    "HighSchoolScience": 1,
+    "HighSchoolMath": 2,
+    "HighSchoolMathPhysics": 3,
+}
+# admissions_requirements الحرة ("High school + Math/Physics") -> نفس المستويات
+MATH_HINTS = [("math/physics", 3), ("math", 2), ("science", 1)]
+
+ADMISSION_TESTS = {
+    "Placement": "req_placement",
+    "Interview": "req_interview",
+    "Aptitude": "req_aptitude",
+}
+
+REQ_COLS = [
+    "req_test", "req_test_score", "req_math_level", "req_math_score",
+    *ADMISSION_TESTS.values(), "req_duration",
+]
+
+# رقم مو لاصق في حرف ("B2" مو درجة)
+_NUMBER = re.compile(r"(?<![A-Za-z])\d+(?:\.\d+)?")
+_EMPTY = {"", "none", "nan", "n/a", "-"}
+
+
+def _is_empty(x: str) -> bool:
+    return str(x).strip().lower() in _EMPTY
+
+
+def english_test(x: str) -> str:
+    if _is_empty(x):
+        return "None"
+    up = str(x).upper()
+    for test, pat in ENGLISH_PATTERNS.items():
+        if pat in up:
+            return test
+    return "Other"
+
+
+def first_number(x: str) -> float:
+    """أول رقم في النص ("6.5" / "6.0-6.5" / "IELTS 6") أو NaN."""
+    m = _NUMBER.search(str(x).replace(",", "."))
+    return float(m.group()) if m else np.nan
+
+
+def math_level(test: str, requirements: str = "") -> int | None:
+    """مستوى الرياضيات من math_test، وإذا فاضي من نص admissions_requirements. None = قيمة مو معروفة."""
+    if not _is_empty(test):
+        return MATH_LEVELS.get(str(test).strip())
+    req = str(requirements).lower()
+    for hint, level in MATH_HINTS:
+        if hint in req:
+            return level
+    return 0
+
+
+def admission_tests(x: str) -> set[str]:
+    """"Placement" / "Interview" / "QatarAptitude" / "Placement|Interview" -> أنواع معروفة."""
+    if _is_empty(x):
+        return set()
+    out = set()
+    for part in re.split(r"[|,;/+]", str(x)):
+        part = part.strip().lower()
+        for name in ADMISSION_TESTS:
+            if name.lower() in part:
+                out.add(name)
+    return out
+
+
+def _col(progs: pd.DataFrame, col: str) -> pd.Series:
+    if col in progs.columns:
+        return progs[col].fillna("").astype(str)
+    return pd.Series("", index=progs.index)
+
+
+def _map_unique(s: pd.Series, fn) -> pd.Series:
+    uniq = pd.unique(s)
+    return s.map({v: fn(v) for v in uniq})
+
+
+def parse_requirements(progs: pd.DataFrame) -> pd.DataFrame:
+    """أعمدة REQ_COLS لكل برنامج (نفس الـ index). التحليل على القيم الفريدة فقط."""
+    out = pd.DataFrame(index=progs.index)
+    out["req_test"] = pd.Categorical(_map_unique(_col(progs, "english_test"), english_test), categories=ENGLISH_TESTS)
+    out["req_test_score"] = _map_unique(_col(progs, "english_score"), first_number).astype(np.float32)
+
+    pairs = _col(progs, "math_test") + "\x00" + _col(progs, "admissions_requirements")
+    level = _map_unique(pairs, lambda v: math_level(*v.split("\x00", 1)))
+    out["req_math_level"] = level.fillna(0).astype(np.int8)
+    out["req_math_score"] = _map_unique(_col(progs, "math_score"), first_number).astype(np.float32)
+
+    # الاختبارات من admission_tests + النص الحر ("High school + aptitude")
+    tests = _map_unique(_col(progs, "admission_tests") + "|" + _col(progs, "admissions_requirements"), admission_tests)
+    for name, col in ADMISSION_TESTS.items():
+        out[col] = tests.map(lambda t: name in t).astype(bool)
+
+    out["req_duration"] = _map_unique(_col(progs, "duration_years"), first_number).astype(np.float32)
+    return out
+
+
+def requirements_report(progs: pd.DataFrame) -> pd.DataFrame:
+    """
+    قيم ما انفهمت (أو خارج المعقول) في أعمدة المتطلبات:
+    column / value / problem / programs (عدد البرامج).
+    """
+    rows = []
+
+    def add(col: str, values: pd.Series, problem: str) -> None:
+        for v, n in values.value_counts().items():
+            rows.append({"column": col, "value": v, "problem": problem, "programs": int(n)})
+
+    test = _col(progs, "english_test")
+    kind = _map_unique(test, english_test)
+    add("english_test", test[kind == "Other"], "unknown test")
+
+    score = _col(progs, "english_score")
+    num = _map_unique(score, first_number)
+    add("english_score", score[~score.map(_is_empty) & num.isna()], "not a number")
+    for t, (lo, hi) in SCORE_RANGES.items():
+        bad = (kind == t) & num.notna() & ((num < lo) | (num > hi))
+        add("english_score", (t + " " + score)[bad], f"out of range {lo:g}-{hi:g}")
+    add("english_score", score[(kind == "None") & num.notna()], "score without test")
+
+    math = _col(progs, "math_test")
+    add("math_test", math[~math.map(_is_empty) & ~math.str.strip().isin(list(MATH_LEVELS))], "unknown level")
+
+    for col in ["math_score", "duration_years"]:
+        s = _col(progs, col)
+        add(col, s[~s.map(_is_empty) & _map_unique(s, first_number).isna()], "not a number")
+
+    tests = _col(progs, "admission_tests")
+    add("admission_tests", tests[~tests.map(_is_empty) & (_map_unique(tests, admission_tests).map(len) == 0)],
+        "unknown test")
+
+    return pd.DataFrame(rows, columns=["column", "value", "problem", "programs"])
@@ -0,0 +1,70 @@
+"""
+عمود scholarship في universities.csv: "Local|GCC|International" أو "Unknown" أو "No" (أو نص حر).
+
+نحلله مرة وحدة وقت بناء الـ snapshot إلى:
+- sch_availability: Yes / No / Unknown
+- مصفوفة bool: عمود لكل نوع منحة معروف (sch_tag_local, ...)
+والأنواع غير المعروفة تطلع في تقرير بدل ما تنتجاهل بصمت.
+"""
+from __future__ import annotations
+
+import pandas as pd
+
+AVAILABILITY = ["Yes", "No", "Unknown"]
+
+SCHOLARSHIP_TAGS = ["Local", "GCC", "International", "Children of citizen mothers"]
+TAG_COLUMNS = {
+    "Local": "sch_tag_local",
+    "GCC": "sch_tag_gcc",
+    "International": "sch_tag_international",
+    "Children of citizen mothers": "sch_tag_citizen_mothers",
+}
+
+
+def availability(x: str) -> str:
+    x = str(x).strip()
+    if x == "No":
+        return "No"
+    if x == "Unknown" or x == "":
+        return "Unknown"
+    return "Yes"
+
+
+def split_tags(x: str) -> list[str]:
+    x = str(x).strip()
+    if x in ["No", "Unknown", ""]:
+        return []
+    return [p.strip() for p in x.split("|") if p.strip()]
+
+
+def parse_scholarships(sch: pd.Series) -> pd.DataFrame:
+    """sch_availability (categorical) + عمود bool لكل نوع في SCHOLARSHIP_TAGS. التحليل على القيم الفريدة فقط."""
+    sch = sch.astype(str)
+    uniq = pd.unique(sch)
+    parsed = {v: set(split_tags(v)) for v in uniq}
+
+    out = pd.DataFrame(index=sch.index)
+    out["sch_availability"] = pd.Categorical(sch.map({v: availability(v) for v in uniq}), categories=AVAILABILITY)
+    for tag, col in TAG_COLUMNS.items():
+        out[col] = sch.map({v: tag in p for v, p in parsed.items()}).astype(bool)
+    return out
+
+
+def unknown_tags(sch: pd.Series) -> dict[str, int]:
+    """قيم داخل scholarship مو ضمن SCHOLARSHIP_TAGS -> عدد الجامعات."""
+    counts: dict[str, int] = {}
+    for v, n in sch.astype(str).value_counts().items():
+        for t in split_tags(v):
+            if t not in TAG_COLUMNS:
+                counts[t] = counts.get(t, 0) + int(n)
+    return dict(sorted(counts.items(), key=lambda kv: -kv[1]))
+
+
+def tags_mask(unis: pd.DataFrame, tags: list[str]) -> pd.Series:
+    """جامعات فيها كل الأنواع المطلوبة (AND) — عمليات على المصفوفة مباشرة."""
+    cols = [TAG_COLUMNS[t] for t in tags if t in TAG_COLUMNS]
+    if len(cols) < len(tags):
+        return pd.Series(False, index=unis.index)
+    if not cols:
+        return pd.Series(True, index=unis.index)
+    return unis[cols].all(axis=1)
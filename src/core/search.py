@@ -0,0 +1,211 @@
+"""
+بحث نصي سريع (inverted index على n-grams).
+
+كل صف له match_key محسوب وقت بناء الكتالوج (الحقول بعد normalize_text مفصولة بـ \\x00)
+ونفهرس كل n-gram بطول 1..3.
+- استعلام بطول <= 3: الـ posting list نفسها هي الجواب.
+- استعلام أطول: تقاطع posting lists لكل trigram ثم تحقق substring على المرشحين فقط.
+النتيجة = نفس نتيجة substring على الحقول بعد التوحيد، لكن بدون مسح الجدول كل ضغطة.
+
+وفيه كمان BM25Index: بحث مرتب حسب الصلة (BM25 عبر rank-bm25) مع top-k ونتيجة لكل صف.
+
+التطابق مع substring على الكتالوج ينفحص في tests/test_search.py.
+"""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.core.textnorm import normalize_series, normalize_text
+
+NGRAM = 3
+SEP = "\x00"
+
+UNI_SEARCH_COLS = ["name_en", "name_ar", "city"]
+# البرامج تنبحث كمان باسم الجامعة (name_key من جدول الجامعات)
+PROG_SEARCH_COLS = ["program_name_en", "program_name_ar", "city"]
+UNI_NAME_COLS = ["name_en", "name_ar"]
+
+# BM25 يشوف حقول أكثر (الدولة/النوع/التخصص) لأنه ترتيب مو فلتر حرفي
+UNI_RANK_COLS = ["name_en", "name_ar", "city", "country", "type"]
+PROG_RANK_COLS = ["program_name_en", "program_name_ar", "major_field", "degree_type", "level", "name_en", "name_ar", "city"]
+
+_TOKEN = re.compile(r"\w+")
+
+
+def build_match_key(df: pd.DataFrame, cols: list[str]) -> pd.Series:
+    """الحقول بعد التوحيد في نص واحد مفصول بـ SEP (يتخزن في الـ snapshot)."""
+    cols = [c for c in cols if c in df.columns]
+    if df.empty or not cols:
+        return pd.Series([""] * len(df), index=df.index, dtype=str)
+    key = normalize_series(df[cols[0]])
+    for c in cols[1:]:
+        key = key + SEP + normalize_series(df[c])
+    return key
+
+
+class TextIndex:
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+        postings: dict[str, list[int]] = {}
+        for i, t in enumerate(texts):
+            grams = set()
+            for n in range(1, NGRAM + 1):
+                grams.update(t[j:j + n] for j in range(len(t) - n + 1))
+            for g in grams:
+                if SEP not in g:
+                    postings.setdefault(g, []).append(i)
+        self.postings = {g: np.asarray(ids, dtype=np.int32) for g, ids in postings.items()}
+
+    def search(self, q: str) -> np.ndarray:
+        """مواقع الصفوف (positions) اللي تحتوي q في أي حقل، بالترتيب."""
+        q = normalize_text(q)
+        if not q:
+            return np.arange(len(self.texts), dtype=np.int32)
+        if len(q) <= NGRAM:
+            return self.postings.get(q, np.empty(0, dtype=np.int32))
+
+        grams = {q[j:j + NGRAM] for j in range(len(q) - NGRAM + 1)}
+        lists = [self.postings.get(g) for g in grams]
+        if any(x is None for x in lists):
+            return np.empty(0, dtype=np.int32)
+        lists.sort(key=len)
+        cand = lists[0]
+        for other in lists[1:]:
+            cand = np.intersect1d(cand, other, assume_unique=True)
+            if cand.size == 0:
+                return cand
+        texts = self.texts
+        return np.fromiter((i for i in cand if q in texts[i]), dtype=np.int32)
+
+    def mask(self, q: str, index: pd.Index) -> np.ndarray:
+        """Boolean mask على index (لازم يكون RangeIndex الأصلي من الكتالوج أو جزء منه)."""
+        return index.isin(self.search(q))
+
+
+def tokenize(s: str) -> list[str]:
+    return _TOKEN.findall(normalize_text(s))
+
+
+class BM25Index:
+    """
+    BM25 (Okapi) بصيغة posting lists مضغوطة (CSR):
+    term -> [offsets[t], offsets[t+1]) داخل doc_ids / tfs.
+    الـ idf وأطوال المستندات نحسبها بـ rank_bm25 وقت البناء، والتقييم وقت البحث
+    يلمس فقط المستندات اللي فيها كلمات الاستعلام (مو كل الـ corpus).
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, vocab: dict[str, int], offsets: np.ndarray, doc_ids: np.ndarray,
+                 tfs: np.ndarray, idf: np.ndarray, doc_len: np.ndarray):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.idf = idf
+        self.doc_len = doc_len
+        avgdl = float(doc_len.mean()) if doc_len.size else 1.0
+        self._norm = (self.K1 * (1 - self.B + self.B * doc_len / max(avgdl, 1e-9))).astype(np.float32)
+
+    def __len__(self) -> int:
+        return int(self.doc_len.size)
+
+    @classmethod
+    def build(cls, texts: list[str]) -> "BM25Index":
+        from rank_bm25 import BM25Okapi
+
+        corpus = [tokenize(t) for t in texts]
+        if not any(corpus):
+            empty = np.empty(0, dtype=np.int32)
+            return cls({}, np.zeros(1, dtype=np.int64), empty, empty, np.empty(0, dtype=np.float32),
+                       np.zeros(len(corpus), dtype=np.float32))
+
+        bm25 = BM25Okapi(corpus, k1=cls.K1, b=cls.B)
+        vocab = {t: i for i, t in enumerate(sorted(bm25.idf))}
+        per_term: list[list[tuple[int, int]]] = [[] for _ in vocab]
+        for d, freqs in enumerate(bm25.doc_freqs):
+            for t, f in freqs.items():
+                per_term[vocab[t]].append((d, f))
+
+        lengths = np.fromiter((len(x) for x in per_term), dtype=np.int64, count=len(per_term))
+        offsets = np.zeros(len(per_term) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        doc_ids = np.fromiter((d for x in per_term for d, _ in x), dtype=np.int32, count=int(offsets[-1]))
+        tfs = np.fromiter((f for x in per_term for _, f in x), dtype=np.int32, count=int(offsets[-1]))
+        idf = np.array([bm25.idf[t] for t in vocab], dtype=np.float32)
+        return cls(vocab, offsets, doc_ids, tfs, idf, np.asarray(bm25.doc_len, dtype=np.float32))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, cols: list[str]) -> "BM25Index":
+        cols = [c for c in cols if c in df.columns]
+        if df.empty or not cols:
+            return cls.build([])
+        texts = df[cols].astype(str).agg(" ".join, axis=1)
+        return cls.build(texts.tolist())
+
+    # ---------- persistence ----------
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        tmp = path.with_name(path.stem + ".tmp.npz")
+        terms = np.array(list(self.vocab), dtype=object)
+        np.savez(tmp, terms=terms.astype(str), offsets=self.offsets, doc_ids=self.doc_ids,
+                 tfs=self.tfs, idf=self.idf, doc_len=self.doc_len)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as z:
+            vocab = {t: i for i, t in enumerate(z["terms"].tolist())}
+            return cls(vocab, z["offsets"], z["doc_ids"], z["tfs"], z["idf"], z["doc_len"])
+
+    @classmethod
+    def load_or_build(cls, path: Path, df: pd.DataFrame, cols: list[str]) -> "BM25Index":
+        path = Path(path)
+        try:
+            return cls.load(path)
+        except (OSError, ValueError, KeyError):
+            pass
+        index = cls.from_frame(df, cols)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            index.save(path)
+        except OSError:
+            pass
+        return index
+
+    # ---------- query ----------
+    def scores(self, query: str) -> np.ndarray:
+        """نتيجة BM25 لكل مستند (0 للي ما فيها أي كلمة)."""
+        out = np.zeros(len(self), dtype=np.float32)
+        for tok in set(tokenize(query)):
+            t = self.vocab.get(tok)
+            if t is None:
+                continue
+            lo, hi = self.offsets[t], self.offsets[t + 1]
+            ids = self.doc_ids[lo:hi]
+            tf = self.tfs[lo:hi].astype(np.float32)
+            out[ids] += self.idf[t] * tf * (self.K1 + 1) / (tf + self._norm[ids])
+        return out
+
+    def top_k(self, query: str, k: int = 20, candidates: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        أفضل k مستند (positions, scores) مرتبة تنازلياً، فقط اللي نتيجتها > 0.
+        candidates (اختياري): positions مسموحة (مثلاً بعد فلاتر الدولة/النوع).
+        """
+        s = self.scores(query)
+        if candidates is not None:
+            allowed = np.zeros(len(self), dtype=bool)
+            allowed[np.asarray(candidates, dtype=np.int64)] = True
+            s = np.where(allowed, s, 0)
+        hits = np.flatnonzero(s > 0)
+        if hits.size > k:
+            hits = hits[np.argpartition(-s[hits], k - 1)[:k]]
+        order = np.argsort(-s[hits], kind="stable")
+        hits = hits[order]
+        return hits, s[hits]
+
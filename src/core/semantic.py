@@ -0,0 +1,267 @@
+"""
+فهرس دلالي محلي (بدون شبكة ولا موديل) للبرامج والجامعات.
+
+البحث بالكلمات ما يربط "تقنية" بـ "Computer Science"، فكل مستند يتوسع قبل الفهرسة:
+تخصص البرنامج يجيب معه أسماءه البديلة (intent.MAJOR_ALIASES) وكلمات موضوعه (MAJOR_TOPICS).
+- المتجه: كلمات + char n-grams (3-4) بعد التوحيد، hashing trick لـ DIM بعد، وزن idf، L2 -> float32
+- التخزين: data/.semantic/<name>/vectors.npy (memmap) + keys.npy (hash نص كل مستند) + idf.npy
+- البناء تزايدي: المستند اللي نصه ما تغير ينسخ صفه من الملف القديم، والجديد بس ينحسب
+  (idf يثبت من آخر بناء كامل؛ إذا تغير أكثر من REBUILD_FRACTION نبني من جديد)
+- الاستعلام: cosine = V·q على دفعات من الصفوف + argpartition لأفضل k
+المتجهات لكل نص فريد، و row_doc يربط كل صف (برنامج/جامعة) بنصه.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import zlib
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.core.intent import MAJOR_ALIASES, STOPWORDS, phrase_tokens
+
+DIM = 512
+NGRAMS = (3, 4)
+# الكلمة الكاملة أثقل من قطعها (n-grams الكلمات الغريبة على الكتالوج تضيف ضجيج بس)
+WORD_WEIGHT = 3
+BATCH = 32768
+REBUILD_FRACTION = 0.3
+# تحت هالتشابه = ضجيج (n-grams مشتركة عامة)
+MIN_SIM = 0.08
+FORMAT_VERSION = 2
+
+# كلمات الموضوع لكل تخصص (عربي/إنجليزي): اللي يكتبه الطالب لما ما يعرف اسم التخصص
+MAJOR_TOPICS = {
+    "Computer Science": ["تقنية", "تكنولوجيا", "برمجة", "كمبيوتر", "حاسب", "software", "programming", "technology", "tech", "computing"],
+    "Artificial Intelligence": ["تقنية", "ذكاء", "تعلم الآلة", "روبوت", "machine learning", "technology", "tech", "data"],
+    "Information Technology": ["تقنية", "تكنولوجيا", "شبكات", "أنظمة", "networks", "systems", "technology", "tech"],
+    "Cybersecurity": ["تقنية", "أمن", "حماية", "اختراق", "security", "hacking", "technology", "tech", "networks"],
+    "Data Science": ["تقنية", "بيانات", "تحليل", "إحصاء", "analytics", "statistics", "data", "technology"],
+    "Engineering": ["هندسة", "مهندس", "تصميم", "engineer", "design", "technology"],
+    "Business": ["تجارة", "إدارة", "تسويق", "مال", "commerce", "management", "marketing", "finance"],
+    "Business Administration": ["تجارة", "إدارة", "تسويق", "محاسبة", "management", "marketing", "accounting", "finance"],
+    "Economics": ["اقتصاد", "مال", "تجارة", "finance", "markets", "economy"],
+    "Education": ["تدريس", "معلم", "تعليم", "teacher", "teaching"],
+    "Health Sciences": ["صحة", "طبي", "تمريض", "health", "nursing", "medical"],
+    "Medicine": ["صحة", "طبيب", "مستشفى", "doctor", "health", "clinical"],
+    "Pharmacy": ["صحة", "أدوية", "دواء", "drugs", "health", "pharmacist"],
+}
+
+PROG_SEMANTIC_COLS = ["program_name_en", "program_name_ar", "major_field", "degree_type", "level"]
+UNI_SEMANTIC_COLS = ["name_en", "name_ar", "type", "city", "country", "accreditation_notes"]
+
+
+def expand_major(major: str) -> str:
+    m = str(major).strip()
+    return " ".join([m, *MAJOR_ALIASES.get(m, []), *MAJOR_TOPICS.get(m, [])])
+
+
+def document_texts(df: pd.DataFrame, cols: list[str]) -> list[str]:
+    """نص المستند لكل صف: الأعمدة + توسيع التخصص (إذا فيه major_field)."""
+    cols = [c for c in cols if c in df.columns]
+    if df.empty or not cols:
+        return [""] * len(df)
+    texts = df[cols].astype(str).agg(" ".join, axis=1)
+    if "major_field" in df.columns:
+        majors = df["major_field"].astype(str)
+        texts = texts + " " + majors.map({m: expand_major(m) for m in pd.unique(majors)})
+    return texts.tolist()
+
+
+def features(text: str) -> Counter:
+    """كلمات (بدون "ال" وبدون كلمات الطلب العامة) + char n-grams لكل كلمة."""
+    out: Counter = Counter()
+    for w in phrase_tokens(text):
+        if w in STOPWORDS or w.isdigit():
+            continue
+        out["w:" + w] += WORD_WEIGHT
+        padded = f" {w} "
+        for n in NGRAMS:
+            for i in range(len(padded) - n + 1):
+                out["c:" + padded[i:i + n]] += 1
+    return out
+
+
+class _Hasher:
+    """feature -> (bucket, sign) ثابت بين الـ processes (crc32، مو hash() بايثون)."""
+
+    def __init__(self, dim: int = DIM):
+        self.dim = dim
+        self._cache: dict[str, tuple[int, float]] = {}
+
+    def __call__(self, feats: Counter) -> tuple[np.ndarray, np.ndarray]:
+        idx = np.empty(len(feats), dtype=np.int64)
+        val = np.empty(len(feats), dtype=np.float32)
+        for j, (f, c) in enumerate(feats.items()):
+            hs = self._cache.get(f)
+            if hs is None:
+                h = zlib.crc32(f.encode("utf-8"))
+                hs = self._cache[f] = (h % self.dim, 1.0 if (h >> 31) & 1 else -1.0)
+            idx[j] = hs[0]
+            val[j] = hs[1] * (1.0 + math.log(c))
+        return idx, val
+
+    def raw(self, text: str) -> np.ndarray:
+        idx, val = self(features(text))
+        return np.bincount(idx, weights=val, minlength=self.dim).astype(np.float32)
+
+
+def _key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _normalize_rows(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    return m / np.where(norms > 0, norms, 1.0)
+
+
+class SemanticIndex:
+    def __init__(self, vectors: np.ndarray, idf: np.ndarray, row_doc: np.ndarray, reused: int = 0, computed: int = 0):
+        self.vectors = vectors
+        self.idf = idf
+        self.row_doc = row_doc
+        self.dim = int(idf.size)
+        self.reused = reused
+        self.computed = computed
+        self._hasher = _Hasher(self.dim)
+
+    def __len__(self) -> int:
+        return int(self.row_doc.size)
+
+    # ---------- build ----------
+    @classmethod
+    def load_or_build(cls, directory: Path, texts: list[str]) -> "SemanticIndex":
+        """
+        يحمّل/يحدّث الفهرس في directory لنصوص texts (صف لكل برنامج/جامعة).
+        الملفات تنكتب بأسماء مؤقتة ثم replace، فالقارئ اللي فاتح الـ memmap القديم ما يتأثر.
+        """
+        directory = Path(directory)
+        codes, uniq = pd.factorize(pd.Series(texts, dtype=object), sort=False)
+        uniq = [str(t) for t in uniq]
+        keys = np.array([_key(t) for t in uniq], dtype="U16")
+        row_doc = codes.astype(np.int64)
+
+        old = cls._load_files(directory)
+        if old is not None and old[0].size == keys.size and np.array_equal(old[0], keys):
+            return cls(old[2], old[1], row_doc, reused=int(keys.size))
+
+        hasher = _Hasher()
+        prev: dict[str, int] = {}
+        idf = None
+        if old is not None:
+            prev = {k: i for i, k in enumerate(old[0].tolist())}
+            missing = sum(1 for k in keys.tolist() if k not in prev)
+            if keys.size and missing / keys.size <= REBUILD_FRACTION:
+                idf = old[1]
+            else:
+                prev = {}
+
+        if idf is None:
+            # بناء كامل: idf من كل المستندات
+            raw = np.zeros((len(uniq), DIM), dtype=np.float32)
+            df_count = np.zeros(DIM, dtype=np.float64)
+            for i, t in enumerate(uniq):
+                raw[i] = hasher.raw(t)
+                df_count += raw[i] != 0
+            idf = (np.log((1 + len(uniq)) / (1 + df_count)) + 1.0).astype(np.float32)
+            vectors_new = _normalize_rows(raw * idf)
+            reused, computed = 0, len(uniq)
+        else:
+            vectors_new = np.empty((len(uniq), DIM), dtype=np.float32)
+            reused = computed = 0
+            old_vectors = old[2]
+            for i, (k, t) in enumerate(zip(keys.tolist(), uniq)):
+                j = prev.get(k)
+                if j is not None:
+                    vectors_new[i] = old_vectors[j]
+                    reused += 1
+                else:
+                    vectors_new[i] = _normalize_rows((hasher.raw(t) * idf)[None, :])[0]
+                    computed += 1
+
+        try:
+            vectors = cls._save_files(directory, keys, idf, vectors_new)
+        except OSError:
+            vectors = vectors_new
+        return cls(vectors, idf, row_doc, reused=reused, computed=computed)
+
+    @staticmethod
+    def _load_files(directory: Path):
+        try:
+            meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+            if meta.get("format") != FORMAT_VERSION or meta.get("dim") != DIM:
+                return None
+            keys = np.load(directory / "keys.npy", allow_pickle=False)
+            idf = np.load(directory / "idf.npy", allow_pickle=False)
+            vectors = np.load(directory / "vectors.npy", mmap_mode="r")
+        except (OSError, ValueError, KeyError):
+            return None
+        if vectors.shape != (keys.size, DIM):
+            return None
+        return keys, idf, vectors
+
+    @staticmethod
+    def _save_files(directory: Path, keys: np.ndarray, idf: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+        directory.mkdir(parents=True, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+        tmp = directory / ("vectors.npy" + suffix)
+        mm = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=vectors.shape)
+        mm[:] = vectors
+        mm.flush()
+        del mm
+        np.save(directory / ("keys" + suffix + ".npy"), keys)
+        np.save(directory / ("idf" + suffix + ".npy"), idf)
+        tmp.replace(directory / "vectors.npy")
+        (directory / ("keys" + suffix + ".npy")).replace(directory / "keys.npy")
+        (directory / ("idf" + suffix + ".npy")).replace(directory / "idf.npy")
+        (directory / "meta.json").write_text(json.dumps({"format": FORMAT_VERSION, "dim": DIM}), encoding="utf-8")
+        return np.load(directory / "vectors.npy", mmap_mode="r")
+
+    # ---------- query ----------
+    def encode(self, queries: list[str]) -> np.ndarray:
+        """متجهات الاستعلامات (m × dim) بنفس الـ idf، L2."""
+        raw = np.stack([self._hasher.raw(q) for q in queries]) if queries else np.zeros((0, self.dim), np.float32)
+        return _normalize_rows(raw * self.idf).astype(np.float32)
+
+    def doc_scores(self, queries: list[str]) -> np.ndarray:
+        """cosine لكل (استعلام، نص فريد): m × n_docs، الحساب على دفعات من الـ memmap."""
+        q = self.encode(queries)
+        n = self.vectors.shape[0]
+        out = np.empty((len(queries), n), dtype=np.float32)
+        for lo in range(0, n, BATCH):
+            out[:, lo:lo + BATCH] = q @ np.asarray(self.vectors[lo:lo + BATCH]).T
+        return out
+
+    def scores(self, query: str) -> np.ndarray:
+        """تشابه كل صف مع الاستعلام (0 تحت MIN_SIM)."""
+        if not str(query).strip() or len(self) == 0:
+            return np.zeros(len(self), dtype=np.float32)
+        sims = self.doc_scores([query])[0][self.row_doc]
+        sims[sims < MIN_SIM] = 0.0
+        return sims
+
+    def top_k_many(self, queries: list[str], k: int = 10) -> list[tuple[np.ndarray, np.ndarray]]:
+        """أفضل k صف لكل استعلام (positions, cosine) تنازلياً، دفعة وحدة لكل الاستعلامات."""
+        if not queries:
+            return []
+        doc = self.doc_scores(queries)
+        out = []
+        for sims_doc in doc:
+            sims = sims_doc[self.row_doc]
+            kk = min(k, sims.size)
+            if kk == 0:
+                out.append((np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)))
+                continue
+            top = np.argpartition(-sims, kk - 1)[:kk]
+            top = top[np.lexsort((top, -sims[top]))]
+            keep = sims[top] >= MIN_SIM
+            out.append((top[keep], sims[top][keep]))
+        return out
+
+    def top_k(self, query: str, k: int = 10) -> tuple[np.ndarray, np.ndarray]:
+        return self.top_k_many([query], k)[0]
@@ -0,0 +1,41 @@
+"""
+توحيد النص العربي/الإنجليزي قبل المطابقة.
+
+نفس الدالة تُطبق على بيانات الكتالوج (وقت بناء الـ snapshot) وعلى استعلام المستخدم،
+فـ "جامعه" = "جامعة"، و"إمارات" = "امارات"، و"٢٠٢٤" = "2024".
+"""
+from __future__ import annotations
+
+import re
+
+import pandas as pd
+
+# أشكال الألف/الياء/الهمزة/التاء المربوطة + حروف فارسية شائعة -> شكل واحد، والتطويل يُحذف
+_FOLD = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي", "ی": "ي",
+    "ؤ": "و",
+    "ة": "ه",
+    "ک": "ك",
+    "ـ": None,
+    # أرقام عربية-هندية وفارسية
+    **{chr(0x0660 + i): str(i) for i in range(10)},
+    **{chr(0x06F0 + i): str(i) for i in range(10)},
+})
+
+# التشكيل (فتحة/ضمة/كسرة/تنوين/شدة/سكون) + الألف الخنجرية
+_TASHKEEL = re.compile(r"[\u064B-\u0652\u0670]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(s: str) -> str:
+    s = _TASHKEEL.sub("", str(s)).translate(_FOLD).casefold()
+    return _SPACES.sub(" ", s).strip()
+
+
+def normalize_series(s: pd.Series) -> pd.Series:
+    """نفس normalize_text لعمود كامل (نحسب القيم الفريدة بس، مفيد للأعمدة المتكررة)."""
+    s = s.astype(str)
+    uniq = pd.unique(s)
+    mapping = {v: normalize_text(v) for v in uniq}
+    return s.map(mapping).astype(str)
@@ -0,0 +1,227 @@
+"""
+حماية الـ LLM وقت الزحمة (موسم القبول): كل جلسات Streamlit في نفس الـ process تمر من هنا.
+
+- SingleFlight: طلبات متطابقة (نفس المفتاح) في نفس اللحظة = استدعاء واحد، والباقي ينتظرون نتيجته
+- StreamFlight: نفس الفكرة للـ streams: stream واحد للـ API، وقطعه تنوزع على كل اللي طلبوا نفس المفتاح
+  (حتى لو كل جلسة في event loop/thread مختلف)
+- TokenBucket: معدل ثابت للطلبات اللي تطلع للـ API مع burst، واللي زاد ينتظر في طابور؛
+  إذا الطابور امتلى أو الانتظار طال نرفض فوراً (RateLimited) بدل ما نكدس طلبات ترجع 429
+ولكل واحد stats(): عمق الطابور، زمن الانتظار، عدد اللي تجمعوا/انرفضوا.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import AsyncIterator, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class RateLimited(RuntimeError):
+    """الطابور ممتلئ أو الانتظار أطول من المسموح."""
+
+
+class StreamAborted(RuntimeError):
+    """الـ stream المشترك انقطع عند صاحبه (timeout/cancel/خطأ) قبل ما يكمل."""
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: dict[str, Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], T]) -> tuple[T, bool]:
+        """(النتيجة، shared): أول واحد ينفذ fn، واللي يجون بنفس المفتاح قبل ما يخلص ينتظرونه."""
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                fut = Future()
+                self._inflight[key] = fut
+                self.leaders += 1
+                leader = True
+        if not leader:
+            return fut.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"inflight": len(self._inflight), "leaders": self.leaders, "coalesced": self.coalesced}
+
+
+class _SharedStream:
+    def __init__(self):
+        self.chunks: list[str] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+
+class StreamFlight:
+    """
+    stream(key, factory): أول واحد (leader) يشغّل factory() ويوزع كل قطعة؛ اللي يجون بنفس المفتاح
+    قبل ما يخلص ياخذون القطع اللي فاتتهم ثم يكملون معه. إذا الـ leader انقطع، الباقين ياخذون StreamAborted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: dict[str, _SharedStream] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        with self._lock:
+            shared = self._inflight.get(key)
+            leader = shared is None
+            if leader:
+                shared = self._inflight[key] = _SharedStream()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        if leader:
+            async for piece in self._lead(key, shared, factory):
+                yield piece
+        else:
+            async for piece in self._follow(shared):
+                yield piece
+
+    def _notify(self, shared: _SharedStream) -> None:
+        # الاستدعاء من thread الـ leader: كل منتظر ينصحى في الـ loop حقه
+        for loop, event in list(shared.waiters):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # الـ loop حقه انسكر
+
+    async def _lead(self, key: str, shared: _SharedStream,
+                    factory: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        error: BaseException | None = None
+        try:
+            async for piece in factory():
+                with self._lock:
+                    shared.chunks.append(piece)
+                self._notify(shared)
+                yield piece
+        except BaseException as e:
+            # يشمل CancelledError/GeneratorExit (timeout أو اللي يقرأ وقف)
+            error = e
+            raise
+        finally:
+            with self._lock:
+                shared.done = True
+                shared.error = error
+                if self._inflight.get(key) is shared:
+                    del self._inflight[key]
+            self._notify(shared)
+
+    async def _follow(self, shared: _SharedStream) -> AsyncIterator[str]:
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._lock:
+            shared.waiters.append(waiter)
+        i = 0
+        try:
+            while True:
+                event.clear()
+                with self._lock:
+                    new, done, error = shared.chunks[i:], shared.done, shared.error
+                for piece in new:
+                    yield piece
+                i += len(new)
+                if done:
+                    if error is not None:
+                        raise StreamAborted(f"shared stream failed: {type(error).__name__}")
+                    return
+                await event.wait()
+        finally:
+            with self._lock:
+                shared.waiters.remove(waiter)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"inflight": len(self._inflight), "leaders": self.leaders, "coalesced": self.coalesced}
+
+
+class TokenBucket:
+    """
+    rate توكن بالثانية، capacity = أكبر burst. acquire() ينتظر دوره (FIFO تقريباً عبر التذاكر).
+    max_queue: أكثر عدد منتظرين؛ max_wait: أطول انتظار متوقع (ثواني) قبل الرفض.
+    """
+
+    def __init__(self, rate: float, capacity: float, max_queue: int = 50, max_wait: float = 30.0):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.waited = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """ينتظر لين فيه توكن. يرجّع زمن الانتظار (ms). RateLimited إذا الطابور ما يتحمل."""
+        t0 = time.monotonic()
+        with self._lock:
+            self._refill(t0)
+            # الحجز مقدماً: التوكن ممكن يصير سالب = دين على اللي بعده، فالانتظار = الدين / المعدل
+            wait = max(0.0, (1.0 - self._tokens) / self.rate)
+            if wait > 0 and (self.queue_depth >= self.max_queue or wait > self.max_wait):
+                self.rejected += 1
+                raise RateLimited(f"LLM queue full ({self.queue_depth} waiting, ~{wait:.1f}s)")
+            self._tokens -= 1.0
+            if wait > 0:
+                self.queue_depth += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+        if wait > 0:
+            time.sleep(wait)
+            with self._lock:
+                self.queue_depth -= 1
+
+        ms = (time.monotonic() - t0) * 1000
+        with self._lock:
+            self.acquired += 1
+            if wait > 0:
+                self.waited += 1
+                self.wait_ms_total += ms
+                self.wait_ms_max = max(self.wait_ms_max, ms)
+        return ms
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "acquired": self.acquired,
+                "rejected": self.rejected,
+                "waited": self.waited,
+                "wait_ms_avg": round(self.wait_ms_total / self.waited, 2) if self.waited else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 2),
+            }
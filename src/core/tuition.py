@@ -0,0 +1,243 @@
+"""
+الرسوم الدراسية (tuition_notes في programs.csv) كأرقام.
+
+وقت بناء الـ snapshot نحلل النص ("QAR 45,000 - 60,000 per year" / "12k USD per semester" / "Free"...)
+إلى مدى سنوي بعملته الأصلية: tuition_min / tuition_max / tuition_currency.
+التحويل لعملة وحدة (USD) يصير وقت تحميل الكتالوج من data/currency_rates.csv،
+فتحديث الأسعار ما يحتاج إعادة بناء الـ snapshot.
+
+TuitionIndex: المدى مرتب (بداية ونهاية) عشان "برامج أقل من X" و"تتقاطع مع ميزانية"
+تكون بحث ثنائي (searchsorted) بدل مسح كل البرامج.
+"""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_CURRENCY = "USD"
+
+# صيغ العملة في النص -> الرمز
+CURRENCY_ALIASES = {
+    "USD": ["usd", "us$", "$", "dollar", "دولار"],
+    "QAR": ["qar", "qr", "ر.ق", "ريال قطري"],
+    "SAR": ["sar", "sr", "ر.س", "ريال سعودي"],
+    "AED": ["aed", "dhs", "dirham", "درهم"],
+    "KWD": ["kwd", "kd", "د.ك", "دينار كويتي"],
+    "BHD": ["bhd", "bd", "د.ب", "دينار بحريني"],
+    "OMR": ["omr", "ro", "ر.ع", "ريال عماني"],
+    "EUR": ["eur", "€", "euro", "يورو"],
+    "GBP": ["gbp", "£", "pound", "جنيه"],
+}
+# عملة الدولة إذا النص ما ذكر عملة
+COUNTRY_CURRENCY = {
+    "Qatar": "QAR", "Saudi Arabia": "SAR", "UAE": "AED",
+    "Kuwait": "KWD", "Bahrain": "BHD", "Oman": "OMR",
+}
+
+# كم مرة تنحسب الرسوم في السنة حسب الفترة المذكورة
+PERIODS = [
+    (("semester", "term", "فصل"), 2.0),
+    (("month", "شهر"), 12.0),
+    (("year", "annual", "سنوي", "سنة"), 1.0),
+]
+# "total"/"إجمالي" ككلمة مستقلة بس ("Program fee ... per semester" مو إجمالي البرنامج)
+_TOTAL = re.compile(r"(?<![a-z])total(?![a-z])|(?<!\w)(?:ال)?إجمالي")
+FREE_HINTS = ("free", "مجاني", "مجانية", "no tuition")
+# عملات بثلاث خانات عشرية: "BHD 1.250" = 1.25 مو 1250
+THREE_DECIMAL_CURRENCIES = {"KWD", "BHD", "OMR"}
+
+TUITION_COLS = ["tuition_min", "tuition_max", "tuition_currency"]
+MIN_AMOUNT = 50.0
+
+_AMOUNT = re.compile(r"(\d+(?:[.,]\d+)*)\s*(k|K|ألف)?")
+
+
+def _amounts(text: str, currency: str = "") -> list[float]:
+    out = []
+    for num, k in _AMOUNT.findall(text):
+        # "45,000" و"1.200" فواصل آلاف، و"6,5" كسر عشري؛ بالدينار/الريال العماني "1.250" كسر
+        if currency in THREE_DECIMAL_CURRENCIES and re.fullmatch(r"\d+\.\d{3}", num):
+            pass
+        elif re.fullmatch(r"\d{1,3}([.,]\d{3})+", num):
+            num = num.replace(",", "").replace(".", "")
+        else:
+            num = num.replace(",", ".")
+        try:
+            v = float(num)
+        except ValueError:
+            continue
+        out.append(v * 1000 if k else v)
+    return out
+
+
+def _currency(text: str) -> str:
+    low = text.lower()
+    for code, aliases in CURRENCY_ALIASES.items():
+        for a in aliases:
+            if re.search(rf"(?<![a-z]){re.escape(a)}(?![a-z])", low):
+                return code
+    return ""
+
+
+def parse_tuition(text: str, duration: float = np.nan) -> tuple[float, float, str]:
+    """
+    نص الرسوم -> (أقل، أعلى) سنوياً + العملة (nan, nan, "" إذا ما فيه مبلغ).
+    العملة "" = ما انذكرت، وتنحسب وقت التحويل من دولة الجامعة (COUNTRY_CURRENCY).
+    """
+    text = str(text).strip()
+    low = text.lower()
+    currency = _currency(text)
+
+    # أرقام صغيرة (مدة "4 years"، "2 semesters") مو رسوم
+    amounts = [a for a in _amounts(text, currency) if a >= MIN_AMOUNT]
+    if not amounts:
+        # "Free" بس إذا ما فيه مبلغ ("free for nationals; international QAR 60,000" = 60,000)
+        if any(h in low for h in FREE_HINTS):
+            return 0.0, 0.0, BASE_CURRENCY
+        return np.nan, np.nan, ""
+
+    lo, hi = min(amounts[:2]), max(amounts[:2])
+    factor = 1.0
+    if _TOTAL.search(low) and duration and duration > 0:
+        factor = 1.0 / float(duration)
+    else:
+        for hints, f in PERIODS:
+            if any(h in low for h in hints):
+                factor = f
+                break
+    return lo * factor, hi * factor, currency
+
+
+def parse_tuition_column(progs: pd.DataFrame) -> pd.DataFrame:
+    """tuition_min / tuition_max (سنوي بالعملة الأصلية) + tuition_currency لكل برنامج."""
+    text = progs["tuition_notes"].fillna("").astype(str) if "tuition_notes" in progs.columns else pd.Series("", index=progs.index)
+    duration = progs["req_duration"] if "req_duration" in progs.columns else pd.Series(np.nan, index=progs.index)
+
+    keys = list(zip(text, duration.astype(float)))
+    parsed = {k: parse_tuition(*k) for k in set(keys)}
+    values = [parsed[k] for k in keys]
+
+    out = pd.DataFrame(index=progs.index)
+    out["tuition_min"] = np.array([v[0] for v in values], dtype=np.float32)
+    out["tuition_max"] = np.array([v[1] for v in values], dtype=np.float32)
+    out["tuition_currency"] = [v[2] for v in values]
+    return out
+
+
+def tuition_report(progs: pd.DataFrame) -> dict[str, int]:
+    """نصوص رسوم غير فاضية ما طلع منها مبلغ (نص -> عدد البرامج)."""
+    if progs.empty or "tuition_notes" not in progs.columns:
+        return {}
+    bad = progs.loc[progs["tuition_min"].isna(), "tuition_notes"].astype(str).str.strip()
+    bad = bad[bad != ""]
+    return {str(k): int(v) for k, v in bad.value_counts().items()}
+
+
+# ----------------------------
+# Currency rates
+# ----------------------------
+def load_rates(path: Path) -> dict[str, float]:
+    """currency_rates.csv: currency,usd_per_unit -> {"QAR": 0.2747, ...} (USD = 1 دائماً)."""
+    rates = {BASE_CURRENCY: 1.0}
+    path = Path(path)
+    if path.exists():
+        df = pd.read_csv(path, dtype=str).dropna()
+        for cur, rate in zip(df["currency"].str.strip().str.upper(), pd.to_numeric(df["usd_per_unit"], errors="coerce")):
+            if rate and rate > 0:
+                rates[cur] = float(rate)
+    return rates
+
+
+def to_base(amount: float, currency: str, rates: dict[str, float]) -> float:
+    return float(amount) * rates.get(currency, np.nan)
+
+
+def from_base(amount: float, currency: str, rates: dict[str, float]) -> float:
+    return float(amount) / rates.get(currency, np.nan)
+
+
+# ----------------------------
+# Interval index
+# ----------------------------
+class TuitionIndex:
+    """
+    مدى الرسوم السنوية لكل برنامج بعملة الأساس (USD). البرامج اللي رسومها غير معروفة برا الترتيب.
+    - under(x): max <= x  -> searchsorted على النهايات المرتبة
+    - overlapping(lo, hi): البرامج اللي مداها يتقاطع مع [lo, hi]
+      (= المعروفة ناقص اللي تبدأ بعد hi ناقص اللي تخلص قبل lo، والمجموعتين ما يتقاطعون)
+    """
+
+    def __init__(self, lo: np.ndarray, hi: np.ndarray):
+        lo = np.asarray(lo, dtype=np.float64)
+        hi = np.asarray(hi, dtype=np.float64)
+        self.n = lo.size
+        self.lo, self.hi = lo, hi
+        known = np.flatnonzero(~np.isnan(lo) & ~np.isnan(hi))
+        self.known = known
+        self.by_start = known[np.argsort(lo[known], kind="stable")]
+        self.by_end = known[np.argsort(hi[known], kind="stable")]
+        self.starts = lo[self.by_start]
+        self.ends = hi[self.by_end]
+
+    @classmethod
+    def from_frame(cls, progs_joined: pd.DataFrame, rates: dict[str, float]) -> "TuitionIndex":
+        """progs_joined (فيه country من جدول الجامعات): العملة الفاضية = عملة دولة الجامعة."""
+        progs = progs_joined
+        if progs.empty or "tuition_min" not in progs.columns:
+            return cls(np.full(len(progs), np.nan), np.full(len(progs), np.nan))
+        currency = progs["tuition_currency"].astype(str)
+        if "country" in progs.columns:
+            fallback = progs["country"].astype(str).map(COUNTRY_CURRENCY).fillna("")
+            currency = currency.where(currency != "", fallback)
+        rate = currency.map(rates).to_numpy(dtype=np.float64)
+        return cls(progs["tuition_min"].to_numpy(dtype=np.float64) * rate,
+                   progs["tuition_max"].to_numpy(dtype=np.float64) * rate)
+
+    def unknown_mask(self) -> np.ndarray:
+        out = np.ones(self.n, dtype=bool)
+        out[self.known] = False
+        return out
+
+    def under(self, x: float) -> np.ndarray:
+        """مواقع البرامج اللي أعلى رسومها <= x."""
+        return self.by_end[:np.searchsorted(self.ends, x, side="right")]
+
+    def count_overlapping(self, lo: float, hi: float) -> int:
+        after = self.starts.size - np.searchsorted(self.starts, hi, side="right")
+        before = np.searchsorted(self.ends, lo, side="left")
+        return int(self.known.size - after - before)
+
+    def overlapping(self, lo: float, hi: float) -> np.ndarray:
+        """مواقع البرامج اللي مداها يتقاطع مع [lo, hi] (بترتيب الملف)."""
+        mask = np.zeros(self.n, dtype=bool)
+        mask[self.by_start[:np.searchsorted(self.starts, hi, side="right")]] = True
+        mask[self.by_end[:np.searchsorted(self.ends, lo, side="left")]] = False
+        return np.flatnonzero(mask)
+
+    def budget_mask(self, budget: float, include_unknown: bool = False) -> np.ndarray:
+        """Boolean mask: برامج تبدأ رسومها ضمن الميزانية (أقل رسوم <= budget)."""
+        mask = np.zeros(self.n, dtype=bool)
+        mask[self.overlapping(0.0, budget)] = True
+        if include_unknown:
+            mask |= self.unknown_mask()
+        return mask
+
+
+def uni_budget_mask(index: TuitionIndex, prog_uni_pos: np.ndarray, n_unis: int,
+                    budget: float, include_unknown: bool = True) -> np.ndarray:
+    """
+    Boolean mask على الجامعات: عندها برنامج رسومه تبدأ ضمن الميزانية.
+    include_unknown: الجامعات اللي ما لها أي رسوم معروفة تنعرض بعد (البيانات ناقصة مو غالية).
+    """
+    ok = prog_uni_pos >= 0
+    hit = index.budget_mask(budget) & ok
+    out = np.bincount(prog_uni_pos[hit], minlength=n_unis)[:n_unis] > 0
+    if include_unknown:
+        known = np.zeros(index.n, dtype=bool)
+        known[index.known] = True
+        has_known = np.bincount(prog_uni_pos[known & ok], minlength=n_unis)[:n_unis] > 0
+        out |= ~has_known
+    return out
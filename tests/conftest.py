@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(scope="session")
+def catalog(tmp_path_factory):
+    """كتالوج من data/*.csv بس الـ snapshot في مجلد مؤقت (ما نلمس data/.snapshot)."""
+    from src.core.catalog import PROGS_PATH, UNIS_PATH, get_catalog
+
+    return get_catalog(UNIS_PATH, PROGS_PATH, tmp_path_factory.mktemp("snapshot"))
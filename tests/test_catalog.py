@@ -0,0 +1,15 @@
+from src.core.catalog import PROGS_PATH, UNIS_PATH, get_catalog
+
+
+def test_semantic_index_lives_next_to_the_snapshots(tmp_path):
+    catalog = get_catalog(UNIS_PATH, PROGS_PATH, tmp_path / ".snapshot")
+    assert catalog.semantic_dir == tmp_path / ".semantic"
+    assert catalog.uni_semantic.reused == 0
+    assert any((tmp_path / ".semantic" / "universities").iterdir())
+
+
+def test_neighbor_tables_live_next_to_the_snapshots(tmp_path):
+    catalog = get_catalog(UNIS_PATH, PROGS_PATH, tmp_path / ".snapshot")
+    assert catalog.neighbors_dir == tmp_path / ".neighbors"
+    assert catalog.prog_neighbors.reused == 0
+    assert any((tmp_path / ".neighbors" / "programs").iterdir())
@@ -0,0 +1,28 @@
+import asyncio
+
+import pandas as pd
+
+from ingest.crawler import Crawler, CrawlStore, Fetched, crawl_jobs
+
+
+def test_shared_url_is_fetched_once_and_credited_to_every_link(tmp_path):
+    unis = pd.DataFrame([
+        {"uni_id": "a", "website": "https://shared.example/", "admissions_url": "https://a.example/apply"},
+        {"uni_id": "b", "website": "https://b.example/", "admissions_url": "https://shared.example/"},
+    ])
+    fetched = []
+
+    def fetch(url, etag="", last_modified="", timeout=0.0):
+        fetched.append(url)
+        return Fetched(200, f"<p>{url}</p>".encode())
+
+    jobs = crawl_jobs(unis)
+    store = CrawlStore(tmp_path)
+    asyncio.run(Crawler(store, delay=0, respect_robots=False, fetch=fetch).run(jobs))
+    review = store.review()
+    store.close()
+
+    assert sorted(fetched) == ["https://a.example/apply", "https://b.example/", "https://shared.example/"]
+    shared = review[review["url"] == "https://shared.example/"]
+    assert sorted(zip(shared["uni_id"], shared["kind"])) == [("a", "website"), ("b", "admissions_url")]
+    assert len(review) == 4
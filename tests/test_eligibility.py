@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.eligibility import compile_constraints, min_average, verdicts
+from src.core.requirements import ADMISSION_TESTS
+
+# برنامج لكل حالة: (اسم، req_test، درجة، مستوى رياضيات، درجة رياضيات، نص المتطلبات، اختبار قبول)
+PROGRAMS = [
+    ("nothing_known", "None", np.nan, 0, np.nan, "", None),
+    ("ielts_6", "IELTS", 6.0, 0, np.nan, "", None),
+    ("ielts_any", "IELTS", np.nan, 0, np.nan, "", None),
+    ("toefl_80", "TOEFL", 80.0, 0, np.nan, "", None),
+    ("math_70", "None", np.nan, 1, 70.0, "", None),
+    ("math_physics", "None", np.nan, 3, np.nan, "", None),
+    ("avg_75", "None", np.nan, 0, np.nan, "Minimum average 75%", None),
+    ("interview", "None", np.nan, 0, np.nan, "", "req_interview"),
+]
+
+
+@pytest.fixture(scope="module")
+def constraints():
+    rows = []
+    for _, test, score, level, math, text, adm in PROGRAMS:
+        row = {"req_test": test, "req_test_score": score, "req_math_level": level, "req_math_score": math,
+               "admissions_requirements": text, "admission_notes": ""}
+        row.update({col: col == adm for col in ADMISSION_TESTS.values()})
+        rows.append(row)
+    return compile_constraints(pd.DataFrame(rows))
+
+
+def _by_name(constraints, **student):
+    return dict(zip((p[0] for p in PROGRAMS), verdicts(constraints, **student)))
+
+
+def test_strong_student(constraints):
+    assert _by_name(constraints, ielts=7.0, hs_avg=90.0, math_avg=85.0) == {
+        "nothing_known": "Unknown",
+        "ielts_6": "Suitable",
+        "ielts_any": "Suitable",
+        # اختبار غير IELTS ما نقدر نتحقق منه من ملف الطالب
+        "toefl_80": "Conditional",
+        "math_70": "Suitable",
+        "math_physics": "Conditional",
+        "avg_75": "Suitable",
+        "interview": "Conditional",
+    }
+
+
+def test_below_the_minimums(constraints):
+    got = _by_name(constraints, ielts=5.5, hs_avg=70.0, math_avg=60.0)
+    assert got["ielts_6"] == got["math_70"] == got["avg_75"] == "Conditional"
+    assert got["ielts_any"] == "Suitable"
+    assert got["nothing_known"] == "Unknown"
+
+
+def test_missing_student_values_are_conditional(constraints):
+    got = _by_name(constraints)
+    assert got["nothing_known"] == "Unknown"
+    assert all(v == "Conditional" for name, v in got.items() if name != "nothing_known")
+
+
+def test_min_average():
+    assert min_average("Minimum average 75%") == 75.0
+    assert min_average("معدل 80 في الثانوية") == 80.0
+    assert np.isnan(min_average("IELTS 6.5"))
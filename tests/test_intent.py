@@ -0,0 +1,59 @@
+import pytest
+
+from src.core.intent import CONFIDENCE_MIN, extract_filters, parse_request
+
+
+class _FakeClient:
+    """نفس واجهة LLMClient.complete، ويعد الطلبات."""
+
+    def __init__(self, reply: str):
+        self.reply = reply
+        self.calls = 0
+
+    def complete(self, prompt, system="", **params):
+        self.calls += 1
+        return type("Reply", (), {"text": self.reply})()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("أبي بكالوريوس في علوم الحاسب في الإمارات بالإنجليزي",
+     {"country": "UAE", "level": "Bachelor", "major_field": "Computer Science", "language": "English"}),
+    ("Master in Engineering in Doha with scholarship",
+     {"city": "Doha", "level": "Master", "major_field": "Engineering", "scholarship": "Yes"}),
+    # المدينة تحدد الدولة
+    ("بكالوريوس في دبي", {"country": "UAE", "city": "Dubai", "level": "Bachelor"}),
+])
+def test_rules_map_requests_to_filters(catalog, text, expected):
+    filters = parse_request(text, catalog.gazetteer)
+    assert filters.known() == expected
+    assert filters.confidence >= CONFIDENCE_MIN
+    assert filters.source == "rules"
+
+
+def test_conflicting_values_stay_all_and_lower_confidence(catalog):
+    filters = parse_request("Bachelor in Qatar or UAE", catalog.gazetteer)
+    assert filters.known() == {"level": "Bachelor"}
+    assert filters.confidence < CONFIDENCE_MIN
+
+
+def test_confident_rules_skip_the_llm(catalog):
+    client = _FakeClient('{"country": "Qatar"}')
+    filters = extract_filters("بكالوريوس في دبي", catalog.gazetteer, client)
+    assert client.calls == 0
+    assert filters.country == "UAE"
+
+
+def test_low_confidence_fills_missing_fields_from_the_llm(catalog):
+    client = _FakeClient('{"country": "Qatar", "level": "Master", "city": "Atlantis"}')
+    filters = extract_filters("Bachelor in Qatar or UAE", catalog.gazetteer, client)
+    assert client.calls == 1
+    assert filters.source == "llm"
+    # القواعد تغلب، والقيم برا القاموس تنشال
+    assert filters.known() == {"country": "Qatar", "level": "Bachelor"}
+
+
+def test_no_client_never_calls_the_llm(catalog):
+    filters = extract_filters("ابي شي حلو وقريب من البيت", catalog.gazetteer, None)
+    assert filters.known() == {}
+    assert filters.confidence == 0.0
+    assert filters.source == "rules"
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+from src.core.llm import LLMClient, ResponseStore, StubBackend
+from src.core.throttle import SingleFlight
+
+
+class _ApiLike(StubBackend):
+    @property
+    def identity(self) -> str:
+        return "openai:default"
+
+
+def test_stub_replies_are_not_served_to_another_backend(tmp_path):
+    store = ResponseStore(tmp_path / "responses.sqlite")
+    stub = LLMClient(StubBackend(), model="gpt-4o-mini", store=store)
+    stub.complete("hello")
+    assert stub.complete("hello").cached
+
+    api_backend = _ApiLike(reply="real answer")
+    api = LLMClient(api_backend, model="gpt-4o-mini", store=store)
+    resp = api.complete("hello")
+    assert not resp.cached
+    assert resp.text == "real answer"
+    assert api_backend.calls == 1
+
+
+async def _collect(client: LLMClient, prompt: str) -> str:
+    return "".join([piece async for piece in client.astream(prompt)])
+
+
+def test_identical_streams_share_one_upstream_call(tmp_path):
+    backend = StubBackend(reply="one two three four", delay=0.1, chunk_delay=0.01)
+    client = LLMClient(backend, model="gpt-4o-mini", store=ResponseStore(tmp_path / "r.sqlite"),
+                       flight=SingleFlight())
+
+    async def main():
+        return await asyncio.gather(*(_collect(client, "hello") for _ in range(10)))
+
+    texts = asyncio.run(main())
+    assert backend.calls == 1
+    assert set(texts) == {"one two three four"}
+    assert client.stats()["stream_coalesced"] == 9
+    assert client.complete("hello").cached
+
+
+def test_streams_are_shared_across_event_loops(tmp_path):
+    # كل جلسة Streamlit عندها thread و asyncio.run حقها
+    backend = StubBackend(reply="one two three four", delay=0.1, chunk_delay=0.01)
+    client = LLMClient(backend, model="gpt-4o-mini", store=ResponseStore(tmp_path / "r.sqlite"),
+                       flight=SingleFlight())
+    texts = []
+    threads = [threading.Thread(target=lambda: texts.append(asyncio.run(_collect(client, "hello"))))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert backend.calls == 1
+    assert texts == ["one two three four"] * 5
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from src.core.catalog import Catalog
+from src.core.llm import estimate_tokens
+from src.core.prompts import N_PROGRAMS, N_UNIS, SYSTEM_PREFIX, TOKEN_BUDGET, build_prompt
+from src.core.recommender import Profile, top_k
+
+PROFILE = Profile(country="Qatar", level="Bachelor", ielts=6.5, hs_avg=88.0)
+QUESTION = "أي جامعة أنسب لي في علوم الحاسب؟"
+PREFIX_TOKENS = estimate_tokens(SYSTEM_PREFIX)
+
+
+@pytest.fixture(scope="module")
+def large_catalog(catalog, tmp_path_factory):
+    """نفس الكتالوج مكرر 20 مرة (uni_id/program_id جديدة)."""
+    unis, progs = [], []
+    for i in range(20):
+        unis.append(catalog.unis.astype({"uni_id": str}).assign(uni_id=lambda d: d["uni_id"] + f"_{i}"))
+        progs.append(catalog.progs.astype({"uni_id": str, "program_id": str}).assign(
+            uni_id=lambda d: d["uni_id"] + f"_{i}", program_id=lambda d: d["program_id"] + f"_{i}"))
+    return Catalog.from_frames("large", pd.concat(unis, ignore_index=True), pd.concat(progs, ignore_index=True),
+                               tmp_path_factory.mktemp("large"))
+
+
+def _check(catalog, prompt, budget):
+    # الـ system prefix ثابت وبرا الميزانية
+    assert prompt.tokens <= PREFIX_TOKENS + budget
+    top = top_k(catalog, PROFILE, N_UNIS)["uni_id"].astype(str).tolist()
+    assert 0 < len(prompt.unis) <= N_UNIS
+    assert set(prompt.unis) <= set(top)
+    user = prompt.messages[-1]["content"]
+    assert all(f"U {uid} |" in user for uid in prompt.unis)
+    assert sum(line.startswith("U ") for line in user.splitlines()) == len(prompt.unis)
+    assert len(prompt.programs) <= N_PROGRAMS * len(prompt.unis)
+
+
+def test_prompt_stays_bounded_as_the_catalog_grows(catalog, large_catalog):
+    small = build_prompt(catalog, PROFILE, QUESTION)
+    large = build_prompt(large_catalog, PROFILE, QUESTION)
+    _check(catalog, small, TOKEN_BUDGET)
+    _check(large_catalog, large, TOKEN_BUDGET)
+    assert len(large_catalog.unis) == 20 * len(catalog.unis)
+    # 20 ضعف الكتالوج: نفس عدد المرشحين بالكثير، والباقي ما يدخل الـ prompt
+    assert len(large.unis) == N_UNIS
+    assert small.programs and large.programs
+
+
+def test_tight_budget_drops_programs_before_universities(large_catalog):
+    budget = 250
+    prompt = build_prompt(large_catalog, PROFILE, QUESTION, budget=budget)
+    _check(large_catalog, prompt, budget)
+    # الجامعات الأفضل تبقى، وبرامجها أول اللي ينشال
+    assert prompt.dropped > 0
+    assert len(prompt.unis) > len(prompt.programs)
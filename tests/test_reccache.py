@@ -0,0 +1,64 @@
+import dataclasses
+
+from src.core.reccache import RecommendationCache, cached_iter_top_k
+from src.core.recommender import Profile
+
+
+def _like_app(catalog, profile, cache):
+    # نفس app.py: دفعتين بـ next وبعدها ما نكمل الـ generator
+    batches = cached_iter_top_k(catalog, profile, sizes=(3, 30), cache=cache)
+    top = next(batches, None)
+    rest = next(batches, None)
+    return top, rest
+
+
+def test_two_next_calls_populate_cache(catalog):
+    cache = RecommendationCache()
+    profile = Profile(country="Qatar", level="Bachelor")
+
+    top1, rest1 = _like_app(catalog, profile, cache)
+    assert cache.stats()["size"] == 1
+
+    top2, rest2 = _like_app(catalog, profile, cache)
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert top2["uni_id"].tolist() == top1["uni_id"].tolist()
+    if rest1 is not None:
+        assert rest2["uni_id"].tolist() == rest1["uni_id"].tolist()
+
+
+def test_fewer_results_than_last_size_is_cached(catalog):
+    cache = RecommendationCache()
+    profile = Profile(country="Qatar", city="Doha")
+    list(cached_iter_top_k(catalog, profile, sizes=(3, 1000), cache=cache))
+    list(cached_iter_top_k(catalog, profile, sizes=(3, 1000), cache=cache))
+    assert cache.stats()["hits"] == 1
+
+
+def test_disk_tier_lives_under_the_catalog_snapshot_dir(catalog):
+    profile = Profile(country="Qatar", level="Bachelor")
+    list(cached_iter_top_k(catalog, profile, cache=RecommendationCache(disk=True)))
+    assert list((catalog.snapshot_dir / catalog.version / "recs").glob("*.pkl"))
+
+    fresh = RecommendationCache(disk=True)
+    list(cached_iter_top_k(catalog, profile, cache=fresh))
+    assert fresh.stats()["disk_hits"] == 1
+
+
+def test_rates_change_is_a_miss(catalog, tmp_path, monkeypatch):
+    import src.core.catalog as catalog_module
+
+    cache = RecommendationCache()
+    profile = Profile(country="Qatar", level="Bachelor", budget=20000)
+    list(cached_iter_top_k(catalog, profile, cache=cache))
+
+    rates = tmp_path / "currency_rates.csv"
+    rates.write_text("currency,usd_per_unit\nQAR,0.5\n")
+    monkeypatch.setattr(catalog_module, "RATES_PATH", rates)
+    repriced = dataclasses.replace(catalog)
+    assert repriced.rates_version != catalog.rates_version
+
+    list(cached_iter_top_k(repriced, profile, cache=cache))
+    assert cache.stats()["hits"] == 0
+    assert cache.stats()["misses"] == 2
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from src.core.search import PROG_SEARCH_COLS, UNI_NAME_COLS, UNI_SEARCH_COLS
+from src.core.textnorm import normalize_series, normalize_text
+
+QUERIES = [
+    # إنجليزي / عربي / أجزاء كلمات / صيغ عربية مختلفة / مو موجود
+    "Qatar", "QATAR", "doha ", "university of", "Carnegie", "mel", "ence",
+    "جامعة قطر", "جامعه", "الدوحه", "الإمارات", "أبوظبي", "الذكاء", "سيبر", "ة",
+    "zzzz", "جامعةة", " ", "",
+]
+
+
+def _tables(catalog):
+    return {
+        "universities": (catalog.unis, UNI_SEARCH_COLS, catalog.uni_search),
+        "programs": (catalog.progs_joined, PROG_SEARCH_COLS + UNI_NAME_COLS, catalog.prog_search),
+    }
+
+
+def _substring(fields, q):
+    """الفلتر القديم: str.contains على كل حقل بعد التوحيد."""
+    nq = normalize_text(q)
+    mask = np.zeros(len(fields[0]), dtype=bool)
+    for f in fields:
+        mask |= f.str.contains(nq, regex=False).to_numpy()
+    return set(np.flatnonzero(mask).tolist())
+
+
+@pytest.mark.parametrize("table", ["universities", "programs"])
+@pytest.mark.parametrize("q", QUERIES)
+def test_index_matches_substring_filter(catalog, table, q):
+    df, cols, idx = _tables(catalog)[table]
+    fields = [normalize_series(df[c]) for c in cols]
+    assert set(idx.search(q).tolist()) == _substring(fields, q)
+
+
+@pytest.mark.parametrize("table", ["universities", "programs"])
+def test_index_matches_substring_filter_on_catalog_substrings(catalog, table):
+    # substrings بطول 1..6 من كل قيمة في الكتالوج
+    df, cols, idx = _tables(catalog)[table]
+    fields = [normalize_series(df[c]) for c in cols]
+    queries = set()
+    for f in fields:
+        for v in f.unique():
+            v = v[:40]
+            for n in (1, 2, 3, 4, 6):
+                queries.update(v[j:j + n] for j in range(0, max(len(v) - n + 1, 0), 3))
+    mismatches = [q for q in sorted(queries) if set(idx.search(q).tolist()) != _substring(fields, q)]
+    assert not mismatches
@@ -0,0 +1,26 @@
+import numpy as np
+
+from src.core.tuition import _amounts, parse_tuition
+
+
+def test_program_fee_is_not_a_total():
+    assert parse_tuition("Program fee: KWD 1,500 per semester", duration=4) == (3000.0, 3000.0, "KWD")
+
+
+def test_total_is_divided_by_duration():
+    assert parse_tuition("Total program cost: USD 48,000", duration=4) == (12000.0, 12000.0, "USD")
+    assert parse_tuition("الإجمالي 48,000 ر.ق", duration=4) == (12000.0, 12000.0, "QAR")
+
+
+def test_free_for_some_students_keeps_the_amount():
+    note = "Tuition free for nationals; international students QAR 60,000 per year"
+    assert parse_tuition(note) == (60000.0, 60000.0, "QAR")
+    assert parse_tuition("Free") == (0.0, 0.0, "USD")
+
+
+def test_three_decimal_currencies():
+    assert _amounts("BHD 1.250 per credit hour", "BHD") == [1.25]
+    lo, hi, cur = parse_tuition("BHD 1.250 per credit hour")
+    assert np.isnan(lo) and np.isnan(hi) and cur == ""
+    assert parse_tuition("QAR 1.250 per semester") == (2500.0, 2500.0, "QAR")
+    assert parse_tuition("KWD 2,500 per year") == (2500.0, 2500.0, "KWD")